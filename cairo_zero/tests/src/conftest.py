@@ -1,22 +1,142 @@
+import logging
 import shutil
 from pathlib import Path
 
 import pytest
 
+from kakarot_scripts.compare_resources import save_resources
+from tests.utils.benchmark import (
+    benchmarks,
+    load_records,
+    merge_benchmarks,
+    tracked_resources,
+)
 from tests.utils.coverage import report_runs
-from tests.utils.reporting import dump_coverage
+from tests.utils.differential import (
+    DIFFERENTIAL_RESULTS_DIR,
+    differential_results,
+    merge_differential_results,
+)
+from tests.utils.ef_tests import (
+    EF_TESTS_RESULTS_DIR,
+    EFTestsCache,
+    ef_tests_results,
+    merge_ef_tests_results,
+)
+from tests.utils.reporting import dump_coverage, merge_coverage
+from tests.utils.syscall_handler import dump_account_storage_addresses
+
+logger = logging.getLogger()
+
+COVERAGE_DIR = Path("coverage")
+WORKERS_COVERAGE_DIR = COVERAGE_DIR / "workers"
+BENCHMARKS_DIR = Path("benchmarks")
+WORKERS_BENCHMARKS_DIR = BENCHMARKS_DIR / "workers"
+WORKERS_RESOURCES_DIR = Path("resources") / "workers"
+WORKERS_EF_TESTS_RESULTS_DIR = EF_TESTS_RESULTS_DIR / "workers"
+WORKERS_DIFFERENTIAL_RESULTS_DIR = DIFFERENTIAL_RESULTS_DIR / "workers"
+
+
+def pytest_sessionstart(session):
+    # Only the controller (or the single process without xdist) cleans previous worker reports.
+    if hasattr(session.config, "workerinput"):
+        return
+    if session.config.getoption("cairo_coverage"):
+        shutil.rmtree(WORKERS_COVERAGE_DIR, ignore_errors=True)
+    shutil.rmtree(WORKERS_BENCHMARKS_DIR, ignore_errors=True)
+    shutil.rmtree(WORKERS_RESOURCES_DIR, ignore_errors=True)
+    shutil.rmtree(WORKERS_EF_TESTS_RESULTS_DIR, ignore_errors=True)
+    shutil.rmtree(WORKERS_DIFFERENTIAL_RESULTS_DIR, ignore_errors=True)
+    if session.config.getoption("ef_tests_cache") == "clear":
+        EFTestsCache().clear()
+
+
+def pytest_sessionfinish(session):
+    # Workers have all dumped their coverage and benchmarks by the time the controller session finishes.
+    if hasattr(session.config, "workerinput"):
+        return
+
+    if WORKERS_BENCHMARKS_DIR.exists():
+        merge_benchmarks(WORKERS_BENCHMARKS_DIR, BENCHMARKS_DIR / "cairo_zero.json")
+        shutil.rmtree(WORKERS_BENCHMARKS_DIR, ignore_errors=True)
+
+    if WORKERS_RESOURCES_DIR.exists():
+        save_resources(load_records(WORKERS_RESOURCES_DIR))
+        shutil.rmtree(WORKERS_RESOURCES_DIR, ignore_errors=True)
+
+    if WORKERS_EF_TESTS_RESULTS_DIR.exists():
+        results = merge_ef_tests_results(
+            WORKERS_EF_TESTS_RESULTS_DIR, EF_TESTS_RESULTS_DIR / "results.csv"
+        )
+        shutil.rmtree(WORKERS_EF_TESTS_RESULTS_DIR, ignore_errors=True)
+        if not results.empty:
+            logger.info(
+                f"EF tests: {results.passed.sum()}/{len(results)} passed, "
+                f"results written to {EF_TESTS_RESULTS_DIR / 'results.csv'}"
+            )
+
+    if WORKERS_DIFFERENTIAL_RESULTS_DIR.exists():
+        results = merge_differential_results(
+            WORKERS_DIFFERENTIAL_RESULTS_DIR, DIFFERENTIAL_RESULTS_DIR / "results.csv"
+        )
+        shutil.rmtree(WORKERS_DIFFERENTIAL_RESULTS_DIR, ignore_errors=True)
+        if not results.empty:
+            logger.info(
+                f"Differential: {results.passed.sum()}/{len(results)} cases matching, "
+                f"median slowdown {results.slowdown.median():.0f}x, "
+                f"results written to {DIFFERENTIAL_RESULTS_DIR / 'results.csv'}"
+            )
+
+    if not session.config.getoption("cairo_coverage"):
+        return
+    if not WORKERS_COVERAGE_DIR.exists():
+        return
+
+    merge_coverage(WORKERS_COVERAGE_DIR, COVERAGE_DIR / "coverage.json")
+    shutil.rmtree(WORKERS_COVERAGE_DIR, ignore_errors=True)
 
 
 @pytest.fixture(scope="session", autouse=True)
-async def coverage(worker_id):
+async def coverage(request, worker_id):
     yield
 
+    if not request.config.getoption("cairo_coverage"):
+        return
+
     files = report_runs(excluded_file={"site-packages", "tests"})
+    dump_coverage(WORKERS_COVERAGE_DIR / f"{worker_id}.jsonl", files)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def benchmark_report(worker_id):
+    yield
+
+    if benchmarks.records:
+        benchmarks.dump(WORKERS_BENCHMARKS_DIR / f"{worker_id}.json")
+    if tracked_resources.records:
+        tracked_resources.dump(WORKERS_RESOURCES_DIR / f"{worker_id}.json")
+    if ef_tests_results.results:
+        ef_tests_results.dump(WORKERS_EF_TESTS_RESULTS_DIR / f"{worker_id}.json")
+    if differential_results.results:
+        differential_results.dump(
+            WORKERS_DIFFERENTIAL_RESULTS_DIR / f"{worker_id}.json"
+        )
+    dump_account_storage_addresses()
 
-    output_dir = Path("coverage")
-    if worker_id != "master":
-        output_dir = output_dir / worker_id
 
-    output_dir.mkdir(exist_ok=True, parents=True)
-    shutil.rmtree(output_dir, ignore_errors=True)
-    dump_coverage(output_dir, files)
+@pytest.fixture(autouse=True)
+def track_resources(request):
+    if not request.config.getoption("track_resources"):
+        yield
+        return
+
+    with tracked_resources.measure(request.node.nodeid):
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def ef_tests_cache(request):
+    if request.config.getoption("ef_tests_cache") != "off":
+        ef_tests_results.cache = EFTestsCache()
+    yield
+    ef_tests_results.cache = None
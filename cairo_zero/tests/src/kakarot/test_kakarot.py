@@ -16,8 +16,20 @@ from web3._utils.abi import map_abi_data
 from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
 from web3.exceptions import NoABIFunctionsFound
 
-from kakarot_scripts.ef_tests.fetch import EF_TESTS_PARSED_DIR
+from tests.utils.benchmark import benchmarks
 from tests.utils.constants import CHAIN_ID, TRANSACTION_GAS_LIMIT, TRANSACTIONS
+from tests.utils.differential import (
+    DifferentialCase,
+    differential_results,
+    parse_kakarot_state,
+    random_case,
+)
+from tests.utils.ef_tests import (
+    EFTestsCache,
+    collect_ef_tests,
+    ef_tests_results,
+    get_ef_tests_store,
+)
 from tests.utils.errors import cairo_error
 from tests.utils.helpers import felt_to_signed_int, rlp_encode_signed_data
 from tests.utils.syscall_handler import SyscallHandler, parse_state
@@ -28,6 +40,69 @@ OTHER = to_checksum_address(f"0x{0xE1A5:040x}")
 
 EVM_ADDRESS = 0x42069
 
+AMOUNT = int(1e18)
+TOKEN_ID = 1337
+
+# (contract_app, contract_name, function, args, storage of the contract)
+BENCHMARKS = [
+    (
+        "Solmate",
+        "ERC20",
+        "transfer",
+        [OTHER, AMOUNT],
+        {
+            "0x2": AMOUNT,
+            keccak(encode(["address", "uint8"], [OWNER, 3])).hex(): AMOUNT,
+        },
+    ),
+    ("Solmate", "ERC20", "approve", [OTHER, AMOUNT], {}),
+    (
+        "Solmate",
+        "ERC721",
+        "transferFrom",
+        [OWNER, OTHER, TOKEN_ID],
+        {
+            keccak(encode(["uint256", "uint8"], [TOKEN_ID, 2])).hex(): int(OWNER, 16),
+            keccak(encode(["address", "uint8"], [OWNER, 3])).hex(): 1,
+        },
+    ),
+    (
+        "UniswapV2",
+        "UniswapV2ERC20",
+        "transfer",
+        [OTHER, AMOUNT],
+        {
+            "0x0": AMOUNT,
+            keccak(encode(["address", "uint8"], [OWNER, 1])).hex(): AMOUNT,
+        },
+    ),
+    ("UniswapV2", "UniswapV2ERC20", "approve", [OTHER, AMOUNT], {}),
+    ("PlainOpcodes", "PlainOpcodes", "loopProfiling", [100], {}),
+    ("PlainOpcodes", "PlainOpcodes", "opcodeLog4", [], {}),
+]
+
+
+def pytest_generate_tests(metafunc):
+    if "ef_blockchain_test" in metafunc.fixturenames:
+        ef_tests = collect_ef_tests(metafunc.config.getoption("ef_tests"))
+        metafunc.parametrize("ef_blockchain_test", ef_tests, ids=ef_tests)
+
+    if "differential_case" in metafunc.fixturenames:
+        seed = metafunc.config.getoption("seed")
+        ef_tests = collect_ef_tests(metafunc.config.getoption("ef_tests"))
+        cases = [
+            ("random", index)
+            for index in range(metafunc.config.getoption("differential_random"))
+        ] + [("ef", name) for name in ef_tests]
+        metafunc.parametrize(
+            "differential_case",
+            cases,
+            ids=[
+                f"random_{seed}_{ref}" if kind == "random" else ref
+                for kind, ref in cases
+            ],
+        )
+
 
 @pytest.fixture(scope="module")
 def get_contract(cairo_run):
@@ -546,19 +621,25 @@ class TestKakarot:
         @pytest.mark.slow
         @pytest.mark.NoCI
         @pytest.mark.EFTests
-        @pytest.mark.parametrize(
-            "ef_blockchain_test",
-            EF_TESTS_PARSED_DIR.glob("*walletConstruction_d0g1v0_Cancun*.json"),
-        )
         def test_case(
             self,
+            request,
+            cairo_program,
             cairo_run,
             ef_blockchain_test,
         ):
-            test_case = json.loads(ef_blockchain_test.read_text())
+            content = get_ef_tests_store().get_raw(ef_blockchain_test).decode()
+            key = EFTestsCache.key(content, request.config.getoption("layout"))
+            if ef_tests_results.replay(key, cairo_program):
+                return
+
+            test_case = json.loads(content)
             block = test_case["blocks"][0]
             tx = block["transactions"][0]
-            with SyscallHandler.patch_state(parse_state(test_case["pre"])):
+            with (
+                ef_tests_results.run(ef_blockchain_test, key),
+                SyscallHandler.patch_state(parse_state(test_case["pre"])),
+            ):
                 evm, state, gas_used, required_gas = cairo_run(
                     "eth_call",
                     origin=int(tx["sender"], 16),
@@ -570,22 +651,23 @@ class TestKakarot:
                     nonce=int(tx["nonce"], 16),
                 )
 
-            parsed_state = {
-                int(address, 16): {
-                    "balance": int(account["balance"], 16),
-                    "code": account["code"],
-                    "nonce": account["nonce"],
-                    "storage": {
-                        key: int(value, 16)
-                        for key, value in account["storage"].items()
-                        if int(value, 16) > 0
-                    },
-                }
-                for address, account in state["accounts"].items()
-                if int(address, 16) > 10
-            }
-            assert parsed_state == parse_state(test_case["postState"])
-            assert gas_used == int(block["blockHeader"]["gasUsed"], 16)
+                assert parse_kakarot_state(state) == parse_state(test_case["postState"])
+                assert gas_used == int(block["blockHeader"]["gasUsed"], 16)
+
+        @pytest.mark.slow
+        @pytest.mark.NoCI
+        @pytest.mark.Differential
+        def test_differential(self, request, cairo_run, differential_case):
+            kind, ref = differential_case
+            if kind == "random":
+                case = random_case(request.config.getoption("seed"), ref)
+            else:
+                case = DifferentialCase.from_ef_test(ref, get_ef_tests_store().get(ref))
+                if case is None:
+                    pytest.skip("Typed transactions are not supported")
+
+            result = differential_results.run(cairo_run, case)
+            assert result.passed, "\n".join(result.mismatches)
 
         @pytest.mark.skip
         def test_failing_contract(self, cairo_run):
@@ -853,3 +935,37 @@ class TestKakarot:
             with SyscallHandler.patch_state(parse_state(initial_state)):
                 res = plain_opcodes.loopProfiling(steps)
             assert res == sum(x for x in range(steps))
+
+    class TestBenchmarks:
+        @pytest.mark.slow
+        @pytest.mark.NoCI
+        @pytest.mark.Benchmark
+        @SyscallHandler.patch("IAccount.is_valid_jumpdest", lambda *_: [1])
+        @SyscallHandler.patch("IAccount.get_code_hash", lambda *_: [0x1, 0x1])
+        @pytest.mark.parametrize(
+            "contract_app, contract_name, function, args, storage",
+            BENCHMARKS,
+            ids=[f"{name}.{function}" for _, name, function, *_ in BENCHMARKS],
+        )
+        def test_benchmark(
+            self, get_contract, contract_app, contract_name, function, args, storage
+        ):
+            contract = get_contract(contract_app, contract_name)
+            initial_state = {
+                CONTRACT_ADDRESS: {
+                    "code": list(contract.bytecode_runtime),
+                    "storage": storage,
+                    "balance": 0,
+                    "nonce": 0,
+                }
+            }
+            with (
+                SyscallHandler.patch_state(parse_state(initial_state)),
+                benchmarks.measure(f"{contract_app}.{contract_name}.{function}"),
+            ):
+                result = getattr(contract, function)(*args, origin=int(OWNER, 16))
+
+            # State changing functions return the raw (evm, state, gas) output.
+            if isinstance(result, tuple):
+                evm, *_ = result
+                assert not evm["reverted"]
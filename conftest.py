@@ -18,7 +18,53 @@ def pytest_addoption(parser):
         "--profile-cairo",
         action="store_true",
         default=False,
-        help="compute and dump TracerData for the VM runner: True or False",
+        help="compute and dump a pprof profile of the VM runner: True or False",
+    )
+    parser.addoption(
+        "--profile-cairo-interval",
+        action="store",
+        default=1,
+        type=int,
+        help="with --profile-cairo, record one sample every N steps",
+    )
+    parser.addoption(
+        "--opcode-accounting",
+        action="store_true",
+        default=False,
+        help="dump the Cairo steps and builtins used by each EVM opcode, as csv",
+    )
+    parser.addoption(
+        "--cairo-coverage",
+        action="store_true",
+        default=False,
+        help="collect line coverage of the cairo programs run: True or False",
+    )
+    parser.addoption(
+        "--track-resources",
+        action="store_true",
+        default=False,
+        help="save the resources used by each test to the local resources store: True or False",
+    )
+    parser.addoption(
+        "--ef-tests",
+        action="store",
+        default="*walletConstruction_d0g1v0_Cancun*",
+        help="glob pattern of the parsed EF tests to run, e.g. '*' for all of them",
+    )
+    parser.addoption(
+        "--ef-tests-cache",
+        choices=["off", "on", "clear"],
+        default="off",
+        help="replay the cached results of the EF tests whose accessed code did not change; "
+        "clear drops the cache first",
+    )
+    parser.addoption(
+        "--differential-random",
+        action="store",
+        default=0,
+        type=int,
+        help="number of random cases run against the execution-specs by test_differential, "
+        "in addition to the EF tests selected with --ef-tests",
     )
     parser.addoption(
         "--proof-mode",
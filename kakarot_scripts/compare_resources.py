@@ -0,0 +1,247 @@
+# %% Imports
+import argparse
+import hashlib
+import logging
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Resources of the local test runs, one csv file per commit, written by the cairo_zero tests
+# with --track-resources. Each test session run on a commit appends a new run to its file.
+LOCAL_RESOURCES_DIR = Path("resources") / "local"
+BASELINES_DIR = LOCAL_RESOURCES_DIR / "baselines"
+# Below this number of runs per side, the smallest two-sided Mann-Whitney U test p-value is above
+# usual alphas: the test could never flag a change.
+MIN_RUNS = 4
+
+
+def get_commit() -> str:
+    """
+    Return the short hash of HEAD, suffixed with -dirty-<diff hash> when the working tree has
+    local changes, so that runs of different local changes are not mixed.
+    """
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    diff = subprocess.run(
+        ["git", "diff", "HEAD"], capture_output=True, check=True
+    ).stdout
+    if not diff:
+        return commit
+    return f"{commit}-dirty-{hashlib.sha1(diff).hexdigest()[:8]}"
+
+
+def save_resources(records: List[dict], commit: Optional[str] = None) -> Path:
+    """
+    Save per test resource records (see tests.utils.benchmark.BenchmarkRecord) as a new run of a
+    commit.
+
+    Each record is one cairo_run call of a test, identified by its entrypoint and its rank among
+    the calls to this entrypoint in the test: the same call is paired across commits, and across
+    the runs of a commit.
+    """
+    commit = commit or get_commit()
+    resources = (
+        pd.json_normalize(records)
+        .rename(columns={"name": "test"})
+        .rename(columns=lambda column: column.replace("builtins.", ""))
+    )
+    entrypoint = resources.get(
+        "entrypoint", pd.Series(index=resources.index, dtype=str)
+    )
+    resources["entrypoint"] = entrypoint.fillna("cairo_run")
+    resources["call"] = (
+        resources.entrypoint
+        + "#"
+        + resources.groupby(["test", "entrypoint"]).cumcount().astype(str)
+    )
+
+    path = LOCAL_RESOURCES_DIR / f"{commit}.csv"
+    previous = pd.read_csv(path) if path.exists() else None
+    resources = resources.assign(
+        commit=commit, run=0 if previous is None else previous.run.max() + 1
+    )
+    if previous is not None:
+        resources = pd.concat([previous, resources], ignore_index=True)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    resources.to_csv(path, index=False)
+    logger.info(f"Saved {len(records)} resource records to {path}")
+    return path
+
+
+def load_resources(ref: str) -> pd.DataFrame:
+    """
+    Load the resources of a baseline name or of a commit.
+    """
+    for path in (BASELINES_DIR / f"{ref}.csv", LOCAL_RESOURCES_DIR / f"{ref}.csv"):
+        if path.exists():
+            return pd.read_csv(path)
+    raise FileNotFoundError(f"No resources found for {ref} in {LOCAL_RESOURCES_DIR}")
+
+
+def save_baseline(name: str, commit: Optional[str] = None) -> Path:
+    commit = commit or get_commit()
+    path = BASELINES_DIR / f"{name}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(LOCAL_RESOURCES_DIR / f"{commit}.csv", path)
+    logger.info(f"Saved resources of {commit} as baseline {name}")
+    return path
+
+
+def _p_value(baseline: pd.Series, current: pd.Series) -> float:
+    # A rank test needs enough runs on both sides, and at least two distinct values.
+    if len(baseline) < MIN_RUNS or len(current) < MIN_RUNS:
+        return float("nan")
+    if pd.concat([baseline, current]).nunique() < 2:
+        return 1.0
+    from scipy import stats
+
+    return stats.mannwhitneyu(baseline, current, alternative="two-sided").pvalue
+
+
+def _runs_per_test(resources: pd.DataFrame, calls: pd.MultiIndex, metric: str):
+    # Total of the given calls of each test, per run.
+    resources = resources.set_index(["test", "call"])
+    resources = resources[resources.index.isin(calls)]
+    return resources.groupby(["test", "run"])[metric].sum().groupby("test")
+
+
+def compare_resources(
+    baseline: pd.DataFrame,
+    current: pd.DataFrame,
+    metric: str = "steps",
+    alpha: float = 0.05,
+    threshold: float = 0.01,
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Compare the resources of the tests run in both baseline and current.
+
+    Only the calls made by a test on both sides are compared, paired by test and call: a test
+    gaining or losing calls does not count as a change. The runs of a test are the totals of these
+    calls in each test session run on a commit.
+
+    A test is a regression when its mean increases by more than threshold (relatively) and, for
+    tests with at least MIN_RUNS runs on both sides, the runs differ significantly (Mann-Whitney U
+    test p-value < alpha): the rank test only discards increases explained by noisy runs.
+
+    The aggregate compares the per test means with a Wilcoxon signed-rank test.
+    """
+    baseline = baseline.dropna(subset=[metric])
+    current = current.dropna(subset=[metric])
+    calls = pd.MultiIndex.from_frame(baseline[["test", "call"]]).intersection(
+        pd.MultiIndex.from_frame(current[["test", "call"]])
+    )
+    baseline_runs = _runs_per_test(baseline, calls, metric)
+    current_runs = _runs_per_test(current, calls, metric)
+    calls_per_test = calls.get_level_values("test").value_counts()
+
+    rows = []
+    for test in sorted(baseline_runs.groups):
+        before = baseline_runs.get_group(test)
+        after = current_runs.get_group(test)
+        rows.append(
+            {
+                "test": test,
+                "calls": calls_per_test[test],
+                "baseline": before.mean(),
+                "current": after.mean(),
+                "p_value": _p_value(before, after),
+            }
+        )
+
+    per_test = pd.DataFrame(
+        rows, columns=["test", "calls", "baseline", "current", "p_value"]
+    ).set_index("test")
+    per_test["delta"] = per_test.current - per_test.baseline
+    per_test["relative"] = per_test.delta / per_test.baseline.where(
+        per_test.baseline != 0
+    )
+    above_threshold = per_test.relative.abs().gt(threshold) | (
+        per_test.baseline.eq(0) & per_test.delta.ne(0)
+    )
+    significant = above_threshold & (
+        per_test.p_value.isna() | per_test.p_value.lt(alpha)
+    )
+    per_test["regression"] = significant & per_test.delta.gt(0)
+    per_test["improvement"] = significant & per_test.delta.lt(0)
+
+    from scipy import stats
+
+    deltas = per_test.delta[per_test.delta != 0]
+    summary = pd.Series(
+        {
+            "tests": len(per_test),
+            "baseline_total": per_test.baseline.sum(),
+            "current_total": per_test.current.sum(),
+            "delta_total": per_test.delta.sum(),
+            "relative_mean": per_test.relative.mean(),
+            "p_value": (
+                stats.wilcoxon(deltas).pvalue if len(deltas) >= 2 else float("nan")
+            ),
+            "regressions": int(per_test.regression.sum()),
+            "improvements": int(per_test.improvement.sum()),
+        }
+    )
+    return per_test, summary
+
+
+# %% Main
+def main():
+    pd.set_option("display.max_rows", 500)
+    pd.set_option("display.max_columns", 20)
+    pd.set_option("display.width", 1000)
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Compare local test resources against a saved baseline."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    save = subparsers.add_parser(
+        "save-baseline", help="save the resources of a commit as a baseline"
+    )
+    save.add_argument("name")
+    save.add_argument("--commit", default=None, help="defaults to the current one")
+
+    compare = subparsers.add_parser("compare", help="compare a commit to a baseline")
+    compare.add_argument("--baseline", default="main")
+    compare.add_argument("--commit", default=None, help="defaults to the current one")
+    compare.add_argument("--metric", default="steps")
+    compare.add_argument("--alpha", type=float, default=0.05)
+    compare.add_argument("--threshold", type=float, default=0.01)
+
+    args = parser.parse_args()
+    if args.command == "save-baseline":
+        save_baseline(args.name, args.commit)
+        return
+
+    per_test, summary = compare_resources(
+        load_resources(args.baseline),
+        load_resources(args.commit or get_commit()),
+        metric=args.metric,
+        alpha=args.alpha,
+        threshold=args.threshold,
+    )
+    changed = per_test[per_test.regression | per_test.improvement]
+    logger.info(
+        f"### {args.metric} per test\n\n"
+        f"{changed.sort_values('relative', ascending=False).to_markdown()}"
+    )
+    logger.info(f"### {args.metric} summary\n\n{summary.to_markdown()}")
+    if summary.regressions:
+        sys.exit(1)
+
+
+# %% Run
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,21 @@
-import json
 import logging
 import os
 import signal
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Tuple
 
 import pyperclip
+import requests
 import rlp
 from dotenv import load_dotenv
 from eth.vm.forks.cancun.blocks import CancunBlock
 from web3 import Web3
 
 from kakarot_scripts.constants import BEACON_ROOT_ADDRESS
-from kakarot_scripts.ef_tests.fetch import EF_TESTS_PARSED_DIR
+from kakarot_scripts.ef_tests.store import EFTestStore
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
@@ -23,10 +25,11 @@ load_dotenv(override=True)
 
 TESTS_PATH = Path("tests/ef_tests/test_data/BlockchainTests/GeneralStateTests")
 TEST_NAME = os.getenv("TEST_NAME")
-if TEST_NAME is None:
-    raise ValueError("Please set TEST_NAME")
 TEST_PARENT_FOLDER = os.getenv("TEST_PARENT_FOLDER", "")
 RPC_ENDPOINT = "http://127.0.0.1:8545"
+# Number of calls per JSON-RPC batch request, and number of batches sent concurrently
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", 100))
+RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", 8))
 
 
 class AnvilHandler:
@@ -61,19 +64,17 @@ class AnvilHandler:
 
 
 def get_test_file():
-    tests = [
-        file_name
-        for file_name in os.listdir(EF_TESTS_PARSED_DIR)
-        if TEST_NAME in file_name and TEST_PARENT_FOLDER in file_name
-    ]
+    if TEST_NAME is None:
+        raise ValueError("Please set TEST_NAME")
+
+    with EFTestStore() as store:
+        tests = store.find(TEST_NAME, TEST_PARENT_FOLDER)
+        if len(tests) == 1:
+            return store.get(tests[0])
 
     if len(tests) == 0:
-        if len(TEST_NAME) > 255:
-            raise ValueError(
-                f"Test name '{TEST_NAME}' could not be parsed because it exceeds the maximum length of 255 characters."
-            )
         raise ValueError(
-            f"Test '{TEST_NAME}' not found. Please ensure that you are using the valid EF-Test name, not the sanitized identifier used in the runner. If the test name is longer than 255 characters, it might be invalid."
+            f"Test '{TEST_NAME}' not found. Please ensure that you are using the valid EF-Test name, not the sanitized identifier used in the runner."
         )
     if len(tests) > 1:
         if TEST_PARENT_FOLDER == "":
@@ -81,9 +82,7 @@ def get_test_file():
                 f"Test {TEST_NAME} is ambiguous, please set TEST_PARENT_FOLDER to test file folder"
             )
 
-        raise ValueError(f"Test {TEST_NAME} not found")
-
-    return json.loads((EF_TESTS_PARSED_DIR / tests[0]).read_text())
+    raise ValueError(f"Test {TEST_NAME} not found")
 
 
 def connect_anvil():
@@ -93,16 +92,83 @@ def connect_anvil():
     return w3
 
 
-def set_pre_state(w3, data):
+class JsonRpcError(Exception):
+    pass
+
+
+class BatchJsonRpcClient:
+    """
+    Send JSON-RPC calls in batch requests of batch_size calls, with up to max_concurrency batches
+    in flight.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = RPC_ENDPOINT,
+        batch_size: int = RPC_BATCH_SIZE,
+        max_concurrency: int = RPC_MAX_CONCURRENCY,
+        timeout: int = 60,
+    ):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _send(self, calls: List[Tuple[str, list]]) -> list:
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        response = self.session.post(self.endpoint, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        responses = response.json()
+        if not isinstance(responses, list):
+            raise JsonRpcError(f"Batch request failed: {responses.get('error')}")
+
+        by_id = {r["id"]: r for r in responses}
+        missing = {"error": "missing response"}
+        errors = [
+            f"{calls[i][0]}({calls[i][1]}): {by_id.get(i, missing)['error']}"
+            for i in range(len(calls))
+            if "error" in by_id.get(i, missing)
+        ]
+        if errors:
+            raise JsonRpcError("\n".join(errors))
+        return [by_id[i]["result"] for i in range(len(calls))]
+
+    def batch(self, calls: List[Tuple[str, list]]) -> list:
+        """
+        Return the results of the calls, in order.
+        """
+        chunks = [
+            calls[i : i + self.batch_size]
+            for i in range(0, len(calls), self.batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return [
+                result
+                for results in executor.map(self._send, chunks)
+                for result in results
+            ]
+
+
+def set_pre_state(client: BatchJsonRpcClient, data):
+    calls = []
     for address, account in data["pre"].items():
-        w3.provider.make_request("anvil_setCode", [address, account["code"]])
-        w3.provider.make_request("anvil_setBalance", [address, account["balance"]])
-        w3.provider.make_request("anvil_setNonce", [address, account["nonce"]])
-        for k, v in account["storage"].items():
-            w3.provider.make_request(
+        calls += [
+            ("anvil_setCode", [address, account["code"]]),
+            ("anvil_setBalance", [address, account["balance"]]),
+            ("anvil_setNonce", [address, account["nonce"]]),
+        ]
+        calls += [
+            (
                 "anvil_setStorageAt",
                 [address, f"0x{int(k, 16):064x}", f"0x{int(v, 16):064x}"],
             )
+            for k, v in account["storage"].items()
+        ]
+    client.batch(calls)
 
 
 def get_block(data):
@@ -114,15 +180,17 @@ def get_block(data):
     return block
 
 
-def set_block(w3, data):
+def set_block(client: BatchJsonRpcClient, data):
     block = get_block(data)
+    calls = []
     if len(block.transactions) > 0 and block.transactions[0].chain_id is not None:
-        w3.provider.make_request("anvil_setChainId", [block.transactions[0].chain_id])
-    w3.provider.make_request("anvil_setCoinbase", [block.header.coinbase.hex()])
-    w3.provider.make_request(
-        "anvil_setNextBlockBaseFeePerGas", [block.header.base_fee_per_gas]
-    )
-    w3.provider.make_request("evm_setBlockGasLimit", [block.header.gas_limit])
+        calls.append(("anvil_setChainId", [block.transactions[0].chain_id]))
+    calls += [
+        ("anvil_setCoinbase", [block.header.coinbase.hex()]),
+        ("anvil_setNextBlockBaseFeePerGas", [block.header.base_fee_per_gas]),
+        ("evm_setBlockGasLimit", [block.header.gas_limit]),
+    ]
+    client.batch(calls)
 
 
 def send_transaction(w3, transaction):
@@ -130,29 +198,63 @@ def send_transaction(w3, transaction):
     return tx_hash
 
 
-def check_post_state(w3, data):
+def check_post_state(client: BatchJsonRpcClient, data):
+    """
+    Fetch the whole post state in batch requests and raise with all the mismatches at once.
+    """
+    # (address, field, expected value, call, parser of the result)
+    checks = []
     for address, account in data["postState"].items():
         address = Web3.to_checksum_address(address)
         if address == Web3.to_checksum_address(
             BEACON_ROOT_ADDRESS
         ):  # Skip beacon root address validation
             continue
-        try:
-            assert w3.eth.get_balance(address) == int(
-                account["balance"], 16
-            ), f'balance error: {w3.eth.get_balance(address)} != {int(account["balance"], 16)}'
-            assert w3.eth.get_transaction_count(address) == int(
-                account["nonce"], 16
-            ), f"nonce error: {w3.eth.get_transaction_count(address)} != {int(account['nonce'], 16)}"
-            assert w3.eth.get_code(address) == bytes.fromhex(
-                account["code"][2:]
-            ), f'code error: {w3.eth.get_code(address)} != {bytes.fromhex(account["code"][2:])}'
-            for k, v in account["storage"].items():
-                assert int.from_bytes(w3.eth.get_storage_at(address, k), "big") == int(
-                    v, 16
-                ), f'storage error at key {k}: {int.from_bytes(w3.eth.get_storage_at(address, k), "big")} != {int(v, 16)}'
-        except Exception as e:
-            raise ValueError(f"Post state does not match for {address}, got {e}") from e
+        checks += [
+            (
+                address,
+                "balance",
+                int(account["balance"], 16),
+                ("eth_getBalance", [address, "latest"]),
+                lambda result: int(result, 16),
+            ),
+            (
+                address,
+                "nonce",
+                int(account["nonce"], 16),
+                ("eth_getTransactionCount", [address, "latest"]),
+                lambda result: int(result, 16),
+            ),
+            (
+                address,
+                "code",
+                bytes.fromhex(account["code"][2:]),
+                ("eth_getCode", [address, "latest"]),
+                lambda result: bytes.fromhex(result[2:]),
+            ),
+        ]
+        checks += [
+            (
+                address,
+                f"storage at key {k}",
+                int(v, 16),
+                ("eth_getStorageAt", [address, f"0x{int(k, 16):064x}", "latest"]),
+                lambda result: int(result, 16),
+            )
+            for k, v in account["storage"].items()
+        ]
+
+    results = client.batch([call for *_, call, _ in checks])
+    mismatches = [
+        f"{address} {field} error: {parse(result)} != {expected}"
+        for (address, field, expected, _, parse), result in zip(checks, results)
+        if parse(result) != expected
+    ]
+    if mismatches:
+        raise ValueError(
+            f"Post state does not match ({len(mismatches)} errors):\n"
+            + "\n".join(mismatches)
+        )
     logger.info("Post state is valid")
 
 
@@ -162,9 +264,10 @@ def main():
     handler = AnvilHandler(test)
     try:
         provider = connect_anvil()
+        client = BatchJsonRpcClient()
         # Set test state
-        set_pre_state(provider, test)
-        set_block(provider, test)
+        set_pre_state(client, test)
+        set_block(client, test)
 
         # Send transactions
         block = get_block(test)
@@ -177,7 +280,7 @@ def main():
             tx_hashes.append(tx_hash)
 
         # Check post state
-        check_post_state(provider, test)
+        check_post_state(client, test)
 
         logger.info("Running transactions:")
         for i, tx_hash in enumerate(tx_hashes, start=1):
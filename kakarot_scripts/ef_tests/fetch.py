@@ -1,69 +1,140 @@
-import io
 import json
 import logging
 import os
-import shutil
 import tarfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from hashlib import sha256
 from pathlib import Path
+from typing import Iterator, List, Tuple
 
 import requests
 
+from kakarot_scripts.constants import BUILD_DIR
+from kakarot_scripts.ef_tests.store import EFTestStore, Row, compress
+
 EF_TESTS_TAG = "v14.1.3-kkrt"
 EF_TESTS_URL = (
     f"https://github.com/kkrt-labs/tests/archive/refs/tags/{EF_TESTS_TAG}.tar.gz"
 )
 EF_TESTS_DIR = Path("tests") / "ef_tests" / "test_data" / EF_TESTS_TAG
-EF_TESTS_PARSED_DIR = Path("tests") / "ef_tests" / "test_data" / "parsed"
+EF_TESTS_TARBALL = BUILD_DIR / "ef_tests" / f"{EF_TESTS_TAG}.tar.gz"
 
 DEFAULT_NETWORK = "Cancun"
 
+GENERAL_STATE_TESTS = "BlockchainTests/GeneralStateTests"
+PYSPECS = f"{GENERAL_STATE_TESTS}/Pyspecs"
+
 logging.basicConfig()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def generate_tests():
-    if not EF_TESTS_DIR.exists():
-        response = requests.get(EF_TESTS_URL)
-        with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as tar:
-            tar.extractall(EF_TESTS_DIR)
-
-    test_cases = {
-        f"{os.path.basename(root)}_{name}": content
-        for (root, _, files) in os.walk(EF_TESTS_DIR)
-        for file in files
-        if file.endswith(".json")
-        and "BlockchainTests/GeneralStateTests" in root
-        and "Pyspecs" not in root
-        for name, content in json.loads((Path(root) / file).read_text()).items()
-        if content.get("network") == DEFAULT_NETWORK
-    }
-
-    # Add tests from BlockchainTests/GeneralStateTests/Pyspecs
-    test_cases.update(
-        {
-            f"{name.split('::')[-1]}": content
-            for (root, _, files) in os.walk(EF_TESTS_DIR)
-            for file in files
-            if file.endswith(".json")
-            and "BlockchainTests/GeneralStateTests/Pyspecs" in root
-            for name, content in json.loads((Path(root) / file).read_text()).items()
-            if f"fork_{DEFAULT_NETWORK}" in name
-        }
-    )
+def fetch_tarball() -> Path:
+    """
+    Download the release tarball to EF_TESTS_TARBALL, once per tag.
+    """
+    if EF_TESTS_TARBALL.exists():
+        return EF_TESTS_TARBALL
+
+    EF_TESTS_TARBALL.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = EF_TESTS_TARBALL.with_suffix(f".{os.getpid()}.tmp")
+    with requests.get(EF_TESTS_URL, stream=True) as response:
+        response.raise_for_status()
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+    os.replace(tmp_path, EF_TESTS_TARBALL)
+    return EF_TESTS_TARBALL
+
+
+def iter_fixture_files() -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield the path and content of the GeneralStateTests fixture files, one at a time.
+
+    The release tarball is downloaded once to the build directory, then read member by member
+    without being extracted. A previously extracted archive in EF_TESTS_DIR is used instead when
+    it exists.
+    """
+    if EF_TESTS_DIR.exists():
+        for root, _, files in os.walk(EF_TESTS_DIR):
+            if GENERAL_STATE_TESTS not in root:
+                continue
+            for file in files:
+                if file.endswith(".json"):
+                    yield str(Path(root) / file), (Path(root) / file).read_bytes()
+        return
+
+    with tarfile.open(fetch_tarball(), mode="r|gz") as tar:
+        for member in tar:
+            if (
+                not member.isfile()
+                or not member.name.endswith(".json")
+                or GENERAL_STATE_TESTS not in member.name
+            ):
+                continue
+            yield member.name, tar.extractfile(member).read()
+
+
+def parse_fixture_file(path: str, content: bytes) -> List[Row]:
+    """
+    Return the DEFAULT_NETWORK test cases of a fixture file as compressed compact json.
 
-    shutil.rmtree(EF_TESTS_PARSED_DIR, ignore_errors=True)
-    EF_TESTS_PARSED_DIR.mkdir(parents=True, exist_ok=True)
-
-    for test_name, test_case in test_cases.items():
-        try:
-            json.dump(
-                test_case,
-                open(EF_TESTS_PARSED_DIR / f"{test_name}.json", "w"),
-                indent=4,
-            )
-        except Exception as e:
-            print(e)
+    Tests are named {folder}_{test name}, with folder the directory of the fixture file, except the
+    Pyspecs tests that keep their own name, e.g. test_modexp[fork_Cancun-blockchain_test-...].
+    """
+    folder = os.path.basename(os.path.dirname(path))
+    pyspecs = PYSPECS in path
+    rows = []
+    for name, test_case in json.loads(content).items():
+        if pyspecs:
+            if f"fork_{DEFAULT_NETWORK}" not in name:
+                continue
+            test_name = name.split("::")[-1]
+        else:
+            if test_case.get("network") != DEFAULT_NETWORK:
+                continue
+            test_name = f"{folder}_{name}"
+
+        data = json.dumps(test_case, separators=(",", ":")).encode()
+        rows.append((test_name, folder, sha256(data).hexdigest(), compress(data)))
+    return rows
+
+
+def generate_tests(max_workers: int = os.cpu_count()):
+    names, written = set(), 0
+    with EFTestStore(readonly=False) as store:
+        hashes = store.hashes()
+
+        def store_rows(rows: List[Row]):
+            nonlocal written
+            names.update(name for name, *_ in rows)
+            # Only the test cases whose content changed are rewritten.
+            changed = [row for row in rows if hashes.get(row[0]) != row[2]]
+            store.put_many(changed)
+            written += len(changed)
+
+        # Bound the number of fixture files held in memory to a few per worker.
+        max_pending = 2 * max_workers
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for path, content in iter_fixture_files():
+                pending.add(executor.submit(parse_fixture_file, path, content))
+                if len(pending) < max_pending:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    store_rows(future.result())
+
+            for future in pending:
+                store_rows(future.result())
+
+        stale = set(hashes) - names
+        store.delete(stale)
+
+    logger.info(
+        f"{len(names)} tests parsed: {written} written, {len(names) - written} unchanged, "
+        f"{len(stale)} removed"
+    )
 
 
 if __name__ == "__main__":
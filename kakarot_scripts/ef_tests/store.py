@@ -0,0 +1,147 @@
+"""
+Indexed store of the parsed EF tests.
+
+All the test cases live in a single SQLite database, one zlib compressed json blob per test case,
+indexed by name (with GLOB prefix queries using the primary key) and by folder. Test cases are only
+decompressed and loaded when accessed.
+"""
+
+import json
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+EF_TESTS_STORE_PATH = Path("tests") / "ef_tests" / "test_data" / "parsed.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    name TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tests_folder ON tests (folder);
+"""
+
+# (name, folder, hash of the json content, compressed json content)
+Row = Tuple[str, str, str, bytes]
+
+
+def compress(data: bytes) -> bytes:
+    return zlib.compress(data, level=6)
+
+
+class EFTestStore:
+    def __init__(self, path: Path = EF_TESTS_STORE_PATH, readonly: bool = True):
+        self.path = Path(path)
+        if readonly:
+            if not self.path.exists():
+                raise FileNotFoundError(
+                    f"No EF tests store at {self.path}, run `make fetch-ef-tests` first"
+                )
+            self.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.path)
+            self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "EFTestStore":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM tests").fetchone()[0]
+
+    def __contains__(self, name: str) -> bool:
+        return (
+            self.connection.execute(
+                "SELECT 1 FROM tests WHERE name = ?", (name,)
+            ).fetchone()
+            is not None
+        )
+
+    def get_raw(self, name: str) -> bytes:
+        """
+        Return the json content of a test case.
+        """
+        row = self.connection.execute(
+            "SELECT data FROM tests WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return zlib.decompress(row[0])
+
+    def get(self, name: str) -> dict:
+        return json.loads(self.get_raw(name))
+
+    def names(self, pattern: str = "*", folder: Optional[str] = None) -> List[str]:
+        """
+        Return the sorted names matching the glob pattern, optionally in a given folder.
+        """
+        query, params = "SELECT name FROM tests WHERE name GLOB ?", [pattern]
+        if folder is not None:
+            query, params = f"{query} AND folder = ?", params + [folder]
+        return [
+            name
+            for (name,) in self.connection.execute(f"{query} ORDER BY name", params)
+        ]
+
+    def folders(self, pattern: str = "*") -> Dict[str, str]:
+        """
+        Return the folder of each test matching the glob pattern, keyed by name, sorted by name.
+        """
+        return dict(
+            self.connection.execute(
+                "SELECT name, folder FROM tests WHERE name GLOB ? ORDER BY name",
+                (pattern,),
+            )
+        )
+
+    def find(self, substring: str, folder_substring: str = "") -> List[str]:
+        """
+        Return the names containing substring, in a folder containing folder_substring.
+
+        The folder is matched on the stored folder, as the Pyspecs test names do not include it.
+        """
+        return [
+            name
+            for (name,) in self.connection.execute(
+                "SELECT name FROM tests WHERE instr(name, ?) > 0 AND instr(folder, ?) > 0 "
+                "ORDER BY name",
+                (substring, folder_substring),
+            )
+        ]
+
+    def iter(
+        self, pattern: str = "*", folder: Optional[str] = None
+    ) -> Iterator[Tuple[str, dict]]:
+        """
+        Stream the (name, test case) matching the glob pattern, one test case at a time.
+        """
+        query, params = "SELECT name, data FROM tests WHERE name GLOB ?", [pattern]
+        if folder is not None:
+            query, params = f"{query} AND folder = ?", params + [folder]
+        for name, data in self.connection.execute(f"{query} ORDER BY name", params):
+            yield name, json.loads(zlib.decompress(data))
+
+    def hashes(self) -> Dict[str, str]:
+        return dict(self.connection.execute("SELECT name, hash FROM tests"))
+
+    def put_many(self, rows: Iterable[Row]):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO tests (name, folder, hash, data) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete(self, names: Iterable[str]):
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM tests WHERE name = ?", ((name,) for name in names)
+            )
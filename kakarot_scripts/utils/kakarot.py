@@ -1,10 +1,7 @@
-import asyncio
 import functools
 import json
 import logging
-import math
 import re
-import time
 from collections import defaultdict
 from pathlib import Path
 from types import MethodType
@@ -45,6 +42,7 @@ from kakarot_scripts.constants import (
     ChainId,
 )
 from kakarot_scripts.data.pre_eip155_txs import PRE_EIP155_TX
+from kakarot_scripts.utils.nonce import NonceManager
 from kakarot_scripts.utils.starknet import RelayerPool, _max_fee
 from kakarot_scripts.utils.starknet import call
 from kakarot_scripts.utils.starknet import call as _call_starknet
@@ -53,6 +51,7 @@ from kakarot_scripts.utils.starknet import get_balance
 from kakarot_scripts.utils.starknet import get_contract as _get_starknet_contract
 from kakarot_scripts.utils.starknet import get_deployments as _get_starknet_deployments
 from kakarot_scripts.utils.starknet import invoke as _invoke_starknet
+from kakarot_scripts.utils.starknet import receipt_poller
 from kakarot_scripts.utils.uint256 import int_to_uint256
 from tests.utils.constants import TRANSACTION_GAS_LIMIT
 from tests.utils.helpers import pack_calldata, rlp_encode_signed_data
@@ -61,69 +60,30 @@ logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-_nonces = {}
-
-
-async def get_nonce(account):
-    global _nonces
-    if account.address not in _nonces:
-        if WEB3.is_connected():
-            _nonces[account.address] = WEB3.eth.get_transaction_count(
-                account.signer.public_key.to_checksum_address()
-            )
-        else:
-            _nonces[account.address] = (
-                await (
-                    _get_starknet_contract("account_contract", address=account.address)
-                    .functions["get_nonce"]
-                    .call(block_number="pending")
-                )
-            ).nonce
 
+async def _get_pending_nonce(account):
     if WEB3.is_connected():
-        network_nonce = WEB3.eth.get_transaction_count(
+        return WEB3.eth.get_transaction_count(
             account.signer.public_key.to_checksum_address()
         )
-    else:
-        network_nonce = (
-            await (
-                _get_starknet_contract("account_contract", address=account.address)
-                .functions["get_nonce"]
-                .call(block_number="pending")
-            )
-        ).nonce
-
-    retries = 10
-    while network_nonce != _nonces[account.address] and retries > 0:
-        logger.info(
-            f"⏳ Waiting for network nonce {network_nonce} to be {_nonces[account.address]}"
+    return (
+        await (
+            _get_starknet_contract("account_contract", address=account.address)
+            .functions["get_nonce"]
+            .call(block_number="pending")
         )
-        await asyncio.sleep(0.1)
+    ).nonce
 
-        if WEB3.is_connected():
-            network_nonce = WEB3.eth.get_transaction_count(
-                account.signer.public_key.to_checksum_address()
-            )
-        else:
-            network_nonce = (
-                await (
-                    _get_starknet_contract("account_contract", address=account.address)
-                    .functions["get_nonce"]
-                    .call(block_number="pending")
-                )
-            ).nonce
 
-        retries -= 1
-    if retries == 0:
-        logger.warning(
-            f"⏳ Network nonce {network_nonce} did not match expected nonce {_nonces[account.address]}"
-        )
-        # After 1 second, the nonce should have been updated by the network in any case
-        _nonces[account.address] = network_nonce
+# Nonces of the EVM accounts, keyed by their Starknet address, see starknet.nonce_manager.
+nonce_manager = NonceManager(
+    _get_pending_nonce,
+    resync_interval=NETWORK.get("nonce_resync_interval", NETWORK["max_wait"]),
+)
 
-    nonce = _nonces[account.address]
-    _nonces[account.address] += 1
-    return nonce
+
+async def get_nonce(account):
+    return await nonce_manager.allocate(account)
 
 
 class EvmTransactionError(Exception):
@@ -724,14 +684,21 @@ async def eth_send_transaction(
 
     encoded_unsigned_tx = rlp_encode_signed_data(typed_transaction.as_dict())
     packed_encoded_unsigned_tx = pack_calldata(bytes(encoded_unsigned_tx))
-    return await send_starknet_transaction(
-        evm_account,
-        evm_tx.r,
-        evm_tx.s,
-        evm_tx.v,
-        packed_encoded_unsigned_tx,
-        max_fee,
-    )
+    try:
+        return await send_starknet_transaction(
+            evm_account,
+            evm_tx.r,
+            evm_tx.s,
+            evm_tx.v,
+            packed_encoded_unsigned_tx,
+            max_fee,
+        )
+    except StarknetTransactionError:
+        # The EVM nonce was not used by the reverted Starknet transaction.
+        await nonce_manager.reject(evm_account, nonce)
+        raise
+    finally:
+        nonce_manager.release(evm_account, nonce)
 
 
 async def send_starknet_transaction(
@@ -742,49 +709,47 @@ async def send_starknet_transaction(
     packed_encoded_unsigned_tx: List[int],
     max_fee: Optional[int] = None,
 ):
-    relayer = await RelayerPool.get(evm_account.address)
-    current_timestamp = (await RPC_CLIENT.get_block("latest")).timestamp
-    outside_execution = {
-        "caller": int.from_bytes(b"ANY_CALLER", "big"),
-        "nonce": 0,  # not used in Kakarot
-        "execute_after": current_timestamp - 60 * 60,
-        "execute_before": current_timestamp + 60 * 60,
-    }
     max_fee = _max_fee if max_fee in [None, 0] else max_fee
-    tx_hash = await _invoke_starknet(
-        "account_contract",
-        "execute_from_outside",
-        outside_execution,
-        [
-            {
-                "to": 0xDEAD,
-                "selector": 0xDEAD,
-                "data_offset": 0,
-                "data_len": len(packed_encoded_unsigned_tx),
-            }
-        ],
-        list(packed_encoded_unsigned_tx),
-        [
-            *int_to_uint256(signature_r),
-            *int_to_uint256(signature_s),
-            signature_v,
-        ],
-        address=evm_account.address,
-        account=relayer,
-    )
+    # A sender with transactions in flight keeps its relayer, so that they stay ordered.
+    async with RelayerPool.lease(evm_account.address) as relayer:
+        current_timestamp = (await RPC_CLIENT.get_block("latest")).timestamp
+        outside_execution = {
+            "caller": int.from_bytes(b"ANY_CALLER", "big"),
+            "nonce": 0,  # not used in Kakarot
+            "execute_after": current_timestamp - 60 * 60,
+            "execute_before": current_timestamp + 60 * 60,
+        }
+        tx_hash = await _invoke_starknet(
+            "account_contract",
+            "execute_from_outside",
+            outside_execution,
+            [
+                {
+                    "to": 0xDEAD,
+                    "selector": 0xDEAD,
+                    "data_offset": 0,
+                    "data_len": len(packed_encoded_unsigned_tx),
+                }
+            ],
+            list(packed_encoded_unsigned_tx),
+            [
+                *int_to_uint256(signature_r),
+                *int_to_uint256(signature_s),
+                signature_v,
+            ],
+            address=evm_account.address,
+            account=relayer,
+        )
 
-    check_interval = math.ceil(NETWORK["check_interval"])
-    attempts = NETWORK["max_wait"] // check_interval
-    for _ in range(attempts):
         try:
-            receipt = await RPC_CLIENT.get_transaction_receipt(tx_hash)
-            break
-        except Exception:
-            # Sometime the RPC_CLIENT is too fast and the first pool raises with
-            # starknet_py.net.client_errors.ClientError: Client failed with code 29. Message: Transaction hash not found
-            time.sleep(check_interval)
-    else:
-        raise ValueError(f"❌ Transaction not found: 0x{tx_hash:064x}")
+            receipt = await receipt_poller.wait(tx_hash)
+        except TimeoutError as e:
+            raise ValueError(f"❌ Transaction not found: 0x{tx_hash:064x}") from e
+
+        if receipt.execution_status.name == "REVERTED":
+            raise StarknetTransactionError(
+                f"Starknet tx reverted: {receipt.revert_reason}"
+            )
 
     transaction_events = [
         event
@@ -792,9 +757,6 @@ async def send_starknet_transaction(
         if event.from_address == evm_account.address
         and event.keys[0] == starknet_keccak(b"transaction_executed")
     ]
-    if receipt.execution_status.name == "REVERTED":
-        _nonces[evm_account.address] -= 1
-        raise StarknetTransactionError(f"Starknet tx reverted: {receipt.revert_reason}")
     if len(transaction_events) != 1:
         raise ValueError("Cannot locate the single event giving the actual tx status")
     (
@@ -832,12 +794,13 @@ async def deploy_and_fund_evm_address(evm_address: str, amount: float):
     if account_balance < amount:
         await fund_address(evm_address, amount - account_balance)
     if not await _contract_exists(starknet_address):
-        await _invoke_starknet(
-            "kakarot",
-            "deploy_externally_owned_account",
-            int(evm_address, 16),
-            account=await RelayerPool.get(int(evm_address, 16)),
-        )
+        async with RelayerPool.lease(int(evm_address, 16)) as relayer:
+            await _invoke_starknet(
+                "kakarot",
+                "deploy_externally_owned_account",
+                int(evm_address, 16),
+                account=relayer,
+            )
     return starknet_address
 
 
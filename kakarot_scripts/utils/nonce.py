@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import suppress
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class NonceManager:
+    """
+    Allocate the nonces of many accounts optimistically, without waiting for the previous
+    transaction of an account to be pending before sending the next one.
+
+    The next nonce of an account is read once from the chain, then incremented locally for each
+    allocation. The local counter is reconciled against the chain:
+    - when a transaction is rejected or reverted, since the nonces allocated after it are then
+      invalid too, see reject;
+    - periodically in the background, when resync_interval is set: a counter behind the chain
+      (transactions sent from elsewhere) is moved forward, and a counter ahead of the chain while
+      no transaction is in flight (transactions dropped by the node) is moved back.
+
+    Accounts are keyed by their `address` attribute and given as is to fetch_nonce, which should
+    return the pending nonce of the account.
+    """
+
+    def __init__(
+        self,
+        fetch_nonce: Callable[[object], Awaitable[int]],
+        resync_interval: Optional[float] = None,
+    ):
+        self.fetch_nonce = fetch_nonce
+        self.resync_interval = resync_interval
+        self._next: Dict[Hashable, int] = {}
+        self._in_flight: Dict[Hashable, Set[int]] = defaultdict(set)
+        self._accounts: Dict[Hashable, object] = {}
+        self._fetching: Dict[Hashable, asyncio.Future] = {}
+        self._resync_task: Optional[asyncio.Task] = None
+
+    async def allocate(self, account) -> int:
+        """
+        Return the next nonce of the account, and mark it in flight until released.
+        """
+        self._ensure_background_resync()
+        key = account.address
+        self._accounts[key] = account
+        if key not in self._next:
+            # Concurrent first allocations share a single fetch.
+            if key not in self._fetching:
+                self._fetching[key] = asyncio.ensure_future(self.fetch_nonce(account))
+            try:
+                chain_nonce = await self._fetching[key]
+            finally:
+                self._fetching.pop(key, None)
+            self._next.setdefault(key, chain_nonce)
+
+        nonce = self._next[key]
+        self._next[key] += 1
+        self._in_flight[key].add(nonce)
+        return nonce
+
+    def release(self, account, nonce: int):
+        """
+        Mark the transaction using the nonce as no longer in flight, whatever its outcome.
+        """
+        self._in_flight[account.address].discard(nonce)
+
+    async def reject(self, account, nonce: Optional[int] = None):
+        """
+        Reconcile the counter of the account after a rejected or reverted transaction.
+
+        The nonce was not used, and all the nonces allocated after it are invalid: the counter is
+        moved back to the rejected nonce, or to the chain nonce if it is ahead. The nonces allocated
+        before the rejected one are kept in flight. Without a nonce, the counter is reset to the
+        chain nonce.
+        """
+        key = account.address
+        if nonce is not None:
+            self.release(account, nonce)
+        chain_nonce = await self.fetch_nonce(account)
+        next_nonce = chain_nonce if nonce is None else max(chain_nonce, nonce)
+        if self._next.get(key) != next_nonce:
+            logger.info(
+                f"⏳ Nonce of 0x{key:064x} reset from {self._next.get(key)} to {next_nonce}"
+            )
+        self._next[key] = next_nonce
+        # The nonces allocated after the rejected one will be rejected as well.
+        self._in_flight[key] = {n for n in self._in_flight[key] if n < next_nonce}
+
+    async def resync(self, account):
+        """
+        Move the counter of the account to the chain nonce when it cannot be explained by the
+        transactions in flight.
+        """
+        key = account.address
+        if key not in self._next:
+            return
+        chain_nonce = await self.fetch_nonce(account)
+        # Transactions using nonces below the chain one are already pending.
+        self._in_flight[key] = {n for n in self._in_flight[key] if n >= chain_nonce}
+        local_nonce = self._next[key]
+        if chain_nonce > local_nonce or (
+            chain_nonce < local_nonce and not self._in_flight[key]
+        ):
+            logger.info(
+                f"⏳ Nonce of 0x{key:064x} resynced from {local_nonce} to {chain_nonce}"
+            )
+            self._next[key] = chain_nonce
+
+    def reset(self, account=None):
+        """
+        Forget the counters of all the accounts, or of the given one.
+        """
+        keys = list(self._next) if account is None else [account.address]
+        for key in keys:
+            self._next.pop(key, None)
+            self._in_flight.pop(key, None)
+            self._accounts.pop(key, None)
+
+    def _ensure_background_resync(self):
+        if self.resync_interval is None:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._resync_task
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._resync_task = loop.create_task(self._resync_forever())
+
+    async def _resync_forever(self):
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            for account in list(self._accounts.values()):
+                try:
+                    await self.resync(account)
+                except Exception as e:
+                    logger.warning(f"⚠️  Nonce resync of 0x{account.address:064x}: {e}")
+
+    async def stop(self):
+        task, self._resync_task = self._resync_task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            with suppress(asyncio.CancelledError):
+                await task
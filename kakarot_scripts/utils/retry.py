@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator, Optional, Tuple, Type, TypeVar
+
+import aiohttp
+import requests
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Backoff:
+    """
+    Jittered exponential backoff: the n-th delay is drawn uniformly in
+    [(1 - jitter) * d, d] with d = min(initial * factor**n, max_delay).
+
+    delays() is endless: the timeout is the total time budget enforced by retry, which clamps the
+    last delay to the deadline. A None timeout retries forever and has to be asked for explicitly.
+    """
+
+    initial: float = 0.1
+    factor: float = 2
+    max_delay: float = 5
+    jitter: float = 0.5
+    timeout: Optional[float] = 60
+
+    def delays(self) -> Iterator[float]:
+        delay = self.initial
+        while True:
+            yield delay * (1 - self.jitter * random.random())
+            delay = min(delay * self.factor, self.max_delay)
+
+
+DEFAULT_BACKOFF = Backoff()
+
+# Transport errors and timeouts, worth retrying as is; other errors are raised right away.
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+    aiohttp.ClientError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+
+async def retry(
+    fn: Callable[[], Awaitable[T]],
+    backoff: Backoff = DEFAULT_BACKOFF,
+    retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_ERRORS,
+    until: Optional[Callable[[T], bool]] = None,
+    description: str = "",
+) -> T:
+    """
+    Await fn() until it neither raises one of retry_on nor returns a result rejected by until,
+    sleeping with backoff in between.
+
+    The sleeps are cancellable and never block the event loop. Once the backoff timeout is
+    reached, the last error is raised, or a TimeoutError if the last result was rejected.
+
+    Retried errors are logged as warnings, rejected results (e.g. a pending status) at debug level.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if backoff.timeout is None else loop.time() + backoff.timeout
+    for delay in backoff.delays():
+        try:
+            result = await fn()
+            if until is None or until(result):
+                return result
+            error = None
+            reason = f"unexpected result {result}"
+            level = logging.DEBUG
+        except retry_on as e:
+            error = e
+            reason = f"{type(e).__name__}: {e}"
+            level = logging.WARNING
+
+        if deadline is not None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                if error is not None:
+                    raise error
+                raise TimeoutError(
+                    f"{description or 'retry'} timed out after {backoff.timeout}s: {reason}"
+                )
+            delay = min(delay, remaining)
+
+        logger.log(
+            level, f"⏳ {description or 'retry'}: {reason}, retrying in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RelayerMetrics:
+    """
+    Activity of a relayer since its first transaction.
+    """
+
+    in_flight: int = 0
+    sent: int = 0
+    failed: int = 0
+    balance: Optional[int] = None
+    top_ups: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    first_sent_at: Optional[float] = None
+    last_done_at: Optional[float] = None
+
+    @property
+    def done(self) -> int:
+        return self.sent - self.in_flight
+
+    @property
+    def throughput(self) -> float:
+        """Transactions completed per second."""
+        if self.first_sent_at is None or self.last_done_at is None:
+            return 0.0
+        elapsed = self.last_done_at - self.first_sent_at
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.done if self.done else 0.0
+
+
+class RelayerScheduler:
+    """
+    Spread the transactions of many senders over a set of relayers.
+
+    Each transaction goes to the relayer with the fewest transactions in flight among the ones
+    whose cached balance covers min_balance, the richest first. A sender with transactions in
+    flight sticks to their relayer: its transactions then share a single nonce lane, and reach the
+    sequencer in order.
+
+    Balances are fetched once with fetch_balance, then reserved locally by max_fee per
+    transaction. A relayer whose balance is below min_balance when first fetched, or whose cached
+    balance falls below it, has its balance fetched again, and is funded with top_up when the chain
+    confirms it is low.
+    """
+
+    def __init__(
+        self,
+        relayers: List,
+        fetch_balance: Callable[[object], Awaitable[int]],
+        top_up: Optional[Callable[[object], Awaitable]] = None,
+        min_balance: int = 0,
+        max_fee: int = 0,
+    ):
+        self.relayers = relayers
+        self.fetch_balance = fetch_balance
+        self.top_up = top_up
+        self.min_balance = min_balance
+        self.max_fee = max_fee
+        self._metrics: Dict[Hashable, RelayerMetrics] = {
+            relayer.address: RelayerMetrics() for relayer in relayers
+        }
+        # sender -> (relayer, transactions in flight)
+        self._affinity: Dict[Hashable, Tuple[object, int]] = {}
+        self._loading: Optional[asyncio.Future] = None
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+
+    @asynccontextmanager
+    async def lease(self, sender: Hashable):
+        """
+        Yield the relayer sending a transaction of sender, and record its outcome.
+        """
+        relayer = await self.acquire(sender)
+        start = time.monotonic()
+        failed = True
+        try:
+            yield relayer
+            failed = False
+        finally:
+            self.release(sender, relayer, time.monotonic() - start, failed)
+
+    async def acquire(self, sender: Hashable):
+        await self._load_balances()
+        if sender in self._affinity:
+            relayer, count = self._affinity[sender]
+        else:
+            relayer, count = self._pick(), 0
+        self._affinity[sender] = (relayer, count + 1)
+
+        metrics = self._metrics[relayer.address]
+        metrics.in_flight += 1
+        metrics.sent += 1
+        metrics.balance -= self.max_fee
+        if metrics.first_sent_at is None:
+            metrics.first_sent_at = time.monotonic()
+        return relayer
+
+    def release(self, sender: Hashable, relayer, latency: float, failed: bool = False):
+        _, count = self._affinity.pop(sender)
+        if count > 1:
+            self._affinity[sender] = (relayer, count - 1)
+
+        metrics = self._metrics[relayer.address]
+        metrics.in_flight -= 1
+        metrics.failed += failed
+        metrics.total_latency += latency
+        metrics.max_latency = max(metrics.max_latency, latency)
+        metrics.last_done_at = time.monotonic()
+        if metrics.balance < self.min_balance:
+            self._refresh(relayer)
+
+    def metrics(self) -> Dict[Hashable, RelayerMetrics]:
+        return dict(self._metrics)
+
+    def _pick(self):
+        funded = [
+            relayer
+            for relayer in self.relayers
+            if self._metrics[relayer.address].balance >= self.min_balance
+        ]
+        if not funded:
+            logger.warning("⚠️  All relayers are low on funds")
+            funded = self.relayers
+        return min(
+            funded,
+            key=lambda relayer: (
+                self._metrics[relayer.address].in_flight,
+                -self._metrics[relayer.address].balance,
+            ),
+        )
+
+    async def _load_balances(self):
+        # Concurrent first acquisitions share a single fetch.
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._fetch_balances())
+        try:
+            await self._loading
+        except Exception:
+            self._loading = None
+            raise
+
+    async def _fetch_balances(self):
+        balances = await asyncio.gather(
+            *[self.fetch_balance(relayer) for relayer in self.relayers]
+        )
+        for relayer, balance in zip(self.relayers, balances):
+            self._metrics[relayer.address].balance = balance
+            # Relayers drained by a previous run are funded before their first release.
+            if balance < self.min_balance:
+                self._refresh(relayer)
+
+    def _refresh(self, relayer):
+        task = self._refreshing.get(relayer.address)
+        if task is not None and not task.done():
+            return
+        self._refreshing[relayer.address] = asyncio.get_running_loop().create_task(
+            self._refresh_balance(relayer)
+        )
+
+    async def _refresh_balance(self, relayer):
+        metrics = self._metrics[relayer.address]
+        try:
+            balance = await self.fetch_balance(relayer)
+            if balance < self.min_balance and self.top_up is not None:
+                logger.info(
+                    f"ℹ️  Topping up relayer 0x{relayer.address:064x} "
+                    f"with balance {balance / 1e18} ETH"
+                )
+                await self.top_up(relayer)
+                metrics.top_ups += 1
+                balance = await self.fetch_balance(relayer)
+            # Keep the reservations of the transactions still in flight.
+            metrics.balance = balance - metrics.in_flight * self.max_fee
+        except Exception as e:
+            logger.warning(f"⚠️  Balance refresh of 0x{relayer.address:064x}: {e}")
+
+    async def stop(self):
+        tasks, self._refreshing = list(self._refreshing.values()), {}
+        loop = asyncio.get_running_loop()
+        for task in tasks:
+            if task.done() or task.get_loop() is not loop:
+                continue
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
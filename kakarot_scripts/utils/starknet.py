@@ -5,8 +5,8 @@ import logging
 import random
 import re
 import subprocess
-import time
 from collections import defaultdict, namedtuple
+from contextlib import asynccontextmanager
 from copy import deepcopy
 from datetime import datetime
 from functools import cache
@@ -34,16 +34,18 @@ from starknet_py.net.client_models import (
     Call,
     DeclareTransactionResponse,
     SentTransactionResponse,
+    TransactionExecutionStatus,
+    TransactionReceipt,
 )
 from starknet_py.net.full_node_client import _create_broadcasted_txn
 from starknet_py.net.models.transaction import DeclareV1, InvokeV1
 from starknet_py.net.schemas.rpc import (
     DeclareTransactionResponseSchema,
     SentTransactionSchema,
+    TransactionReceiptSchema,
 )
 from starknet_py.net.signer.stark_curve_signer import KeyPair
 from starknet_py.net.udc_deployer.deployer import Deployer
-from starknet_py.transaction_errors import TransactionRejectedError
 from starkware.starknet.public.abi import get_selector_from_name
 
 from kakarot_scripts.constants import (
@@ -58,6 +60,17 @@ from kakarot_scripts.constants import (
     RPC_CLIENT,
     NetworkType,
 )
+from kakarot_scripts.utils.nonce import NonceManager
+from kakarot_scripts.utils.retry import TRANSIENT_ERRORS, Backoff, retry
+from kakarot_scripts.utils.scheduler import RelayerScheduler
+from kakarot_scripts.utils.submission import (
+    CONTRACT_NOT_FOUND,
+    JsonRpcError,
+    ReceiptPoller,
+    SubmissionQueue,
+    TransactionRejectedError,
+    batch_request,
+)
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
@@ -72,7 +85,6 @@ _max_fee = int(0.005e18) if NETWORK["type"] == NetworkType.PROD else int(0.05e18
 _logs = defaultdict(list)
 _lazy_execute = defaultdict(bool)
 _multisig_account = defaultdict(bool)
-_nonces = {}
 
 # Dict to store selector to name mapping because argent api requires the name but calls have selector
 _selector_to_name = {get_selector_from_name("deployContract"): "deployContract"}
@@ -438,20 +450,9 @@ async def deploy_starknet_account(
         pass
 
     logger.info(f"ℹ️  Deploying account at 0x{address:064x} with salt {hex(salt)}")
-    try:
-        res = await Account.deploy_account_v1(
-            address=address,
-            class_hash=class_hash,
-            salt=salt,
-            key_pair=key_pair,
-            client=RPC_CLIENT,
-            constructor_calldata=constructor_calldata,
-            max_fee=_max_fee,
-        )
-    except Exception as e:
-        logger.info(f"❌ Error deploying account: {e}, waiting 5s before retrying")
-        time.sleep(5)
-        res = await Account.deploy_account_v1(
+    res = await retry(
+        functools.partial(
+            Account.deploy_account_v1,
             address=address,
             class_hash=class_hash,
             salt=salt,
@@ -459,7 +460,12 @@ async def deploy_starknet_account(
             client=RPC_CLIENT,
             constructor_calldata=constructor_calldata,
             max_fee=_max_fee,
-        )
+        ),
+        # The funding transaction may not be accepted yet: the node rejects the deployment.
+        backoff=Backoff(initial=NETWORK["check_interval"], timeout=NETWORK["max_wait"]),
+        retry_on=(ClientError, *TRANSIENT_ERRORS),
+        description=f"Deploying account 0x{address:064x}",
+    )
     status = await wait_for_transaction(res.hash)
     logger.info(f"{status} Account deployed at: 0x{res.account.address:064x}")
 
@@ -496,62 +502,72 @@ async def declare(contract_name):
         pass
 
     account = await get_starknet_account()
-    if _multisig_account[account.address]:
-        account = await RelayerPool.get(account.address)
-    nonce = await get_nonce(account)
+    if not _multisig_account[account.address]:
+        return await _declare(contract_name, artifact, deployed_class_hash, account)
+    # Multisig accounts declare through a relayer.
+    async with RelayerPool.lease(account.address) as relayer:
+        return await _declare(contract_name, artifact, deployed_class_hash, relayer)
 
-    if artifact.sierra is not None:
-        casm_compiled_contract = artifact.casm.read_text()
-        sierra_compiled_contract = artifact.sierra.read_text()
-        casm_class = create_casm_class(casm_compiled_contract)
-        class_hash = compute_casm_class_hash(casm_class)
-        declare_v2_transaction = await account.sign_declare_v2(
-            compiled_contract=sierra_compiled_contract,
-            compiled_class_hash=class_hash,
-            max_fee=_max_fee,
-            nonce=nonce,
-        )
 
-        resp = await account.client.declare(transaction=declare_v2_transaction)
-    else:
-        contract_class = create_compiled_contract(
-            compiled_contract=artifact.casm.read_text()
-        )
+async def _declare(contract_name, artifact, deployed_class_hash, account):
+    nonce = await get_nonce(account)
+    # A declaration failing before reaching the node leaves its nonce unused.
+    try:
+        if artifact.sierra is not None:
+            casm_compiled_contract = artifact.casm.read_text()
+            sierra_compiled_contract = artifact.sierra.read_text()
+            casm_class = create_casm_class(casm_compiled_contract)
+            class_hash = compute_casm_class_hash(casm_class)
+            declare_v2_transaction = await account.sign_declare_v2(
+                compiled_contract=sierra_compiled_contract,
+                compiled_class_hash=class_hash,
+                max_fee=_max_fee,
+                nonce=nonce,
+            )
 
-        tx_hash = compute_transaction_hash(
-            tx_hash_prefix=TransactionHashPrefix.DECLARE,
-            version=1,
-            contract_address=account.address,
-            entry_point_selector=DEFAULT_ENTRY_POINT_SELECTOR,
-            calldata=[deployed_class_hash],
-            max_fee=_max_fee,
-            chain_id=account.signer.chain_id.value,
-            additional_data=[nonce],
-        )
-        signature = message_signature(
-            msg_hash=tx_hash, priv_key=account.signer.private_key
-        )
-        transaction = DeclareV1(
-            contract_class=contract_class,
-            sender_address=account.address,
-            max_fee=_max_fee,
-            signature=signature,
-            nonce=nonce,
-            version=1,
-        )
-        params = _create_broadcasted_txn(transaction=transaction)
+            resp = await account.client.declare(transaction=declare_v2_transaction)
+        else:
+            contract_class = create_compiled_contract(
+                compiled_contract=artifact.casm.read_text()
+            )
 
-        res = await RPC_CLIENT._client.call(
-            method_name="addDeclareTransaction",
-            params=[params],
-        )
-        resp = cast(
-            DeclareTransactionResponse,
-            DeclareTransactionResponseSchema().load(res, unknown=EXCLUDE),
-        )
-        deployed_class_hash = resp.class_hash
+            tx_hash = compute_transaction_hash(
+                tx_hash_prefix=TransactionHashPrefix.DECLARE,
+                version=1,
+                contract_address=account.address,
+                entry_point_selector=DEFAULT_ENTRY_POINT_SELECTOR,
+                calldata=[deployed_class_hash],
+                max_fee=_max_fee,
+                chain_id=account.signer.chain_id.value,
+                additional_data=[nonce],
+            )
+            signature = message_signature(
+                msg_hash=tx_hash, priv_key=account.signer.private_key
+            )
+            transaction = DeclareV1(
+                contract_class=contract_class,
+                sender_address=account.address,
+                max_fee=_max_fee,
+                signature=signature,
+                nonce=nonce,
+                version=1,
+            )
+            params = _create_broadcasted_txn(transaction=transaction)
 
-    status = await wait_for_transaction(resp.transaction_hash, account)
+            res = await RPC_CLIENT._client.call(
+                method_name="addDeclareTransaction",
+                params=[params],
+            )
+            resp = cast(
+                DeclareTransactionResponse,
+                DeclareTransactionResponseSchema().load(res, unknown=EXCLUDE),
+            )
+            deployed_class_hash = resp.class_hash
+    except Exception:
+        await nonce_manager.reject(account, nonce)
+        raise
+
+    status = await wait_for_transaction(resp.transaction_hash, account, nonce)
 
     logger.info(f"{status} {contract_name} class hash: {hex(resp.class_hash)}")
     return deployed_class_hash
@@ -624,35 +640,131 @@ async def execute_calls():
         logger.info(
             f"ℹ️  Executing {len(_calls)} calls with account 0x{_account.address:064x}"
         )
-        await execute_v1.__wrapped__(_account, _calls)
+    await asyncio.gather(
+        *[submit_v1(_account, _calls) for _account, _calls in _logs.items()]
+    )
 
     _logs = defaultdict(list)
 
 
+def submit_v1(account, calls) -> asyncio.Future:
+    """
+    Enqueue the execution of calls by account, see execute_v1, and return its future.
+
+    Up to submission_queue.depth transactions of the same account are sent without waiting for the
+    previous ones to be received.
+    """
+    if not isinstance(calls, Iterable):
+        calls = [calls]
+    return submission_queue.submit(
+        account, functools.partial(execute_v1.__wrapped__, account, calls)
+    )
+
+
+async def _get_pending_nonce(account):
+    return await account.get_nonce(block_number="pending")
+
+
+# Nonces of the Starknet accounts, allocated without waiting for the previous transaction to be
+# pending. A transaction not pending after max_wait is considered dropped by the background resync.
+nonce_manager = NonceManager(
+    _get_pending_nonce,
+    resync_interval=NETWORK.get("nonce_resync_interval", NETWORK["max_wait"]),
+)
+
+
 async def get_nonce(account):
-    global _nonces
-    if account.address not in _nonces:
-        _nonces[account.address] = await account.get_nonce(block_number="pending")
+    return await nonce_manager.allocate(account)
 
-    network_nonce = await account.get_nonce(block_number="pending")
-    retries = 10
-    while network_nonce != _nonces[account.address] and retries > 0:
-        logger.info(
-            f"⏳ Waiting for network nonce {network_nonce} to be {_nonces[account.address]}"
-        )
-        await asyncio.sleep(0.1)
-        network_nonce = await account.get_nonce(block_number="pending")
-        retries -= 1
-    if retries == 0:
-        logger.warning(
-            f"⏳ Network nonce {network_nonce} did not match expected nonce {_nonces[account.address]}"
+
+# All the receipts waited for are polled by a single loop, in JSON-RPC batches.
+receipt_poller = ReceiptPoller(
+    RPC_CLIENT.url,
+    interval=NETWORK["check_interval"],
+    timeout=NETWORK["max_wait"],
+    parse=lambda receipt: cast(
+        TransactionReceipt, TransactionReceiptSchema().load(receipt, unknown=EXCLUDE)
+    ),
+)
+# Number of transactions of a single account sent before the first one is received.
+submission_queue = SubmissionQueue(depth=NETWORK.get("max_pending_transactions", 8))
+
+
+_MULTISIG_FINAL_STATES = {"TX_ACCEPTED_L2", "REVERTED", "REJECTED"}
+# Signers approve the multisig transactions off-band: wait for them without deadline.
+_multisig_backoff = Backoff(initial=5, max_delay=30, timeout=None)
+
+
+async def _execute_multisig(account, transaction, calls):
+    data = {
+        "creator": f"0x{account.signer.public_key:064x}",
+        "transaction": {
+            "maxFee": hex(transaction.max_fee),
+            "nonce": hex(transaction.nonce),
+            "version": hex(transaction.version),
+            "calls": [
+                {
+                    "contractAddress": hex(call.to_addr),
+                    "calldata": [str(data) for data in call.calldata],
+                    "entrypoint": _selector_to_name[call.selector],
+                }
+                for call in calls
+            ],
+        },
+        "starknetSignature": dict(
+            zip(["r", "s"], [hex(v) for v in transaction.signature])
+        ),
+    }
+    url = f"{NETWORK['argent_multisig_api']}/0x{account.address:064x}/request"
+
+    async def _request():
+        response = await asyncio.to_thread(requests.post, url, json=data)
+        return response.json()
+
+    async def _status():
+        response = await asyncio.to_thread(requests.get, url)
+        contents = [
+            content
+            for content in response.json()["content"]
+            if content["id"] == transaction_id
+        ]
+        if len(contents) == 0:
+            raise Exception("Transaction not found")
+        logger.info(f"⏳ Multisig transaction status: {contents[0]['state']}")
+        return contents[0]
+
+    # The multisig API accepts a single request at a time per account.
+    response = await retry(
+        _request,
+        backoff=_multisig_backoff,
+        retry_on=(),
+        until=lambda response: response.get("status")
+        != "transactionForMultisigBeingSubmitted",
+        description="Multisig request",
+    )
+    content = response.get("content")
+    if content is None:
+        raise ValueError(f"❌ Multisig transaction rejected: {response}")
+
+    transaction_id = content["id"]
+    status = content["state"]
+    if status not in _MULTISIG_FINAL_STATES:
+        # Signers approve the request off-band: wait for them without deadline.
+        content = await retry(
+            _status,
+            backoff=_multisig_backoff,
+            retry_on=(),
+            until=lambda content: content["state"] in _MULTISIG_FINAL_STATES,
+            description="Multisig transaction",
         )
-        # After 1 second, the nonce should have been updated by the network in any case
-        _nonces[account.address] = network_nonce
+        status = content["state"]
+    if status != "TX_ACCEPTED_L2":
+        logger.error(f"❌ Multisig transaction rejected:\n{status}")
 
-    nonce = _nonces[account.address]
-    _nonces[account.address] += 1
-    return nonce
+    return {
+        "transaction_hash": content["transactionHash"],
+        "status": content["state"],
+    }
 
 
 @lazy_execute
@@ -663,97 +775,50 @@ async def execute_v1(account, calls):
 
     calldata = _parse_calls(await account.cairo_version, calls)
     nonce = await get_nonce(account)
-    msg_hash = compute_transaction_hash(
-        tx_hash_prefix=TransactionHashPrefix.INVOKE,
-        version=1,
-        contract_address=account.address,
-        entry_point_selector=DEFAULT_ENTRY_POINT_SELECTOR,
-        calldata=calldata,
-        max_fee=_max_fee,
-        chain_id=NETWORK["chain_id"].starknet_chain_id,
-        additional_data=[nonce],
-    )
-    signature = message_signature(
-        msg_hash=msg_hash, priv_key=account.signer.private_key, seed=None
-    )
-    transaction = InvokeV1(
-        version=1,
-        signature=signature,
-        nonce=nonce,
-        max_fee=_max_fee,
-        sender_address=account.address,
-        calldata=calldata,
-    )
-
-    if _multisig_account[account.address]:
-        data = {
-            "creator": f"0x{account.signer.public_key:064x}",
-            "transaction": {
-                "maxFee": hex(transaction.max_fee),
-                "nonce": hex(transaction.nonce),
-                "version": hex(transaction.version),
-                "calls": [
-                    {
-                        "contractAddress": hex(call.to_addr),
-                        "calldata": [str(data) for data in call.calldata],
-                        "entrypoint": _selector_to_name[call.selector],
-                    }
-                    for call in calls
-                ],
-            },
-            "starknetSignature": dict(zip(["r", "s"], [hex(v) for v in signature])),
-        }
-        response = requests.post(
-            f"{NETWORK['argent_multisig_api']}/0x{account.address:064x}/request",
-            json=data,
-        ).json()
-        if response.get("status") == "transactionForMultisigBeingSubmitted":
-            await asyncio.sleep(5)
-            response = requests.post(
-                f"{NETWORK['argent_multisig_api']}/0x{account.address:064x}/request",
-                json=data,
-            ).json()
-        content = response.get("content")
-        if content is None:
-            raise ValueError(f"❌ Multisig transaction rejected: {response}")
-
-        transaction_id = content["id"]
-        status = content["state"]
-        while status not in {"TX_ACCEPTED_L2", "REVERTED", "REJECTED"}:
-            await asyncio.sleep(5)
-            response = requests.get(
-                f"{NETWORK['argent_multisig_api']}/0x{account.address:064x}/request"
-            )
-            contents = [
-                content
-                for content in response.json()["content"]
-                if content["id"] == transaction_id
-            ]
-            if len(contents) == 0:
-                raise Exception("Transaction not found")
-            content = contents[0]
-            status = content["state"]
-            logger.info(f"⏳ Multisig transaction status: {status}")
-        if status != "TX_ACCEPTED_L2":
-            logger.error(f"❌ Multisig transaction rejected:\n{status}")
+    # A transaction failing before reaching the node leaves its nonce unused.
+    try:
+        msg_hash = compute_transaction_hash(
+            tx_hash_prefix=TransactionHashPrefix.INVOKE,
+            version=1,
+            contract_address=account.address,
+            entry_point_selector=DEFAULT_ENTRY_POINT_SELECTOR,
+            calldata=calldata,
+            max_fee=_max_fee,
+            chain_id=NETWORK["chain_id"].starknet_chain_id,
+            additional_data=[nonce],
+        )
+        signature = message_signature(
+            msg_hash=msg_hash, priv_key=account.signer.private_key, seed=None
+        )
+        transaction = InvokeV1(
+            version=1,
+            signature=signature,
+            nonce=nonce,
+            max_fee=_max_fee,
+            sender_address=account.address,
+            calldata=calldata,
+        )
 
-        return {
-            "transaction_hash": content["transactionHash"],
-            "status": content["state"],
-        }
+        if _multisig_account[account.address]:
+            response = await _execute_multisig(account, transaction, calls)
+            nonce_manager.release(account, nonce)
+            return response
 
-    params = _create_broadcasted_txn(transaction=transaction)
-    res = cast(
-        SentTransactionResponse,
-        SentTransactionSchema().load(
-            await RPC_CLIENT._client.call(
-                method_name="addInvokeTransaction",
-                params={"invoke_transaction": params},
-            )
-        ),
-    )
+        params = _create_broadcasted_txn(transaction=transaction)
+        res = cast(
+            SentTransactionResponse,
+            SentTransactionSchema().load(
+                await RPC_CLIENT._client.call(
+                    method_name="addInvokeTransaction",
+                    params={"invoke_transaction": params},
+                )
+            ),
+        )
+    except Exception:
+        await nonce_manager.reject(account, nonce)
+        raise
 
-    status = await wait_for_transaction(res.transaction_hash, account)
+    status = await wait_for_transaction(res.transaction_hash, account, nonce)
     logger.info(f"{status} 0x{res.transaction_hash:064x}")
     return res
 
@@ -822,22 +887,28 @@ async def call(contract: Union[str, int], *args, **kwargs):
     )
 
 
-@functools.wraps(RPC_CLIENT.wait_for_tx)
-async def wait_for_transaction(tx_hash, account=None):
-    global _nonces
+async def wait_for_transaction(tx_hash, account=None, nonce=None):
+    """
+    Wait for the receipt of a transaction, see receipt_poller, and return its status emoji.
+
+    The nonce allocated to the transaction, if any, is released; a transaction rejected or never
+    received moves the nonce of its account back, see NonceManager.reject.
+    """
     try:
-        await RPC_CLIENT.wait_for_tx(
-            tx_hash,
-            check_interval=NETWORK["check_interval"],
-            retries=int(NETWORK["max_wait"] / NETWORK["check_interval"]),
-        )
-        return "✅"
+        receipt = await receipt_poller.wait(tx_hash)
     except Exception as e:
-        if isinstance(e, TransactionRejectedError):
-            if account:
-                _nonces[account.address] -= 1
+        if isinstance(e, (TimeoutError, TransactionRejectedError)) and account:
+            await nonce_manager.reject(account, nonce)
         logger.error(f"Error while waiting for transaction 0x{tx_hash:064x}: {e}")
         return "❌"
+    finally:
+        if account and nonce is not None:
+            nonce_manager.release(account, nonce)
+
+    if receipt.execution_status == TransactionExecutionStatus.REVERTED:
+        logger.error(f"Transaction 0x{tx_hash:064x} reverted: {receipt.revert_reason}")
+        return "❌"
+    return "✅"
 
 
 async def get_class_hash_at(address):
@@ -850,9 +921,17 @@ async def get_class_hash_at(address):
 class RelayerPool:
     _cached_relayers = None
 
-    def __init__(self, accounts):
+    def __init__(self, accounts, amount: Optional[float] = None):
         self.relayer_accounts = accounts
         self.index = 0
+        amount = amount or (1 if NETWORK["type"] != NetworkType.PROD else 0.01)
+        self.scheduler = RelayerScheduler(
+            accounts,
+            fetch_balance=lambda relayer: get_balance(relayer.address),
+            top_up=lambda relayer: fund_address(relayer.address, amount),
+            min_balance=NETWORK.get("relayer_min_balance", _max_fee),
+            max_fee=_max_fee,
+        )
 
     @staticmethod
     def compute_addresses(n):
@@ -872,64 +951,141 @@ class RelayerPool:
             for i in range(n)
         ]
 
+    @staticmethod
+    async def get_provisioning(addresses, token_address, spender):
+        """
+        Return the indexes of the addresses left to deploy, and of the ones left to give an infinite
+        token allowance to spender, read in a single batch request.
+        """
+        selector = get_selector_from_name("allowance")
+        results = await batch_request(
+            RPC_CLIENT.url,
+            [
+                call
+                for address in addresses
+                for call in (
+                    (
+                        "starknet_getClassHashAt",
+                        {"block_id": "pending", "contract_address": hex(address)},
+                    ),
+                    (
+                        "starknet_call",
+                        {
+                            "request": {
+                                "contract_address": hex(token_address),
+                                "entry_point_selector": hex(selector),
+                                "calldata": [hex(address), hex(spender)],
+                            },
+                            "block_id": "pending",
+                        },
+                    ),
+                )
+            ],
+        )
+
+        deployed = []
+        for result in results[::2]:
+            if isinstance(result, JsonRpcError) and result.code != CONTRACT_NOT_FOUND:
+                raise result
+            deployed.append(not isinstance(result, JsonRpcError))
+        # An allowance that cannot be read is approved again.
+        allowances = [
+            (
+                0
+                if isinstance(result, JsonRpcError)
+                else int(result[0], 16) + (int(result[1], 16) << 128)
+            )
+            for result in results[1::2]
+        ]
+        to_deploy = [i for i, is_deployed in enumerate(deployed) if not is_deployed]
+        to_approve = [
+            i for i, allowance in enumerate(allowances) if allowance != 2**256 - 1
+        ]
+        return to_deploy, to_approve
+
     @classmethod
     @alru_cache
     async def create(cls, n, **kwargs):
         logger.info(f"ℹ️  Creating {n} relayer accounts")
 
-        account = await get_starknet_account()
-        is_lazy = _lazy_execute[account.address]
-        _lazy_execute[account.address] = True
-        # Extracted the fund_address part to be able to fund all the accounts at once
         private_key = NETWORK["private_key"]
-        public_key = KeyPair.from_private_key(int(private_key, 16)).public_key
+        key_pair = KeyPair.from_private_key(int(private_key, 16))
         addresses = cls.compute_addresses(n)
-        for address in addresses:
-            await fund_address(
-                address,
-                amount=kwargs.pop(
-                    "amount", 1 if NETWORK["type"] != NetworkType.PROD else 0.01
-                ),
-            )
+        amount = kwargs.pop(
+            "amount", 1 if NETWORK["type"] != NetworkType.PROD else 0.01
+        )
+        eth_contract = await get_eth_contract()
+        spender = int(NETWORK["account_address"], 16)
 
-        await execute_calls()
-        _lazy_execute[account.address] = is_lazy
+        # Resume from the relayers left unprovisioned by a previous run. Provisioned relayers
+        # drained since are topped up by the scheduler.
+        to_deploy, to_approve = await cls.get_provisioning(
+            addresses, eth_contract.address, spender
+        )
+        to_fund = sorted(set(to_deploy) | set(to_approve))
+        logger.info(
+            f"ℹ️  {n - len(to_fund)} relayer accounts already provisioned, "
+            f"{len(to_deploy)} to deploy, {len(to_approve)} to approve"
+        )
 
-        addresses = [
-            (
-                await deploy_starknet_account(
-                    salt=i + public_key, amount=0, private_key=private_key
+        if to_fund:
+            account = await get_starknet_account()
+            is_lazy = _lazy_execute[account.address]
+            _lazy_execute[account.address] = True
+            # Funding transfers are sent at once in a single multicall
+            await asyncio.gather(
+                *[fund_address(addresses[i], amount=amount) for i in to_fund]
+            )
+            await execute_calls()
+            _lazy_execute[account.address] = is_lazy
+
+        slots = asyncio.Semaphore(NETWORK.get("max_concurrent_provisioning", 8))
+
+        async def _bounded(coroutine):
+            async with slots:
+                return await coroutine
+
+        await asyncio.gather(
+            *[
+                _bounded(
+                    deploy_starknet_account(
+                        salt=key_pair.public_key + i,
+                        amount=0,
+                        private_key=private_key,
+                    )
                 )
-            )["address"]
-            for i in range(n)
-        ]
-        logger.info(f"✅ Created {n} relayer accounts")
+                for i in to_deploy
+            ]
+        )
 
-        eth_contract = await get_eth_contract()
-        accounts = []
-        for address in addresses:
-            account = await get_starknet_account(address=address)
-            # Give infinite allowance to the main account so it's easier to move funds
-            allowance = (
-                await call(
-                    "ERC20",
-                    "allowance",
-                    account.address,
-                    int(NETWORK["account_address"], 16),
-                    address=eth_contract.address,
-                )
-            ).remaining
-            if allowance != 2**256 - 1:
-                await invoke(
-                    "ERC20",
-                    "approve",
-                    int(NETWORK["account_address"], 16),
-                    2**256 - 1,
-                    account=account,
-                    address=eth_contract.address,
+        # The relayers are OpenZeppelin accounts of the known key pair
+        accounts = [
+            Account(
+                address=address,
+                client=RPC_CLIENT,
+                chain=NETWORK["chain_id"].starknet_chain_id,
+                key_pair=key_pair,
+            )
+            for address in addresses
+        ]
+        # Give infinite allowance to the main account so it's easier to move funds
+        await asyncio.gather(
+            *[
+                _bounded(
+                    invoke(
+                        "ERC20",
+                        "approve",
+                        spender,
+                        2**256 - 1,
+                        account=accounts[i],
+                        address=eth_contract.address,
+                    )
                 )
-            accounts.append(account)
-        return cls(accounts)
+                for i in to_approve
+            ]
+        )
+        logger.info(f"✅ Created {n} relayer accounts")
+        return cls(accounts, amount=amount)
 
     def __next__(self) -> Account:
         relayer = self.relayer_accounts[self.index]
@@ -954,6 +1110,32 @@ class RelayerPool:
             salt % len(cls._cached_relayers.relayer_accounts)
         ]
 
+    @classmethod
+    @asynccontextmanager
+    async def lease(cls, sender: int):
+        """
+        Yield the relayer to send a transaction of sender with, see RelayerScheduler.
+
+        Unlike get, the relayer is picked by load and balance for each transaction.
+        """
+        if cls._cached_relayers is None:
+            cls._cached_relayers = await cls.default()
+
+        async with cls._cached_relayers.scheduler.lease(sender) as relayer:
+            yield relayer
+
+    def metrics(self):
+        return [
+            (
+                f"0x{address:064x}",
+                f"{metrics.sent} sent, {metrics.failed} failed, "
+                f"{metrics.throughput:.2f} tx/s, {metrics.mean_latency:.2f}s mean latency, "
+                f"{metrics.max_latency:.2f}s max latency, {metrics.top_ups} top-ups",
+            )
+            for address, metrics in self.scheduler.metrics().items()
+            if metrics.sent > 0
+        ]
+
     async def balances(self):
         eth_contract = await get_eth_contract()
         return [
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
+
+import aiohttp
+
+from kakarot_scripts.utils.retry import Backoff
+
+logger = logging.getLogger(__name__)
+
+# starknet_getTransactionReceipt error code of a transaction not received yet
+TXN_HASH_NOT_FOUND = 29
+# starknet_getClassHashAt error code of an address without contract
+CONTRACT_NOT_FOUND = 20
+
+
+class JsonRpcError(Exception):
+    def __init__(self, code: Optional[int], message: str):
+        super().__init__(f"{message} (code {code})")
+        self.code = code
+        self.message = message
+
+
+class TransactionRejectedError(Exception):
+    pass
+
+
+async def batch_request(
+    url: str,
+    calls: List[Tuple[str, Union[list, dict]]],
+    session: Optional[aiohttp.ClientSession] = None,
+) -> list:
+    """
+    Send (method, params) calls as a single JSON-RPC batch request.
+
+    Return the results in the order of the calls, failed calls as JsonRpcError instances.
+    """
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await batch_request(url, calls, session)
+
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    async with session.post(url, json=payload) as response:
+        response.raise_for_status()
+        responses = await response.json()
+
+    results = [JsonRpcError(None, "missing response")] * len(calls)
+    for response in responses:
+        if "result" in response:
+            results[response["id"]] = response["result"]
+        else:
+            results[response["id"]] = JsonRpcError(
+                response["error"].get("code"), response["error"].get("message")
+            )
+    return results
+
+
+class ReceiptPoller:
+    """
+    Wait for the receipts of many transactions with a single polling loop.
+
+    The receipts of all the pending transaction hashes are requested in JSON-RPC batches of
+    batch_size calls. Rounds are spaced by a jittered backoff starting at interval / 10 and capped
+    at interval, restarted whenever new transactions are waited for: a receipt available right away
+    is picked up quickly without flooding the node with slow ones.
+
+    Rejected transactions never get a receipt: the status of the transactions without receipt is
+    requested in a second batch, and a rejected one fails its waiters with a
+    TransactionRejectedError. A transaction without receipt after timeout seconds fails its waiters
+    with a TimeoutError.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        interval: float = 1,
+        timeout: float = 60,
+        batch_size: int = 100,
+        parse: Callable[[dict], object] = lambda receipt: receipt,
+    ):
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.parse = parse
+        self.backoff = Backoff(initial=interval / 10, max_delay=interval)
+        # tx_hash -> (deadline, waiters)
+        self._pending: Dict[int, Tuple[float, List[asyncio.Future]]] = {}
+        self._errors: Dict[int, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._new_waiters = False
+
+    async def wait(self, tx_hash: int):
+        """
+        Return the (parsed) receipt of the transaction once available.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._task.get_loop() is not loop:
+            # The previous loop is gone, and its waiters with it.
+            self._pending.clear()
+            self._task = None
+
+        future = loop.create_future()
+        deadline, waiters = self._pending.get(
+            tx_hash, (time.monotonic() + self.timeout, [])
+        )
+        self._pending[tx_hash] = (deadline, waiters + [future])
+        self._new_waiters = True
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._poll())
+        return await future
+
+    async def stop(self):
+        """
+        Stop the polling task, cancelling the pending waiters.
+        """
+        task, self._task = self._task, None
+        pending, self._pending = self._pending, {}
+        for _, waiters in pending.values():
+            for waiter in waiters:
+                waiter.cancel()
+        if task is None or task.done():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _poll(self):
+        try:
+            await self._poll_pending()
+        except Exception as e:
+            logger.error(f"❌ Receipts polling failed: {e}")
+            pending, self._pending = self._pending, {}
+            for _, waiters in pending.values():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+
+    async def _poll_pending(self):
+        delays = self.backoff.delays()
+        async with aiohttp.ClientSession() as session:
+            while self._pending:
+                self._new_waiters = False
+                tx_hashes = list(self._pending)
+                batches = [
+                    tx_hashes[i : i + self.batch_size]
+                    for i in range(0, len(tx_hashes), self.batch_size)
+                ]
+                results = await asyncio.gather(
+                    *[self._fetch(session, batch) for batch in batches],
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.warning(f"⚠️  Receipts request failed: {result}")
+                        continue
+                    for tx_hash, receipt in result.items():
+                        if isinstance(receipt, TransactionRejectedError):
+                            self._fail(tx_hash, receipt)
+                        else:
+                            self._resolve(tx_hash, receipt)
+
+                self._expire()
+                if not self._pending:
+                    break
+                if self._new_waiters:
+                    delays = self.backoff.delays()
+                await asyncio.sleep(next(delays))
+
+    async def _fetch(
+        self, session: aiohttp.ClientSession, tx_hashes: List[int]
+    ) -> Dict[int, Union[dict, TransactionRejectedError]]:
+        results = await batch_request(
+            self.url,
+            [
+                ("starknet_getTransactionReceipt", {"transaction_hash": hex(tx_hash)})
+                for tx_hash in tx_hashes
+            ],
+            session,
+        )
+
+        receipts = {}
+        missing = []
+        for tx_hash, result in zip(tx_hashes, results):
+            if not isinstance(result, JsonRpcError):
+                receipts[tx_hash] = result
+            elif result.code == TXN_HASH_NOT_FOUND:
+                missing.append(tx_hash)
+            else:
+                self._errors[tx_hash] = result.message
+        if not missing:
+            return receipts
+
+        statuses = await batch_request(
+            self.url,
+            [
+                ("starknet_getTransactionStatus", {"transaction_hash": hex(tx_hash)})
+                for tx_hash in missing
+            ],
+            session,
+        )
+        for tx_hash, status in zip(missing, statuses):
+            if isinstance(status, dict) and status.get("finality_status") == "REJECTED":
+                reason = status.get("failure_reason")
+                receipts[tx_hash] = TransactionRejectedError(
+                    f"Transaction 0x{tx_hash:064x} rejected"
+                    + (f": {reason}" if reason else "")
+                )
+        return receipts
+
+    def _resolve(self, tx_hash: int, receipt: dict):
+        _, waiters = self._pending.pop(tx_hash, (None, []))
+        self._errors.pop(tx_hash, None)
+        try:
+            result, error = self.parse(receipt), None
+        except Exception as e:
+            result, error = None, e
+        for waiter in waiters:
+            if waiter.done():
+                continue
+            if error is not None:
+                waiter.set_exception(error)
+            else:
+                waiter.set_result(result)
+
+    def _fail(self, tx_hash: int, error: Exception):
+        _, waiters = self._pending.pop(tx_hash, (None, []))
+        self._errors.pop(tx_hash, None)
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_exception(error)
+
+    def _expire(self):
+        now = time.monotonic()
+        for tx_hash, (deadline, _) in list(self._pending.items()):
+            if deadline > now:
+                continue
+            error = self._errors.get(tx_hash, "not found")
+            self._fail(
+                tx_hash,
+                TimeoutError(
+                    f"No receipt for 0x{tx_hash:064x} after {self.timeout}s: {error}"
+                ),
+            )
+
+
+class SubmissionQueue:
+    """
+    Pipeline the transactions of many accounts.
+
+    submit returns a future right away, and runs the transaction as soon as fewer than depth
+    transactions of the same account are outstanding. Transactions of an account start in
+    submission order, so that their nonces are allocated in that order too.
+    """
+
+    def __init__(self, depth: int = 8):
+        self.depth = depth
+        self._slots: WeakKeyDictionary = WeakKeyDictionary()
+
+    def submit(self, account, transaction: Callable[[], Awaitable]) -> asyncio.Future:
+        """
+        Schedule transaction, a coroutine function sending and waiting for a transaction of account.
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._slots.setdefault(loop, {})
+        if account.address not in slots:
+            slots[account.address] = asyncio.Semaphore(self.depth)
+        return loop.create_task(self._run(slots[account.address], transaction))
+
+    @staticmethod
+    async def _run(slot: asyncio.Semaphore, transaction: Callable[[], Awaitable]):
+        async with slot:
+            return await transaction()
@@ -13,12 +13,15 @@ from kakarot_scripts.utils.kakarot import deploy as deploy_kakarot
 from kakarot_scripts.utils.kakarot import eth_balance_of, eth_send_transaction
 from kakarot_scripts.utils.kakarot import get_contract as get_solidity_contract
 from kakarot_scripts.utils.kakarot import get_deployments, get_eoa
+from kakarot_scripts.utils.kakarot import nonce_manager as evm_nonce_manager
 from kakarot_scripts.utils.starknet import (
     RelayerPool,
     call,
     get_contract,
     get_eth_contract,
 )
+from kakarot_scripts.utils.starknet import nonce_manager as starknet_nonce_manager
+from kakarot_scripts.utils.starknet import receipt_poller
 from tests.utils.helpers import generate_random_private_key
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -52,6 +55,39 @@ def max_fee():
     return int(5e17)
 
 
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def nonce_managers():
+    """
+    Stop the background nonce resync before the session event loop is closed.
+    """
+    yield
+    await starknet_nonce_manager.stop()
+    await evm_nonce_manager.stop()
+
+
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def receipts_polling():
+    """
+    Stop the receipts polling before the session event loop is closed.
+    """
+    yield
+    await receipt_poller.stop()
+
+
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def relayer_metrics():
+    """
+    Log the activity of the relayers and stop their balance refreshes at the end of the session.
+    """
+    yield
+    relayers = RelayerPool._cached_relayers
+    if relayers is None:
+        return
+    for address, metrics in relayers.metrics():
+        logger.info(f"ℹ️  Relayer {address}: {metrics}")
+    await relayers.scheduler.stop()
+
+
 @pytest_asyncio.fixture(scope="session")
 async def deployer(worker_id) -> Account:
     """
@@ -9,25 +9,27 @@ import pandas as pd
 import pytest
 from starkware.cairo.lang.cairo_constants import DEFAULT_PRIME
 from starkware.cairo.lang.compiler.cairo_compile import compile_cairo, get_module_reader
-from starkware.cairo.lang.compiler.scoped_name import ScopedName
-from starkware.cairo.lang.tracer.tracer_data import TracerData
 from starkware.cairo.lang.vm.cairo_run import (
     write_air_public_input,
     write_binary_memory,
     write_binary_trace,
 )
-from starkware.cairo.lang.vm.cairo_runner import CairoRunner
-from starkware.cairo.lang.vm.memory_dict import MemoryDict
 from starkware.cairo.lang.vm.memory_segments import FIRST_MEMORY_ADDR as PROGRAM_BASE
 from starkware.cairo.lang.vm.utils import RunResources
+from starkware.cairo.lang.vm.vm_core import VirtualMachine
 from starkware.starknet.compiler.starknet_pass_manager import starknet_pass_manager
 
+from tests.utils.benchmark import is_recording, record_run
 from tests.utils.constants import Opcodes
 from tests.utils.coverage import VmWithCoverage
+from tests.utils.ef_tests import VmWithProgramAccesses
 from tests.utils.hints import debug_info
-from tests.utils.reporting import profile_from_tracer_data
+from tests.utils.opcode_accounting import VmWithOpcodeAccounting, dump_opcode_report
+from tests.utils.program_cache import cached_compile
+from tests.utils.reporting import VmWithProfiling, profile_from_runner
+from tests.utils.runner_pool import RunnerPool
 from tests.utils.serde import Serde
-from tests.utils.syscall_handler import SyscallHandler
+from tests.utils.syscall_handler import SyscallHandler, crypto_cache_stats
 
 pd.set_option("display.max_rows", 500)
 pd.set_option("display.max_columns", 500)
@@ -40,19 +42,55 @@ logger = logging.getLogger()
 def cairo_compile(path):
     module_reader = get_module_reader(cairo_path=["cairo_zero"])
 
-    pass_manager = starknet_pass_manager(
-        prime=DEFAULT_PRIME,
-        read_module=module_reader.read,
-        disable_hint_validation=True,
-    )
+    def _compile(path):
+        pass_manager = starknet_pass_manager(
+            prime=DEFAULT_PRIME,
+            read_module=module_reader.read,
+            disable_hint_validation=True,
+        )
+
+        return compile_cairo(
+            Path(path).read_text(),
+            pass_manager=pass_manager,
+            debug_info=True,
+        )
 
-    return compile_cairo(
-        Path(path).read_text(),
-        pass_manager=pass_manager,
-        debug_info=True,
+    return cached_compile(path, module_reader.read, _compile)
+
+
+def get_vm_class(config):
+    """
+    Return the VirtualMachine class to use given the --cairo-coverage, --profile-cairo,
+    --opcode-accounting and --ef-tests-cache options.
+    """
+    vm_classes = []
+    if config.getoption("cairo_coverage"):
+        vm_classes.append(VmWithCoverage)
+    if config.getoption("profile_cairo"):
+        vm_classes.append(VmWithProfiling)
+    if config.getoption("opcode_accounting"):
+        vm_classes.append(VmWithOpcodeAccounting)
+    if config.getoption("ef_tests_cache") != "off":
+        vm_classes.append(VmWithProgramAccesses)
+    if not vm_classes:
+        return VirtualMachine
+    return type(
+        "TestVirtualMachine",
+        tuple(vm_classes),
+        {"sampling_interval": config.getoption("profile_cairo_interval")},
     )
 
 
+@pytest.fixture
+def starknet_state():
+    """
+    Run the test on a fork of the SyscallHandler state, so that its patches and writes do not leak
+    into the state shared by the other tests.
+    """
+    with SyscallHandler.use_state(SyscallHandler.state.fork()) as state:
+        yield state
+
+
 @pytest.fixture(scope="module")
 def cairo_program(request) -> list:
     cairo_file = Path(request.node.fspath).with_suffix(".cairo")
@@ -72,93 +110,33 @@ def cairo_run(request, cairo_program) -> list:
     Run the cairo program corresponding to the python test file at a given entrypoint with given program inputs as kwargs.
     Returns the output of the cairo program put in the output memory segment.
 
-    When --profile-cairo is passed, the cairo program is run with the tracer enabled and the resulting trace is dumped.
+    When --profile-cairo is passed, profiling samples are aggregated during the run and the resulting pprof profile is dumped.
+    Use --profile-cairo-interval to only sample one step every N steps.
+
+    When --opcode-accounting is passed, the Cairo steps and builtins used by each EVM opcode executed
+    by Interpreter.exec_opcode are dumped as a csv table.
+
+    When --cairo-coverage is passed, the executed pcs are recorded to build the coverage report at the end of the session.
 
     Logic is mainly taken from starkware.cairo.lang.vm.cairo_run with minor updates like the addition of the output segment.
     """
 
+    pool = RunnerPool(cairo_program)
+    vm_class = get_vm_class(request.config)
+
     def _factory(entrypoint, **kwargs) -> list:
-        implicit_args = list(
-            cairo_program.identifiers.get_by_full_name(
-                ScopedName(path=["__main__", entrypoint, "ImplicitArgs"])
-            ).members.keys()
-        )
-        args = list(
-            cairo_program.identifiers.get_by_full_name(
-                ScopedName(path=["__main__", entrypoint, "Args"])
-            ).members.keys()
-        )
-        return_data = cairo_program.identifiers.get_by_full_name(
-            ScopedName(path=["__main__", entrypoint, "Return"])
-        )
-        # Fix builtins runner based on the implicit args since the compiler doesn't find them
-        cairo_program.builtins = [
-            builtin
-            # This list is extracted from the builtin runners
-            # Builtins have to be declared in this order
-            for builtin in [
-                "output",
-                "pedersen",
-                "range_check",
-                "ecdsa",
-                "bitwise",
-                "ec_op",
-                "keccak",
-                "poseidon",
-                "range_check96",
-            ]
-            if builtin in {arg.replace("_ptr", "") for arg in implicit_args}
-        ]
-
-        memory = MemoryDict()
-        runner = CairoRunner(
-            program=cairo_program,
+        runner, template = pool.get(
+            entrypoint,
             layout=request.config.getoption("layout"),
-            memory=memory,
             proof_mode=request.config.getoption("proof_mode"),
-            allow_missing_builtins=False,
         )
+        implicit_args = template.implicit_args
+        return_data = template.return_data
+        add_output = template.output_ptr is not None
+        output_ptr = template.output_ptr
+        end = template.end
         serde = Serde(runner)
 
-        runner.program_base = runner.segments.add()
-        runner.execution_base = runner.segments.add()
-        for builtin_runner in runner.builtin_runners.values():
-            builtin_runner.initialize_segments(runner)
-
-        stack = []
-        for arg in implicit_args:
-            builtin_runner = runner.builtin_runners.get(arg.replace("_ptr", "_builtin"))
-            if builtin_runner is not None:
-                stack.extend(builtin_runner.initial_stack())
-                continue
-            if arg == "syscall_ptr":
-                syscall = runner.segments.add()
-                stack.append(syscall)
-                continue
-
-        add_output = "output_ptr" in args
-        if add_output:
-            output_ptr = runner.segments.add()
-            stack.append(output_ptr)
-
-        return_fp = runner.execution_base + 2
-        end = runner.segments.add()
-        # Add a jmp rel 0 instruction to be able to loop in proof mode
-        runner.memory[end] = 0x10780017FFF7FFF
-        runner.memory[end + 1] = 0
-        # Proof mode expects the program to start with __start__ and call main
-        # Adding [return_fp, end] before and after the stack makes this work both in proof mode and normal mode
-        stack = [return_fp, end] + stack + [return_fp, end]
-        runner.execution_public_memory = list(range(len(stack)))
-
-        runner.initialize_state(
-            entrypoint=cairo_program.identifiers.get_by_full_name(
-                ScopedName(path=["__main__", entrypoint])
-            ).pc,
-            stack=stack,
-        )
-        runner.initial_fp = runner.initial_ap = runner.execution_base + len(stack)
-
         runner.initialize_vm(
             hint_locals={
                 "program_input": kwargs,
@@ -169,13 +147,15 @@ def cairo_run(request, cairo_program) -> list:
                 "serde": serde,
                 "Opcodes": Opcodes,
             },
-            vm_class=VmWithCoverage,
+            vm_class=vm_class,
         )
         run_resources = RunResources(n_steps=10_000_000)
+        start = perf_counter()
         try:
             runner.run_until_pc(end, run_resources)
         except Exception as e:
             raise Exception(str(e)) from e
+        wall_time = perf_counter() - start
 
         runner.original_steps = runner.vm.current_step
         runner.end_run(disable_trace_padding=False)
@@ -197,8 +177,8 @@ def cairo_run(request, cairo_program) -> list:
                 )
             )
             runner.finalize_segments()
-
-        runner.relocate()
+            # Only the proof mode outputs need the relocated trace and memory.
+            runner.relocate()
 
         # Create a unique output stem for the given test by using the test file name, the entrypoint and the kwargs
         displayed_args = ""
@@ -217,18 +197,17 @@ def cairo_run(request, cairo_program) -> list:
             f"{output_stem[:160]}_{int(time_ns())}_{md5(output_stem.encode()).digest().hex()[:8]}"
         )
         if request.config.getoption("profile_cairo"):
-            tracer_data = TracerData(
-                program=cairo_program,
-                memory=runner.relocated_memory,
-                trace=runner.relocated_trace,
-                debug_info=runner.get_relocated_debug_info(),
-                program_base=PROGRAM_BASE,
-            )
-            data = profile_from_tracer_data(tracer_data)
+            data = profile_from_runner(runner, program_base=PROGRAM_BASE)
 
             with open(output_stem.with_suffix(".pb.gz"), "wb") as fp:
                 fp.write(data)
 
+        if request.config.getoption("opcode_accounting") and runner.vm.opcode_resources:
+            dump_opcode_report(
+                output_stem.with_suffix(".opcodes.csv"),
+                runner.vm.opcode_resources,
+            )
+
         if request.config.getoption("proof_mode"):
             with open(output_stem.with_suffix(".trace"), "wb") as fp:
                 write_binary_trace(fp, runner.relocated_trace)
@@ -282,6 +261,28 @@ def cairo_run(request, cairo_program) -> list:
         else:
             final_output = function_output
 
+        if is_recording():
+            # eth_call returns (evm, state, gas_used, required_gas)
+            gas = final_output[2] if entrypoint == "eth_call" else None
+            record_run(runner, wall_time=wall_time, gas=gas, entrypoint=entrypoint)
+
         return final_output
 
-    return _factory
+    yield _factory
+
+    # Keep the syscall journal bounded to the runs of a single test module.
+    SyscallHandler.journal.clear()
+
+    for name, stats in crypto_cache_stats().items():
+        if stats["hits"] + stats["misses"] == 0:
+            continue
+        logger.info(
+            f"{name} cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})"
+        )
+
+    if pool.setup_durations:
+        logger.info(
+            f"{Path(request.node.fspath).name}: {len(pool.setup_durations)} runs, "
+            f"runner setup {sum(pool.setup_durations) / len(pool.setup_durations) * 1000:.2f}ms mean, "
+            f"{sum(pool.setup_durations):.2f}s total"
+        )
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+import pytest
+from starknet_py.net.full_node_client import FullNodeClient
+
+
+class StubRpcError(Exception):
+    """
+    Raised by a handler to answer with a given JSON-RPC error code.
+    """
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class StubJsonRpcServer(ThreadingHTTPServer):
+    """
+    Local JSON-RPC server answering single and batch requests with the registered handlers.
+
+    Handlers are called with the params of the call, positional or by name. Every received
+    payload is recorded in `payloads`; each request waits for `delay` seconds before being
+    answered.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubJsonRpcHandler)
+        self.handlers: Dict[str, Callable] = {}
+        self.payloads: List = []
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    @property
+    def calls(self) -> List[dict]:
+        """All the JSON-RPC calls received, batches flattened."""
+        return [
+            call
+            for payload in self.payloads
+            for call in (payload if isinstance(payload, list) else [payload])
+        ]
+
+    def answer(self, call: dict) -> dict:
+        handler = self.handlers.get(call["method"])
+        if handler is None:
+            return {
+                "jsonrpc": "2.0",
+                "id": call["id"],
+                "error": {"code": -32601, "message": f"{call['method']} not found"},
+            }
+        try:
+            params = call.get("params", [])
+            result = handler(**params) if isinstance(params, dict) else handler(*params)
+        except Exception as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": call["id"],
+                "error": {"code": getattr(e, "code", -32000), "message": str(e)},
+            }
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+
+class _StubJsonRpcHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.payloads.append(payload)
+        time.sleep(self.server.delay)
+
+        if isinstance(payload, list):
+            response = [self.server.answer(call) for call in payload]
+        else:
+            response = self.server.answer(payload)
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def rpc_stub():
+    server = StubJsonRpcServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def starknet(monkeypatch, rpc_stub):
+    """
+    Yield kakarot_scripts.utils.starknet sending to the stub, with fresh nonces and receipts.
+    """
+    from kakarot_scripts.utils import starknet
+    from kakarot_scripts.utils.nonce import NonceManager
+    from kakarot_scripts.utils.submission import ReceiptPoller
+
+    monkeypatch.setattr(starknet, "RPC_CLIENT", FullNodeClient(node_url=rpc_stub.url))
+    monkeypatch.setattr(
+        starknet, "nonce_manager", NonceManager(starknet._get_pending_nonce)
+    )
+    receipt_poller = ReceiptPoller(
+        rpc_stub.url, interval=0.01, timeout=1, parse=starknet.receipt_poller.parse
+    )
+    monkeypatch.setattr(starknet, "receipt_poller", receipt_poller)
+    yield starknet
+    await receipt_poller.stop()
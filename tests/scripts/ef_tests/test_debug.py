@@ -0,0 +1,120 @@
+import pytest
+
+from kakarot_scripts.ef_tests.debug import (
+    BatchJsonRpcClient,
+    JsonRpcError,
+    check_post_state,
+    set_pre_state,
+)
+
+ADDRESS = "0x00000000000000000000000000000000000000a1"
+OTHER = "0x00000000000000000000000000000000000000b2"
+
+ACCOUNTS = {
+    ADDRESS: {
+        "code": "0x6001",
+        "balance": "0x10",
+        "nonce": "0x01",
+        "storage": {"0x01": "0x02", "0x02": "0x03"},
+    },
+    OTHER: {"code": "0x", "balance": "0x00", "nonce": "0x00", "storage": {}},
+}
+
+
+@pytest.fixture
+def chain(rpc_stub):
+    """
+    Serve the ACCOUNTS state from the stub, keyed by lowercase address.
+    """
+    state = {address.lower(): account for address, account in ACCOUNTS.items()}
+    rpc_stub.handlers.update(
+        {
+            "eth_getBalance": lambda address, _: state[address.lower()]["balance"],
+            "eth_getTransactionCount": lambda address, _: state[address.lower()][
+                "nonce"
+            ],
+            "eth_getCode": lambda address, _: state[address.lower()]["code"],
+            "eth_getStorageAt": lambda address, key, _: hex(
+                int(
+                    next(
+                        (
+                            value
+                            for k, value in state[address.lower()]["storage"].items()
+                            if int(k, 16) == int(key, 16)
+                        ),
+                        "0x0",
+                    ),
+                    16,
+                )
+            ),
+        }
+    )
+    return state
+
+
+class TestBatchJsonRpcClient:
+    def test_should_return_results_in_order(self, rpc_stub):
+        rpc_stub.handlers["echo"] = lambda value: value
+        client = BatchJsonRpcClient(rpc_stub.url, batch_size=3)
+
+        assert client.batch([("echo", [i]) for i in range(10)]) == list(range(10))
+        # Batches are sent concurrently, in no particular order.
+        assert sorted(len(payload) for payload in rpc_stub.payloads) == [1, 3, 3, 3]
+
+    def test_should_raise_all_errors(self, rpc_stub):
+        client = BatchJsonRpcClient(rpc_stub.url)
+
+        with pytest.raises(JsonRpcError, match="unknown_a(.|\n)*unknown_b"):
+            client.batch([("unknown_a", []), ("unknown_b", [])])
+
+
+class TestSetPreState:
+    def test_should_batch_all_the_requests(self, rpc_stub):
+        rpc_stub.handlers.update(
+            {
+                method: lambda *_: True
+                for method in [
+                    "anvil_setCode",
+                    "anvil_setBalance",
+                    "anvil_setNonce",
+                    "anvil_setStorageAt",
+                ]
+            }
+        )
+        client = BatchJsonRpcClient(rpc_stub.url, batch_size=4)
+
+        set_pre_state(client, {"pre": ACCOUNTS})
+
+        assert len(rpc_stub.calls) == 8
+        assert len(rpc_stub.payloads) == 2
+        assert {
+            tuple(call["params"])
+            for call in rpc_stub.calls
+            if call["method"] == "anvil_setStorageAt"
+        } == {
+            (ADDRESS, f"0x{1:064x}", f"0x{2:064x}"),
+            (ADDRESS, f"0x{2:064x}", f"0x{3:064x}"),
+        }
+
+
+class TestCheckPostState:
+    @pytest.mark.usefixtures("chain")
+    def test_should_pass_on_matching_state(self, rpc_stub):
+        check_post_state(BatchJsonRpcClient(rpc_stub.url), {"postState": ACCOUNTS})
+
+    def test_should_report_all_mismatches(self, rpc_stub, chain):
+        chain[ADDRESS.lower()] = {
+            **ACCOUNTS[ADDRESS],
+            "balance": "0x11",
+            "storage": {"0x01": "0x02", "0x02": "0x04"},
+        }
+        chain[OTHER.lower()] = {**ACCOUNTS[OTHER], "nonce": "0x01"}
+
+        with pytest.raises(ValueError, match="3 errors") as e:
+            check_post_state(
+                BatchJsonRpcClient(rpc_stub.url, batch_size=2),
+                {"postState": ACCOUNTS},
+            )
+        assert "balance error: 17 != 16" in str(e.value)
+        assert "storage at key 0x02 error: 4 != 3" in str(e.value)
+        assert "nonce error: 1 != 0" in str(e.value)
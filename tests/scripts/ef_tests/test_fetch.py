@@ -0,0 +1,122 @@
+import io
+import json
+import tarfile
+import zlib
+
+import pytest
+
+from kakarot_scripts.ef_tests import fetch
+from kakarot_scripts.ef_tests.fetch import (
+    GENERAL_STATE_TESTS,
+    PYSPECS,
+    fetch_tarball,
+    iter_fixture_files,
+    parse_fixture_file,
+)
+
+PYSPECS_TEST = (
+    "tests/byzantium/eip198_modexp_precompile/test_modexp.py::"
+    "test_modexp[fork_Cancun-blockchain_test-EIP-198-case1]"
+)
+FIXTURES = {
+    f"tests-v1/{GENERAL_STATE_TESTS}/stExample/add11.json": {
+        "add11_d0g0v0_Cancun": {"network": "Cancun", "value": 1},
+        "add11_d0g0v0_Shanghai": {"network": "Shanghai", "value": 2},
+    },
+    f"tests-v1/{PYSPECS}/eip198_modexp_precompile/modexp.json": {
+        PYSPECS_TEST: {"network": "Cancun", "value": 3},
+        PYSPECS_TEST.replace("Cancun", "Shanghai"): {"network": "Shanghai"},
+    },
+    "tests-v1/TransactionTests/ttNonce/nonce.json": {"nonce": {"network": "Cancun"}},
+}
+
+
+def make_tarball() -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content in FIXTURES.items():
+            data = json.dumps(content).encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class StubResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+
+@pytest.fixture
+def downloads(monkeypatch, tmp_path):
+    """
+    Serve make_tarball() as the release tarball, cached in tmp_path, and return the downloaded urls.
+    """
+    downloads = []
+
+    def _get(url, **_):
+        downloads.append(url)
+        return StubResponse(make_tarball())
+
+    monkeypatch.setattr(fetch, "EF_TESTS_DIR", tmp_path / "extracted")
+    monkeypatch.setattr(fetch, "EF_TESTS_TARBALL", tmp_path / "cache" / "tests.tar.gz")
+    monkeypatch.setattr(fetch.requests, "get", _get)
+    return downloads
+
+
+class TestParseFixtureFile:
+    @pytest.mark.parametrize(
+        "path, expected",
+        [
+            (
+                f"tests-v1/{GENERAL_STATE_TESTS}/stExample/add11.json",
+                [("stExample_add11_d0g0v0_Cancun", "stExample", 1)],
+            ),
+            (
+                f"tests-v1/{PYSPECS}/eip198_modexp_precompile/modexp.json",
+                [
+                    (
+                        "test_modexp[fork_Cancun-blockchain_test-EIP-198-case1]",
+                        "eip198_modexp_precompile",
+                        3,
+                    )
+                ],
+            ),
+        ],
+    )
+    def test_should_name_default_network_tests(self, path, expected):
+        rows = parse_fixture_file(path, json.dumps(FIXTURES[path]).encode())
+
+        assert [
+            (name, folder, json.loads(zlib.decompress(data))["value"])
+            for name, folder, _, data in rows
+        ] == expected
+
+
+class TestFetchTarball:
+    def test_should_download_once(self, downloads):
+        path = fetch_tarball()
+        assert path.read_bytes()[:2] == b"\x1f\x8b"
+
+        assert fetch_tarball() == path
+        assert downloads == [fetch.EF_TESTS_URL]
+
+    def test_should_only_yield_general_state_tests(self, downloads):
+        paths = [path for path, _ in iter_fixture_files()]
+        assert paths == list(FIXTURES)[:2]
+
+        assert [path for path, _ in iter_fixture_files()] == paths
+        assert len(downloads) == 1
@@ -0,0 +1,101 @@
+import json
+from hashlib import sha256
+
+import pytest
+
+from kakarot_scripts.ef_tests.store import EFTestStore, compress
+
+TESTS = {
+    "add11_d0g0v0_Cancun": ("GeneralStateTests/stExample", {"value": 1}),
+    "add11_d1g0v0_Cancun": ("GeneralStateTests/stExample", {"value": 2}),
+    "test_modexp[case1]": ("Pyspecs/eip198_modexp_precompile", {"value": 3}),
+}
+
+
+def row(name, folder, content):
+    data = json.dumps(content).encode()
+    return name, folder, sha256(data).hexdigest(), compress(data)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "parsed.sqlite"
+    with EFTestStore(path, readonly=False) as store:
+        store.put_many(
+            row(name, folder, content) for name, (folder, content) in TESTS.items()
+        )
+    return path
+
+
+@pytest.fixture
+def store(path):
+    with EFTestStore(path) as store:
+        yield store
+
+
+class TestEFTestStore:
+    def test_should_raise_when_missing_in_readonly_mode(self, tmp_path):
+        with pytest.raises(FileNotFoundError, match="make fetch-ef-tests"):
+            EFTestStore(tmp_path / "missing.sqlite")
+
+    def test_should_not_write_in_readonly_mode(self, store):
+        with pytest.raises(Exception, match="readonly"):
+            store.delete(["add11_d0g0v0_Cancun"])
+
+    def test_should_get_test_cases(self, store):
+        assert len(store) == 3
+        assert "add11_d0g0v0_Cancun" in store
+        assert "add11_d0g0v0_Shanghai" not in store
+        assert store.get("test_modexp[case1]") == {"value": 3}
+        assert json.loads(store.get_raw("add11_d1g0v0_Cancun")) == {"value": 2}
+
+    def test_should_raise_key_error_on_unknown_name(self, store):
+        with pytest.raises(KeyError):
+            store.get("unknown")
+
+    def test_should_match_names_by_glob(self, store):
+        assert store.names("add11_*") == ["add11_d0g0v0_Cancun", "add11_d1g0v0_Cancun"]
+        assert store.names(folder="Pyspecs/eip198_modexp_precompile") == [
+            "test_modexp[case1]"
+        ]
+        assert store.names("add11_*", folder="Pyspecs/eip198_modexp_precompile") == []
+
+    def test_should_return_folders_by_name(self, store):
+        assert store.folders("test_*") == {
+            "test_modexp[case1]": "Pyspecs/eip198_modexp_precompile"
+        }
+
+    def test_should_find_by_substring_of_name_and_folder(self, store):
+        assert store.find("d1g0") == ["add11_d1g0v0_Cancun"]
+        # The Pyspecs names do not include their folder.
+        assert store.find("", "modexp") == ["test_modexp[case1]"]
+        assert store.find("Cancun", "stExample") == [
+            "add11_d0g0v0_Cancun",
+            "add11_d1g0v0_Cancun",
+        ]
+
+    def test_should_iterate_test_cases(self, store):
+        assert list(store.iter("add11_*")) == [
+            ("add11_d0g0v0_Cancun", {"value": 1}),
+            ("add11_d1g0v0_Cancun", {"value": 2}),
+        ]
+
+    def test_should_replace_and_delete(self, path):
+        with EFTestStore(path, readonly=False) as store:
+            hashes = store.hashes()
+            store.put_many(
+                [
+                    row(
+                        "add11_d0g0v0_Cancun",
+                        "GeneralStateTests/stExample",
+                        {"value": 10},
+                    )
+                ]
+            )
+            store.delete(["test_modexp[case1]"])
+
+            assert store.get("add11_d0g0v0_Cancun") == {"value": 10}
+            assert (
+                store.hashes()["add11_d0g0v0_Cancun"] != hashes["add11_d0g0v0_Cancun"]
+            )
+            assert store.names() == ["add11_d0g0v0_Cancun", "add11_d1g0v0_Cancun"]
@@ -0,0 +1,141 @@
+import pandas as pd
+import pytest
+
+from kakarot_scripts import compare_resources as module
+from kakarot_scripts.compare_resources import (
+    compare_resources,
+    load_resources,
+    save_resources,
+)
+
+
+def resources(runs):
+    """
+    Build the resources of {test: [steps per run]}, or {test: {call: [steps per run]}}.
+    """
+    return pd.DataFrame(
+        [
+            {"test": test, "call": call, "run": run, "steps": steps}
+            for test, calls in runs.items()
+            for call, values in (
+                calls.items() if isinstance(calls, dict) else [("cairo_run#0", calls)]
+            )
+            for run, steps in enumerate(values)
+        ]
+    )
+
+
+class TestCompareResources:
+    def test_should_flag_deterministic_regression_with_few_runs(self):
+        per_test, summary = compare_resources(
+            resources({"test_a": [100, 100, 100]}),
+            resources({"test_a": [110, 110, 110]}),
+        )
+
+        assert per_test.loc["test_a"].regression
+        assert summary.regressions == 1
+
+    def test_should_not_flag_changes_below_threshold(self):
+        per_test, _ = compare_resources(
+            resources({"test_a": [1000]}),
+            resources({"test_a": [1005]}),
+            threshold=0.01,
+        )
+
+        assert not per_test.loc["test_a"].regression
+
+    def test_should_not_flag_noisy_increase(self):
+        per_test, _ = compare_resources(
+            resources({"test_a": [100, 130, 90, 120, 110]}),
+            resources({"test_a": [125, 95, 115, 105, 135]}),
+        )
+
+        assert per_test.loc["test_a"].relative > 0.01
+        assert per_test.loc["test_a"].p_value > 0.05
+        assert not per_test.loc["test_a"].regression
+
+    def test_should_flag_significant_increase(self):
+        per_test, _ = compare_resources(
+            resources({"test_a": [100, 101, 99, 100, 102]}),
+            resources({"test_a": [120, 121, 119, 122, 120]}),
+        )
+
+        assert per_test.loc["test_a"].p_value < 0.05
+        assert per_test.loc["test_a"].regression
+
+    def test_should_flag_improvement(self):
+        per_test, summary = compare_resources(
+            resources({"test_a": [100, 100]}),
+            resources({"test_a": [80, 80]}),
+        )
+
+        assert per_test.loc["test_a"].improvement
+        assert summary.regressions == 0
+
+    def test_should_sum_the_calls_of_a_run(self):
+        per_test, _ = compare_resources(
+            resources({"test_a": {"eth_call#0": [100], "eth_call#1": [10]}}),
+            resources({"test_a": {"eth_call#0": [100], "eth_call#1": [20]}}),
+        )
+
+        assert per_test.loc["test_a"].baseline == 110
+        assert per_test.loc["test_a"].current == 120
+        assert per_test.loc["test_a"].calls == 2
+        assert per_test.loc["test_a"].regression
+
+    def test_should_only_compare_calls_made_on_both_sides(self):
+        per_test, summary = compare_resources(
+            resources({"test_a": {"eth_call#0": [100], "deploy#0": [50]}}),
+            resources({"test_a": {"eth_call#0": [100], "eth_call#1": [500]}}),
+        )
+
+        assert per_test.loc["test_a"].calls == 1
+        assert per_test.loc["test_a"].delta == 0
+        assert summary.regressions == 0
+
+
+class TestSaveResources:
+    @pytest.fixture(autouse=True)
+    def resources_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(module, "LOCAL_RESOURCES_DIR", tmp_path)
+        monkeypatch.setattr(module, "BASELINES_DIR", tmp_path / "baselines")
+
+    @staticmethod
+    def record(test, entrypoint, steps):
+        return {
+            "name": test,
+            "steps": steps,
+            "memory_holes": 0,
+            "builtins": {"range_check": 1},
+            "wall_time": 0.1,
+            "gas": None,
+            "entrypoint": entrypoint,
+        }
+
+    def test_should_number_the_calls_of_each_test_by_entrypoint(self):
+        save_resources(
+            [
+                self.record("test_a", "eth_call", 1),
+                self.record("test_a", "deploy", 2),
+                self.record("test_a", "eth_call", 3),
+                self.record("test_b", "eth_call", 4),
+            ],
+            commit="abc",
+        )
+
+        saved = load_resources("abc")
+        assert saved.call.tolist() == [
+            "eth_call#0",
+            "deploy#0",
+            "eth_call#1",
+            "eth_call#0",
+        ]
+        assert saved.range_check.tolist() == [1, 1, 1, 1]
+
+    def test_should_append_a_run_per_session(self):
+        for steps in (1, 2):
+            save_resources([self.record("test_a", "eth_call", steps)], commit="abc")
+
+        saved = load_resources("abc")
+        assert saved.run.tolist() == [0, 1]
+        assert saved.steps.tolist() == [1, 2]
@@ -0,0 +1,120 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from starknet_py.net.full_node_client import FullNodeClient
+
+from kakarot_scripts.utils.nonce import NonceManager
+
+ACCOUNT = SimpleNamespace(address=0xACC0)
+OTHER = SimpleNamespace(address=0x07E5)
+
+
+@pytest.fixture
+def chain_nonces(rpc_stub):
+    """
+    Pending nonces served by the stub starknet_getNonce, keyed by address.
+    """
+    nonces = {ACCOUNT.address: 3, OTHER.address: 0}
+    rpc_stub.handlers["starknet_getNonce"] = lambda contract_address, **_: hex(
+        nonces[int(contract_address, 16)]
+    )
+    return nonces
+
+
+@pytest.fixture
+def nonce_manager(rpc_stub):
+    client = FullNodeClient(node_url=rpc_stub.url)
+
+    async def _fetch_nonce(account):
+        return await client.get_contract_nonce(account.address, block_number="pending")
+
+    return NonceManager(_fetch_nonce)
+
+
+def get_nonce_calls(rpc_stub):
+    return [call for call in rpc_stub.calls if call["method"] == "starknet_getNonce"]
+
+
+class TestNonceManager:
+    @pytest.mark.usefixtures("chain_nonces")
+    async def test_should_allocate_concurrent_nonces_from_a_single_fetch(
+        self, rpc_stub, nonce_manager
+    ):
+        nonces = await asyncio.gather(
+            *[nonce_manager.allocate(ACCOUNT) for _ in range(10)],
+            *[nonce_manager.allocate(OTHER) for _ in range(5)],
+        )
+
+        assert sorted(nonces[:10]) == list(range(3, 13))
+        assert sorted(nonces[10:]) == list(range(5))
+        assert (await nonce_manager.allocate(ACCOUNT)) == 13
+        assert len(get_nonce_calls(rpc_stub)) == 2
+
+    async def test_should_reset_to_chain_nonce_on_reject(
+        self, chain_nonces, nonce_manager
+    ):
+        nonces = [await nonce_manager.allocate(ACCOUNT) for _ in range(4)]
+        chain_nonces[ACCOUNT.address] = 5
+
+        await nonce_manager.reject(ACCOUNT, nonces[1])
+
+        assert (await nonce_manager.allocate(ACCOUNT)) == 5
+
+    async def test_should_reuse_rejected_nonce_ahead_of_chain(
+        self, chain_nonces, nonce_manager
+    ):
+        nonces = [await nonce_manager.allocate(ACCOUNT) for _ in range(4)]
+        assert chain_nonces[ACCOUNT.address] == nonces[0]
+
+        await nonce_manager.reject(ACCOUNT, nonces[2])
+
+        # The nonces before the rejected one are still in flight, and are not reused.
+        assert (await nonce_manager.allocate(ACCOUNT)) == nonces[2]
+        await nonce_manager.resync(ACCOUNT)
+        assert (await nonce_manager.allocate(ACCOUNT)) == nonces[3]
+
+    async def test_resync_should_move_forward_to_chain_nonce(
+        self, chain_nonces, nonce_manager
+    ):
+        await nonce_manager.allocate(ACCOUNT)
+        chain_nonces[ACCOUNT.address] = 10
+
+        await nonce_manager.resync(ACCOUNT)
+
+        assert (await nonce_manager.allocate(ACCOUNT)) == 10
+
+    @pytest.mark.usefixtures("chain_nonces")
+    async def test_resync_should_keep_nonces_in_flight(self, nonce_manager):
+        await nonce_manager.allocate(ACCOUNT)
+        await nonce_manager.allocate(ACCOUNT)
+
+        await nonce_manager.resync(ACCOUNT)
+
+        assert (await nonce_manager.allocate(ACCOUNT)) == 5
+
+    @pytest.mark.usefixtures("chain_nonces")
+    async def test_resync_should_move_back_when_nothing_in_flight(self, nonce_manager):
+        nonce = await nonce_manager.allocate(ACCOUNT)
+        nonce_manager.release(ACCOUNT, nonce)
+
+        await nonce_manager.resync(ACCOUNT)
+
+        assert (await nonce_manager.allocate(ACCOUNT)) == 3
+
+    async def test_should_resync_in_background(self, rpc_stub, chain_nonces):
+        client = FullNodeClient(node_url=rpc_stub.url)
+
+        async def _fetch_nonce(account):
+            return await client.get_contract_nonce(
+                account.address, block_number="pending"
+            )
+
+        nonce_manager = NonceManager(_fetch_nonce, resync_interval=0.01)
+        await nonce_manager.allocate(ACCOUNT)
+        chain_nonces[ACCOUNT.address] = 7
+
+        await asyncio.sleep(0.2)
+        await nonce_manager.stop()
+
+        assert (await nonce_manager.allocate(ACCOUNT)) == 7
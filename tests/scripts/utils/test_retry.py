@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+import pytest
+
+from kakarot_scripts.utils.retry import DEFAULT_BACKOFF, Backoff, retry
+
+
+def flaky(failures, result=None, error=ConnectionError):
+    """
+    Coroutine function raising error for the first failures calls, then returning result.
+    """
+    calls = []
+
+    async def _call():
+        calls.append(time.monotonic())
+        if len(calls) <= failures:
+            raise error(f"failure {len(calls)}")
+        return result
+
+    _call.calls = calls
+    return _call
+
+
+class TestBackoff:
+    def test_should_grow_exponentially_up_to_max_delay(self):
+        delays = Backoff(initial=1, factor=2, max_delay=5, jitter=0).delays()
+        assert [next(delays) for _ in range(5)] == [1, 2, 4, 5, 5]
+
+    def test_should_jitter_delays_down(self):
+        delays = Backoff(initial=1, factor=1, jitter=0.5).delays()
+        assert all(0.5 <= next(delays) <= 1 for _ in range(100))
+
+    def test_default_should_have_a_deadline(self):
+        assert DEFAULT_BACKOFF.timeout is not None
+
+
+class TestRetry:
+    async def test_should_retry_until_success(self):
+        fn = flaky(2, result=42)
+
+        assert await retry(fn, backoff=Backoff(initial=0.001)) == 42
+        assert len(fn.calls) == 3
+
+    async def test_should_retry_until_result_is_accepted(self):
+        results = iter(["pending", "pending", "accepted"])
+
+        async def _status():
+            return next(results)
+
+        result = await retry(
+            _status,
+            backoff=Backoff(initial=0.001),
+            until=lambda status: status == "accepted",
+        )
+        assert result == "accepted"
+
+    async def test_should_not_retry_other_errors(self):
+        fn = flaky(1, error=KeyError)
+
+        with pytest.raises(KeyError):
+            await retry(fn, retry_on=(ConnectionError,))
+        assert len(fn.calls) == 1
+
+    @pytest.mark.parametrize(
+        "error", [TimeoutError, asyncio.TimeoutError, aiohttp.ClientConnectionError]
+    )
+    async def test_should_retry_transient_errors_by_default(self, error):
+        fn = flaky(1, result=42, error=error)
+
+        assert await retry(fn, backoff=Backoff(initial=0.001)) == 42
+        assert len(fn.calls) == 2
+
+    async def test_should_not_retry_other_errors_by_default(self):
+        fn = flaky(1, error=ValueError)
+
+        with pytest.raises(ValueError):
+            await retry(fn, backoff=Backoff(initial=0.001))
+        assert len(fn.calls) == 1
+
+    async def test_should_log_errors_as_warnings_and_rejected_results_as_debug(
+        self, caplog
+    ):
+        results = iter([ConnectionError("down"), "pending", "accepted"])
+
+        async def _status():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with caplog.at_level(logging.DEBUG, logger="kakarot_scripts.utils.retry"):
+            await retry(
+                _status,
+                backoff=Backoff(initial=0.001),
+                until=lambda status: status == "accepted",
+            )
+        assert [record.levelno for record in caplog.records] == [
+            logging.WARNING,
+            logging.DEBUG,
+        ]
+
+    async def test_should_raise_last_error_at_deadline(self):
+        fn = flaky(1000)
+        start = time.monotonic()
+
+        with pytest.raises(ConnectionError):
+            await retry(fn, backoff=Backoff(initial=0.01, timeout=0.1))
+        # The last sleep is clamped to the deadline.
+        assert time.monotonic() - start < 0.1 + 0.05
+        assert len(fn.calls) > 1
+
+    async def test_should_time_out_on_rejected_results(self):
+        async def _status():
+            return "pending"
+
+        with pytest.raises(TimeoutError, match="status timed out"):
+            await retry(
+                _status,
+                backoff=Backoff(initial=0.01, timeout=0.05),
+                until=lambda status: status == "accepted",
+                description="status",
+            )
+
+    async def test_should_be_cancellable_while_sleeping(self):
+        fn = flaky(1000)
+        task = asyncio.ensure_future(retry(fn, backoff=Backoff(initial=10)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert len(fn.calls) == 1
@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from kakarot_scripts.utils.scheduler import RelayerScheduler
+
+
+@pytest.fixture
+def relayers():
+    return [SimpleNamespace(address=address) for address in (1, 2, 3)]
+
+
+@pytest.fixture
+def balances(relayers):
+    return {relayer.address: 100 for relayer in relayers}
+
+
+@pytest.fixture
+def scheduler(relayers, balances):
+    async def _fetch_balance(relayer):
+        return balances[relayer.address]
+
+    async def _top_up(relayer):
+        balances[relayer.address] = 100
+
+    return RelayerScheduler(
+        relayers, _fetch_balance, _top_up, min_balance=20, max_fee=10
+    )
+
+
+class TestRelayerScheduler:
+    async def test_should_spread_senders_over_least_loaded_relayers(self, scheduler):
+        picked = [await scheduler.acquire(sender) for sender in range(6)]
+
+        assert sorted(relayer.address for relayer in picked) == [1, 1, 2, 2, 3, 3]
+        assert {m.in_flight for m in scheduler.metrics().values()} == {2}
+
+    async def test_should_keep_relayer_of_sender_with_transactions_in_flight(
+        self, scheduler
+    ):
+        first = await scheduler.acquire("hot")
+        second = await scheduler.acquire("hot")
+        assert second is first
+
+        scheduler.release("hot", first, 0.1)
+        scheduler.release("hot", second, 0.1)
+        # Back to idle, the sender is spread again.
+        assert (await scheduler.acquire("hot")) is not first
+
+    async def test_should_prefer_richest_relayer(self, scheduler, balances):
+        balances.update({1: 50, 2: 90, 3: 70})
+
+        assert (await scheduler.acquire("sender")).address == 2
+
+    async def test_should_skip_relayers_low_on_funds(self, relayers, balances):
+        async def _fetch_balance(relayer):
+            return balances[relayer.address]
+
+        # Without top up, low relayers stay low.
+        scheduler = RelayerScheduler(
+            relayers, _fetch_balance, min_balance=20, max_fee=10
+        )
+        balances.update({1: 15, 2: 15, 3: 100})
+
+        assert (await scheduler.acquire("a")).address == 3
+        assert (await scheduler.acquire("b")).address == 3
+
+    async def test_should_top_up_relayers_low_on_funds(self, scheduler, balances):
+        balances.update({1: 25, 2: 25, 3: 25})
+        relayer = await scheduler.acquire("sender")
+        balances[relayer.address] -= 10
+
+        scheduler.release("sender", relayer, 0.1)
+        await asyncio.sleep(0.01)
+
+        assert balances[relayer.address] == 100
+        assert scheduler.metrics()[relayer.address].top_ups == 1
+        assert scheduler.metrics()[relayer.address].balance == 100
+
+    async def test_should_top_up_drained_relayers_on_first_use(
+        self, scheduler, balances
+    ):
+        balances.update({1: 5, 2: 100, 3: 100})
+
+        await scheduler.acquire("sender")
+        await asyncio.sleep(0.01)
+
+        metrics = scheduler.metrics()[1]
+        assert balances[1] == 100
+        assert metrics.top_ups == 1
+        # Less the reservation of the transaction in flight, if it picked the topped up relayer.
+        assert metrics.balance == 100 - 10 * metrics.in_flight
+
+    async def test_should_record_metrics(self, scheduler):
+        async with scheduler.lease("sender") as relayer:
+            await asyncio.sleep(0.01)
+        with pytest.raises(ValueError):
+            async with scheduler.lease("sender"):
+                raise ValueError("reverted")
+
+        metrics = scheduler.metrics()
+        assert sum(m.sent for m in metrics.values()) == 2
+        assert sum(m.failed for m in metrics.values()) == 1
+        assert all(m.in_flight == 0 for m in metrics.values())
+        assert metrics[relayer.address].max_latency >= 0.01
+        assert metrics[relayer.address].throughput > 0
+
+    async def test_should_average_latencies(self, scheduler):
+        relayer = await scheduler.acquire("sender")
+        for latency in (0.1, 0.3):
+            scheduler.release("sender", relayer, latency)
+            await scheduler.acquire("sender")
+        scheduler.release("sender", relayer, 0.2)
+
+        metrics = scheduler.metrics()[relayer.address]
+        assert metrics.done == 3
+        assert metrics.mean_latency == pytest.approx(0.2)
+        assert metrics.max_latency == 0.3
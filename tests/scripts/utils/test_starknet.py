@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from starknet_py.net.account.account import Account
+from starknet_py.net.client_errors import ClientError
+from starknet_py.net.client_models import Call
+from starknet_py.net.full_node_client import FullNodeClient
+from starknet_py.net.models import StarknetChainId
+from starknet_py.net.signer.stark_curve_signer import KeyPair
+
+from kakarot_scripts.utils.submission import CONTRACT_NOT_FOUND, TXN_HASH_NOT_FOUND
+from tests.scripts.conftest import StubRpcError
+
+ACCOUNT_ADDRESS = 0xACC0
+CALL = Call(to_addr=0xC0DE, selector=0x1, calldata=[])
+
+
+@pytest.fixture
+def account(rpc_stub):
+    """
+    Return a Cairo 1 account at ACCOUNT_ADDRESS, with nonce 3.
+    """
+    rpc_stub.handlers.update(
+        {
+            "starknet_getNonce": lambda **_: hex(3),
+            "starknet_getClassAt": lambda **_: {
+                "sierra_program": [],
+                "contract_class_version": "0.1.0",
+                "entry_points_by_type": {
+                    "CONSTRUCTOR": [],
+                    "EXTERNAL": [],
+                    "L1_HANDLER": [],
+                },
+                "abi": "[]",
+            },
+        }
+    )
+    return Account(
+        address=ACCOUNT_ADDRESS,
+        client=FullNodeClient(node_url=rpc_stub.url),
+        key_pair=KeyPair.from_private_key(1),
+        chain=StarknetChainId.SEPOLIA,
+    )
+
+
+class TestExecuteV1:
+    async def test_should_reject_nonce_of_transaction_failing_to_send(
+        self, rpc_stub, starknet, account
+    ):
+        def _add_invoke_transaction(**_):
+            raise StubRpcError(55, "Account validation failed")
+
+        rpc_stub.handlers["starknet_addInvokeTransaction"] = _add_invoke_transaction
+
+        with pytest.raises(ClientError, match="Account validation failed"):
+            await starknet.execute_v1(account, CALL)
+
+        assert (await starknet.nonce_manager.allocate(account)) == 3
+
+
+class TestDeployStarknetAccount:
+    N = 4
+    # Time the stub takes to answer a deployment.
+    DELAY = 0.5
+
+    @pytest.fixture
+    def node(self, monkeypatch, rpc_stub, starknet):
+        """
+        Serve a node rejecting the first submission of every account deployment, and serving its
+        receipt only after a second submission. Return the submitted salts and the peak number of
+        submissions being answered at once.
+        """
+        node = SimpleNamespace(submissions=[], active=0, peak=0, lock=threading.Lock())
+        monkeypatch.setitem(starknet.NETWORK, "check_interval", 0.1)
+        monkeypatch.setitem(starknet.NETWORK, "max_wait", 30)
+
+        async def _get_balance(*_):
+            return 10**18
+
+        def _get_class_hash_at(**_):
+            raise StubRpcError(CONTRACT_NOT_FOUND, "Contract not found")
+
+        def _add_deploy_account_transaction(deploy_account_transaction):
+            salt = int(deploy_account_transaction["contract_address_salt"], 16)
+            with node.lock:
+                node.submissions.append(salt)
+                node.active += 1
+                node.peak = max(node.peak, node.active)
+            time.sleep(self.DELAY)
+            with node.lock:
+                node.active -= 1
+            if node.submissions.count(salt) == 1:
+                raise StubRpcError(55, "Account validation failed")
+            return {"transaction_hash": hex(salt), "contract_address": hex(salt)}
+
+        def _get_transaction_receipt(transaction_hash):
+            if node.submissions.count(int(transaction_hash, 16)) < 2:
+                raise StubRpcError(TXN_HASH_NOT_FOUND, "Transaction hash not found")
+            return {
+                "type": "DEPLOY_ACCOUNT",
+                "transaction_hash": transaction_hash,
+                "contract_address": transaction_hash,
+                "actual_fee": {"amount": "0x0", "unit": "WEI"},
+                "execution_status": "SUCCEEDED",
+                "finality_status": "ACCEPTED_ON_L2",
+                "block_hash": "0x1",
+                "block_number": 1,
+                "messages_sent": [],
+                "events": [],
+                "execution_resources": {"steps": 1},
+            }
+
+        # Accounts are already funded, and contracts are not compiled.
+        monkeypatch.setattr(starknet, "get_balance", _get_balance)
+        monkeypatch.setattr(starknet, "get_artifact", lambda _: (None, None))
+        rpc_stub.handlers.update(
+            {
+                "starknet_chainId": lambda: hex(int.from_bytes(b"KKRT", "big")),
+                "starknet_getClassHashAt": _get_class_hash_at,
+                "starknet_addDeployAccountTransaction": _add_deploy_account_transaction,
+                "starknet_getTransactionReceipt": _get_transaction_receipt,
+            }
+        )
+        return node
+
+    async def test_should_retry_deployments_concurrently(self, starknet, node):
+        deployments = await asyncio.gather(
+            *[
+                starknet.deploy_starknet_account(
+                    class_hash=0xC1A55, private_key="0x1", salt=salt
+                )
+                for salt in range(1, self.N + 1)
+            ]
+        )
+
+        assert [deployment["tx"] for deployment in deployments] == list(
+            range(1, self.N + 1)
+        )
+        assert sorted(node.submissions) == sorted(2 * list(range(1, self.N + 1)))
+        # Sequential deployments, or blocking retries, would be answered one at a time.
+        assert node.peak > 1
+
+
+class TestRelayerPool:
+    TOKEN = 0x70CE
+    SPENDER = 0x5E4D
+
+    @pytest.fixture
+    def chain(self, rpc_stub):
+        """
+        Serve the deployed relayers and their token allowances to SPENDER, keyed by address.
+        """
+        chain = SimpleNamespace(deployed=set(), allowances={})
+
+        def _get_class_hash_at(contract_address, **_):
+            if int(contract_address, 16) not in chain.deployed:
+                raise StubRpcError(CONTRACT_NOT_FOUND, "Contract not found")
+            return hex(0xC1A55)
+
+        def _call(request, **_):
+            owner, spender = (int(value, 16) for value in request["calldata"])
+            assert int(request["contract_address"], 16) == self.TOKEN
+            assert spender == self.SPENDER
+            allowance = chain.allowances.get(owner, 0)
+            return [hex(allowance % 2**128), hex(allowance >> 128)]
+
+        rpc_stub.handlers.update(
+            {
+                "starknet_getClassHashAt": _get_class_hash_at,
+                "starknet_call": _call,
+            }
+        )
+        return chain
+
+    async def test_should_resume_provisioning(self, rpc_stub, starknet, chain):
+        addresses = [0xA0, 0xA1, 0xA2, 0xA3]
+        # A previous run deployed the first three relayers, and approved the first one.
+        chain.deployed.update(addresses[:3])
+        chain.allowances.update({0xA0: 2**256 - 1, 0xA1: 1, 0xA3: 2**256 - 1})
+
+        to_deploy, to_approve = await starknet.RelayerPool.get_provisioning(
+            addresses, self.TOKEN, self.SPENDER
+        )
+
+        assert to_deploy == [3]
+        assert to_approve == [1, 2]
+        assert len(rpc_stub.payloads) == 1
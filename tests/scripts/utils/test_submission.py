@@ -0,0 +1,195 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from kakarot_scripts.utils.submission import (
+    TXN_HASH_NOT_FOUND,
+    JsonRpcError,
+    ReceiptPoller,
+    SubmissionQueue,
+    TransactionRejectedError,
+    batch_request,
+)
+from tests.scripts.conftest import StubRpcError
+
+
+@pytest.fixture
+def receipts(rpc_stub):
+    """
+    Receipts served by the stub starknet_getTransactionReceipt, keyed by transaction hash.
+    """
+    receipts = {}
+
+    def _get_transaction_receipt(transaction_hash):
+        if int(transaction_hash, 16) not in receipts:
+            raise StubRpcError(TXN_HASH_NOT_FOUND, "Transaction hash not found")
+        return receipts[int(transaction_hash, 16)]
+
+    rpc_stub.handlers["starknet_getTransactionReceipt"] = _get_transaction_receipt
+    return receipts
+
+
+@pytest.fixture
+async def receipt_poller(rpc_stub):
+    """
+    Return a factory of ReceiptPoller sending to the stub, all stopped at the end of the test.
+    """
+    pollers = []
+
+    def _receipt_poller(**kwargs) -> ReceiptPoller:
+        poller = ReceiptPoller(rpc_stub.url, **kwargs)
+        pollers.append(poller)
+        return poller
+
+    yield _receipt_poller
+    for poller in pollers:
+        await poller.stop()
+
+
+class TestBatchRequest:
+    async def test_should_send_all_calls_in_a_single_request(self, rpc_stub):
+        def _fail():
+            raise StubRpcError(20, "Contract not found")
+
+        rpc_stub.handlers["double"] = lambda x: 2 * x
+        rpc_stub.handlers["fail"] = _fail
+
+        results = await batch_request(
+            rpc_stub.url, [("double", [1]), ("fail", []), ("double", {"x": 3})]
+        )
+
+        assert len(rpc_stub.payloads) == 1
+        assert results[0] == 2
+        assert isinstance(results[1], JsonRpcError)
+        assert results[1].code == 20
+        assert results[2] == 6
+
+
+class TestReceiptPoller:
+    async def test_should_poll_all_pending_receipts_in_batches(
+        self, rpc_stub, receipts, receipt_poller
+    ):
+        poller = receipt_poller(interval=0.01, batch_size=2)
+        receipts.update({tx_hash: {"hash": hex(tx_hash)} for tx_hash in range(1, 6)})
+
+        results = await asyncio.gather(*[poller.wait(i) for i in range(1, 6)])
+
+        assert results == [{"hash": hex(i)} for i in range(1, 6)]
+        assert len(rpc_stub.calls) == 5
+        assert sorted(len(payload) for payload in rpc_stub.payloads) == [1, 2, 2]
+
+    async def test_should_wait_until_receipt_is_available(
+        self, receipts, receipt_poller
+    ):
+        poller = receipt_poller(interval=0.01)
+        waiter = asyncio.ensure_future(poller.wait(0xABC))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        receipts[0xABC] = {"status": "ok"}
+
+        assert await waiter == {"status": "ok"}
+
+    async def test_should_parse_receipts(self, receipts, receipt_poller):
+        poller = receipt_poller(interval=0.01, parse=lambda receipt: receipt["value"])
+        receipts[1] = {"value": 42}
+
+        assert await poller.wait(1) == 42
+
+    @pytest.mark.usefixtures("receipts")
+    async def test_should_time_out(self, receipt_poller):
+        poller = receipt_poller(interval=0.01, timeout=0.05)
+
+        with pytest.raises(TimeoutError, match="No receipt for"):
+            await poller.wait(0xDEAD)
+
+    @pytest.mark.usefixtures("receipts")
+    async def test_should_fail_fast_on_rejected_transactions(
+        self, rpc_stub, receipt_poller
+    ):
+        rpc_stub.handlers["starknet_getTransactionStatus"] = lambda transaction_hash: {
+            "finality_status": (
+                "REJECTED" if transaction_hash == hex(0xBAD) else "RECEIVED"
+            )
+        }
+        poller = receipt_poller(interval=0.01, timeout=10)
+        pending = asyncio.ensure_future(poller.wait(0x600D))
+
+        with pytest.raises(TransactionRejectedError, match="rejected"):
+            await asyncio.wait_for(poller.wait(0xBAD), timeout=1)
+        assert not pending.done()
+
+    async def test_stop_should_cancel_polling_and_waiters(
+        self, rpc_stub, receipts, receipt_poller
+    ):
+        poller = receipt_poller(interval=0.01)
+        waiter = asyncio.ensure_future(poller.wait(0xABC))
+        await asyncio.sleep(0.05)
+        task = poller._task
+
+        await poller.stop()
+
+        assert task.cancelled()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        n_calls = len(rpc_stub.calls)
+        await asyncio.sleep(0.05)
+        assert len(rpc_stub.calls) == n_calls
+
+        receipts[0xABC] = {"status": "ok"}
+        assert await poller.wait(0xABC) == {"status": "ok"}
+
+
+class TestSubmissionQueue:
+    async def test_should_bound_outstanding_transactions_per_account(self):
+        queue = SubmissionQueue(depth=2)
+        accounts = [SimpleNamespace(address=address) for address in (1, 2)]
+        outstanding = {account.address: 0 for account in accounts}
+        max_outstanding = {account.address: 0 for account in accounts}
+
+        def transaction(account, value):
+            async def _send_and_wait():
+                outstanding[account.address] += 1
+                max_outstanding[account.address] = max(
+                    max_outstanding[account.address], outstanding[account.address]
+                )
+                await asyncio.sleep(0.01)
+                outstanding[account.address] -= 1
+                return value
+
+            return _send_and_wait
+
+        futures = [
+            queue.submit(account, transaction(account, (account.address, i)))
+            for i in range(6)
+            for account in accounts
+        ]
+
+        assert await asyncio.gather(*futures) == [
+            (account.address, i) for i in range(6) for account in accounts
+        ]
+        assert max_outstanding == {1: 2, 2: 2}
+
+    async def test_should_start_transactions_in_submission_order(self):
+        queue = SubmissionQueue(depth=3)
+        account = SimpleNamespace(address=1)
+        started, done = [], []
+
+        def transaction(i):
+            async def _send_and_wait():
+                # Transactions waiting for a slot start once depth earlier ones are done.
+                assert len(done) >= i - queue.depth + 1
+                started.append(i)
+                # The first ones take the longest: they are done out of order.
+                await asyncio.sleep(0.001 * (10 - i))
+                done.append(i)
+
+            return _send_and_wait
+
+        await asyncio.gather(
+            *[queue.submit(account, transaction(i)) for i in range(10)]
+        )
+
+        assert done != list(range(10))
+        assert started == list(range(10))
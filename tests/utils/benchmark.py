@@ -0,0 +1,132 @@
+"""
+Offline benchmarks of cairo_run.
+
+The cairo_run fixture reports every run to the recorders being measured, e.g.:
+
+    with benchmarks.measure("SolmateERC20.transfer"):
+        erc20.transfer(OTHER, amount, origin=int(OWNER, 16))
+
+The `tracked_resources` recorder works the same way, measuring each test by its node id when the
+tests are run with --track-resources.
+"""
+
+import json
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+
+@dataclass
+class BenchmarkRecord:
+    name: str
+    steps: int
+    memory_holes: int
+    builtins: Dict[str, int]
+    wall_time: float
+    gas: Optional[int] = None
+    entrypoint: Optional[str] = None
+
+
+# Recorders currently measuring, in the order their measure() was entered.
+_active_recorders: List["BenchmarkRecorder"] = []
+
+
+class BenchmarkRecorder:
+    def __init__(self):
+        self.records: List[BenchmarkRecord] = []
+        self._name: Optional[str] = None
+
+    @contextmanager
+    def measure(self, name: str):
+        previous, self._name = self._name, name
+        _active_recorders.append(self)
+        try:
+            yield
+        finally:
+            _active_recorders.remove(self)
+            self._name = previous
+
+    @property
+    def active(self) -> bool:
+        return self._name is not None
+
+    def record(
+        self,
+        runner,
+        wall_time: float,
+        gas: Optional[int] = None,
+        entrypoint: Optional[str] = None,
+    ):
+        """
+        Record the resources of an ended run, if a benchmark is being measured.
+        """
+        if not self.active:
+            return
+
+        resources = runner.get_execution_resources()
+        self.records.append(
+            BenchmarkRecord(
+                name=self._name,
+                steps=resources.n_steps,
+                memory_holes=resources.n_memory_holes,
+                builtins={
+                    name.replace("_builtin", ""): count
+                    for name, count in resources.builtin_instance_counter.items()
+                    if count
+                },
+                wall_time=wall_time,
+                gas=gas,
+                entrypoint=entrypoint,
+            )
+        )
+
+    def to_list(self) -> List[dict]:
+        return [asdict(record) for record in self.records]
+
+    def dump(self, path: Union[str, Path]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_list()))
+        self.records.clear()
+
+
+def is_recording() -> bool:
+    return len(_active_recorders) > 0
+
+
+def record_run(
+    runner,
+    wall_time: float,
+    gas: Optional[int] = None,
+    entrypoint: Optional[str] = None,
+):
+    """
+    Record the resources of an ended run in all the recorders being measured.
+    """
+    for recorder in set(_active_recorders):
+        recorder.record(runner, wall_time=wall_time, gas=gas, entrypoint=entrypoint)
+
+
+def load_records(input_dir: Union[str, Path]) -> List[dict]:
+    return [
+        record
+        for path in sorted(Path(input_dir).glob("*.json"))
+        for record in json.loads(path.read_text())
+    ]
+
+
+def merge_benchmarks(input_dir: Union[str, Path], output_path: Union[str, Path]):
+    """
+    Merge the per worker benchmark files into a single report sorted by benchmark name.
+    """
+    records = load_records(input_dir)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(
+        json.dumps(sorted(records, key=lambda record: record["name"]), indent=2)
+    )
+
+
+benchmarks = BenchmarkRecorder()
+tracked_resources = BenchmarkRecorder()
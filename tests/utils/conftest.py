@@ -0,0 +1,29 @@
+import pytest
+from starkware.cairo.lang.cairo_constants import DEFAULT_PRIME
+from starkware.cairo.lang.compiler.cairo_compile import compile_cairo
+from starkware.cairo.lang.vm.vm_core import VirtualMachine
+
+from tests.utils.runner_pool import RunnerPool
+
+
+@pytest.fixture
+def run_cairo():
+    """
+    Compile a cairo source and run one of its entrypoints the same way as the cairo_run fixture.
+
+    Returns the ended runner.
+    """
+
+    def _run(source: str, entrypoint: str, vm_class=VirtualMachine):
+        program = compile_cairo(
+            [(source, "source.cairo")], prime=DEFAULT_PRIME, debug_info=True
+        )
+        runner, template = RunnerPool(program).get(
+            entrypoint, layout="starknet_with_keccak", proof_mode=False
+        )
+        runner.initialize_vm(hint_locals={}, vm_class=vm_class)
+        runner.run_until_pc(template.end)
+        runner.end_run()
+        return runner
+
+    return _run
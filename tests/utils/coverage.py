@@ -1,128 +1,157 @@
 """
-Copied from cairo_coverage.
+Adapted from cairo_coverage.
+
+Executed instructions are counted in a per-program array indexed by pc offset during the run.
+The pc to file/line mapping is only computed once per program, when the report is built.
 """
 
 from collections import defaultdict
-from dataclasses import dataclass
-from typing import DefaultDict, List, Optional, Set
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
 
 from starkware.cairo.lang.compiler.instruction import Instruction
+from starkware.cairo.lang.compiler.program import Program
 from starkware.cairo.lang.vm.vm_core import VirtualMachine
 
 
 @dataclass
 class CoverageFile:
+    """
+    Line coverage of a single file, as two parallel arrays sorted by line number.
+
+    Lines with code but never executed have a hit count of 0.
+    """
+
     name: str  # Filename.
-    covered: Set[int]  # Tested lines.
-    statements: Set[int]  # Lines with code.
+    lines: List[int]  # Lines with code.
+    hits: List[int]  # Number of times each line was executed.
+
+    @property
+    def covered(self) -> Set[int]:
+        return {line for line, hits in zip(self.lines, self.hits) if hits}
+
+    @property
+    def missed(self) -> List[int]:
+        return [line for line, hits in zip(self.lines, self.hits) if not hits]
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "lines": self.lines, "hits": self.hits}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CoverageFile":
+        return cls(name=data["name"], lines=data["lines"], hits=data["hits"])
+
+
+@dataclass
+class ProgramCoverage:
+    program: Program
+    pc_hits: List[int] = field(init=False)
+    _pc_lines: Optional[Dict[int, List[Tuple[str, range]]]] = field(
+        default=None, init=False
+    )
 
     def __post_init__(self):
-        if not self.statements:
-            return
-        self.missed = sorted(list(self.statements - self.covered))
+        self.pc_hits = [0] * len(self.program.data)
+
+    @property
+    def pc_lines(self) -> Dict[int, List[Tuple[str, range]]]:
+        """Map each pc offset to the (file, lines) it comes from, including parent locations."""
+        if self._pc_lines is not None:
+            return self._pc_lines
+
+        self._pc_lines = {}
+        if self.program.debug_info is None:
+            return self._pc_lines
+
+        for (
+            pc,
+            location,
+        ) in self.program.debug_info.instruction_locations.items():
+            lines = []
+            instruct = location.inst
+            while True:
+                file = instruct.input_file.filename
+                if "autogen" not in file:  # If file is auto generated discard it.
+                    lines.append(
+                        (file, range(instruct.start_line, instruct.end_line + 1))
+                    )
+                # Continue until we have last parent location.
+                if instruct.parent_location is None:
+                    break
+                instruct = instruct.parent_location[0]
+            self._pc_lines[pc] = lines
+        return self._pc_lines
 
+    def line_hits(self) -> Dict[str, Dict[int, int]]:
+        """
+        Return the hit count of each line with code, per file.
 
-def report_runs(excluded_file: Optional[Set[str]] = None):
+        A line compiled to several instructions counts as executed as many times as its most executed instruction.
+        """
+        line_hits = defaultdict(dict)
+        for pc, lines in self.pc_lines.items():
+            hits = self.pc_hits[pc] if pc < len(self.pc_hits) else 0
+            for file, line_range in lines:
+                file_hits = line_hits[file]
+                for line in line_range:
+                    if file_hits.get(line, -1) < hits:
+                        file_hits[line] = hits
+        return line_hits
+
+
+# Keyed by id(program); the ProgramCoverage keeps a reference to the program so that ids are not reused.
+_program_coverages: Dict[int, ProgramCoverage] = {}
+
+
+def get_program_coverage(program: Program) -> ProgramCoverage:
+    coverage = _program_coverages.get(id(program))
+    if coverage is None:
+        coverage = ProgramCoverage(program)
+        _program_coverages[id(program)] = coverage
+    return coverage
+
+
+def report_runs(excluded_file: Optional[Set[str]] = None) -> List[CoverageFile]:
     if excluded_file is None:
         excluded_file = set()
-    report_dict = VmWithCoverage.covered  # Get the infos of all the covered files.
-    statements = VmWithCoverage.statements  # Get the lines of codes of each files.
-    files = sorted(
-        [
-            CoverageFile(
-                statements=set(statements[file]), covered=set(coverage), name=file
-            )
-            for file, coverage in report_dict.items()
-            if not any(excluded in file for excluded in excluded_file) and file
-        ],
-        key=lambda x: x.name,
-    )
+
+    line_hits = defaultdict(lambda: defaultdict(int))
+    for coverage in _program_coverages.values():
+        for file, hits in coverage.line_hits().items():
+            if not file or any(excluded in file for excluded in excluded_file):
+                continue
+            for line, count in hits.items():
+                line_hits[file][line] += count
+
+    files = [
+        CoverageFile(
+            name=file,
+            lines=sorted(hits),
+            hits=[hits[line] for line in sorted(hits)],
+        )
+        for file, hits in sorted(line_hits.items())
+        # Only report files that have been executed at least once.
+        if any(hits.values())
+    ]
 
     reset()
     return files
 
 
 def reset():
-    VmWithCoverage.covered.clear()
-    VmWithCoverage.statements.clear()
+    _program_coverages.clear()
 
 
 class VmWithCoverage(VirtualMachine):
-    covered: DefaultDict[str, List[int]] = defaultdict(list)
-    statements: DefaultDict[str, List[int]] = defaultdict(list)
-
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-
-        self.old_end_run = (
-            super().end_run
-        )  # Save the old end run function to wrap it afterwards.
-        self.old_run_instruction = (
-            super().run_instruction
-        )  # Save the old run instruction function to wrap it afterwards.
-        self.old_as_vm_exception = (
-            super().as_vm_exception
-        )  # Save the old vm as exception function to wrap it afterwards.
-        self.touched_pcs: List[int] = []
+        self.pc_hits = get_program_coverage(self.program).pc_hits
+        # The runner starts the vm at a pc of the program segment.
+        self.program_segment_index = self.run_context.pc.segment_index
 
     def run_instruction(self, instruction: Instruction):
-        """Save the current pc and runs the instruction."""
-        self.touched_pcs.append(self.run_context.pc.offset)
-        self.old_run_instruction(instruction=instruction)
-
-    def end_run(self):
-        """In case the run doesn't fail creates report coverage."""
-        self.old_end_run()
-        self.cover_file()
-
-    def as_vm_exception(
-        self,
-        exc,
-        with_traceback: bool = True,
-        notes: Optional[List[str]] = None,
-        hint_index: Optional[int] = None,
-    ):
-        """In case the run fails creates report coverage."""
-        self.cover_file()
-        return self.old_as_vm_exception(exc, with_traceback, notes, hint_index)
-
-    def pc_to_line(
-        self,
-        pc,
-        statements: DefaultDict[str, list],
-        report_dict: DefaultDict[str, List[int]],
-    ) -> None:
-        """Convert the touched pcs to the line numbers of the original file and saves them."""
-        should_update_report = (
-            pc in self.touched_pcs
-        )  # If the pc is not touched by the test don't report it.
-        instruct = self.program.debug_info.instruction_locations[
-            pc
-        ].inst  # First instruction in the debug info.
-        file = instruct.input_file.filename  # Current analyzed file.
-        while True:
-            if "autogen" not in file:  # If file is auto generated discard it.
-                lines = list(
-                    range(
-                        instruct.start_line,
-                        instruct.end_line + 1,
-                    )
-                )  # Get the lines touched.
-                if should_update_report:
-                    report_dict[file].extend(lines)
-                statements[file].extend(lines)
-            if (
-                instruct.parent_location is not None
-            ):  # Continue until we have last parent location.
-                instruct = instruct.parent_location[0]
-                file = instruct.input_file.filename
-            else:
-                return
-
-    def cover_file(self):
-        """Add the coverage report in the report dict and all the lines of code."""
-        if self.program.debug_info is not None:
-            report_dict = self.__class__.covered
-            statements = self.__class__.statements
-            for pc in set(self.program.debug_info.instruction_locations.keys()):
-                self.pc_to_line(pc=pc, report_dict=report_dict, statements=statements)
+        """Count the current pc and runs the instruction."""
+        pc = self.run_context.pc
+        if pc.segment_index == self.program_segment_index:
+            self.pc_hits[pc.offset] += 1
+        super().run_instruction(instruction)
@@ -0,0 +1,504 @@
+"""
+Differential execution of transactions on the cairo_zero eth_call harness and on the Cancun
+interpreter of the execution-specs, run in-process.
+
+Both sides run the same pre state and transaction in the same block environment. The outcomes are
+compared on the success of the transaction, the return data of calls, the gas used, the logs and the
+post state of the non precompile accounts (storage writes included).
+
+Cases are either derived from the parsed EF tests or randomly generated straight-line programs, see
+random_case. Both sides run legacy transactions only: EF tests of typed (EIP-2930, EIP-1559 and
+EIP-4844) transactions are skipped, as their access list and blob fields would be dropped. Each result also reports the Cairo steps and wall time of the Kakarot run next to the
+wall time of the native execution-specs run.
+
+The Cancun modules of the execution-specs are only imported by the functions running the spec side,
+so that importing this module (e.g. from the conftest) does not load them.
+"""
+
+import json
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from unittest.mock import patch
+
+import pandas as pd
+
+from tests.utils.benchmark import BenchmarkRecorder
+from tests.utils.constants import BLOCK_GAS_LIMIT, CHAIN_ID
+from tests.utils.syscall_handler import SyscallHandler, parse_state
+
+DIFFERENTIAL_RESULTS_DIR = Path("tests") / "differential" / "results"
+
+# Addresses up to 10 are the precompiles (and the default coinbase), left out of the comparison.
+MAX_PRECOMPILE_ADDRESS = 10
+
+# Errors.EXCEPTIONAL_HALT of cairo_zero/kakarot/errors.cairo, as set in evm.reverted.
+EXCEPTIONAL_HALT = 2
+# Fields of the EF tests transactions only found in typed transactions.
+TYPED_TRANSACTION_FIELDS = {
+    "accessList",
+    "maxFeePerGas",
+    "maxPriorityFeePerGas",
+    "maxFeePerBlobGas",
+    "blobVersionedHashes",
+}
+
+RANDOM_CONTRACT_ADDRESS = 0xC0DE
+RANDOM_SENDER_ADDRESS = 0x5E4D
+BINARY_OPCODES = [
+    0x01,  # ADD
+    0x02,  # MUL
+    0x03,  # SUB
+    0x04,  # DIV
+    0x05,  # SDIV
+    0x06,  # MOD
+    0x07,  # SMOD
+    0x0A,  # EXP
+    0x0B,  # SIGNEXTEND
+    0x10,  # LT
+    0x11,  # GT
+    0x12,  # SLT
+    0x13,  # SGT
+    0x14,  # EQ
+    0x16,  # AND
+    0x17,  # OR
+    0x18,  # XOR
+    0x1A,  # BYTE
+    0x1B,  # SHL
+    0x1C,  # SHR
+    0x1D,  # SAR
+]
+EDGE_VALUES = [0, 1, 2, 31, 32, 255, 256, 2**255, 2**255 - 1, 2**256 - 1]
+
+
+@dataclass
+class DifferentialCase:
+    name: str
+    # Pre state in the EF tests format, i.e. hex strings keyed by address.
+    pre: Dict[str, dict]
+    origin: int
+    to: Optional[int]
+    gas_limit: int
+    gas_price: int
+    value: int
+    data: str
+    nonce: int
+
+    @classmethod
+    def from_ef_test(cls, name: str, test_case: dict) -> Optional["DifferentialCase"]:
+        """
+        Return the case of the first transaction of the EF test, or None for a typed transaction.
+        """
+        tx = test_case["blocks"][0]["transactions"][0]
+        if int(tx.get("type", "0x0"), 16) or TYPED_TRANSACTION_FIELDS & tx.keys():
+            return None
+        return cls(
+            name=name,
+            pre=test_case["pre"],
+            origin=int(tx["sender"], 16),
+            to=int(tx["to"], 16) if tx.get("to") else None,
+            gas_limit=int(tx["gasLimit"], 16),
+            gas_price=int(tx["gasPrice"], 16),
+            value=int(tx["value"], 16),
+            data=tx["data"],
+            nonce=int(tx["nonce"], 16),
+        )
+
+
+@dataclass
+class Outcome:
+    success: bool
+    return_data: Optional[str]
+    gas_used: int
+    # (address, topics, data) of each log, with hex strings for the data.
+    logs: List[Tuple[int, Tuple[int, ...], str]]
+    state: Dict[int, dict]
+    wall_time: float
+    steps: Optional[int] = None
+
+
+@dataclass
+class DifferentialResult:
+    name: str
+    passed: bool
+    mismatches: List[str]
+    steps: Optional[int]
+    kakarot_gas: int
+    spec_gas: int
+    kakarot_time: float
+    spec_time: float
+
+
+def _push32(value: int) -> bytes:
+    return bytes([0x7F]) + value.to_bytes(32, "big")
+
+
+def _random_operand(rng: random.Random) -> int:
+    if rng.random() < 0.5:
+        return rng.choice(EDGE_VALUES)
+    return rng.getrandbits(rng.choice([8, 64, 128, 256]))
+
+
+def random_case(seed: int, index: int) -> DifferentialCase:
+    """
+    Generate a straight-line program applying random binary opcodes to edge and random operands.
+
+    The program stores its intermediate results, logs the last one and returns it.
+    """
+    rng = random.Random(f"{seed}-{index}")
+    code = b""
+    for slot in range(rng.randint(1, 4)):
+        code += _push32(_random_operand(rng))
+        for _ in range(rng.randint(1, 3)):
+            code += _push32(_random_operand(rng)) + bytes([rng.choice(BINARY_OPCODES)])
+        # SSTORE(key=slot, value=result), keeping the result on the stack.
+        code += bytes([0x80, 0x60, slot, 0x55])
+    # MSTORE(0, result); LOG1(0, 32, topic); RETURN(0, 32)
+    code += bytes([0x60, 0x00, 0x52])
+    code += _push32(rng.getrandbits(256)) + bytes([0x60, 0x20, 0x60, 0x00, 0xA1])
+    code += bytes([0x60, 0x20, 0x60, 0x00, 0xF3])
+
+    return DifferentialCase(
+        name=f"random_{seed}_{index}",
+        pre={
+            hex(RANDOM_CONTRACT_ADDRESS): {
+                "balance": "0x0",
+                "code": f"0x{code.hex()}",
+                "nonce": "0x1",
+                "storage": {},
+            },
+            hex(RANDOM_SENDER_ADDRESS): {
+                "balance": hex(10**18),
+                "code": "0x",
+                "nonce": "0x0",
+                "storage": {},
+            },
+        },
+        origin=RANDOM_SENDER_ADDRESS,
+        to=RANDOM_CONTRACT_ADDRESS,
+        gas_limit=1_000_000,
+        gas_price=10,
+        value=rng.choice([0, 1, 10**9]),
+        data="0x",
+        nonce=0,
+    )
+
+
+@contextmanager
+def kakarot_environment():
+    """
+    Patch the Kakarot block environment read by eth_call to the one used by run_spec.
+    """
+    with ExitStack() as stack:
+        stack.enter_context(SyscallHandler.patch("Kakarot_chain_id", CHAIN_ID))
+        stack.enter_context(
+            SyscallHandler.patch("Kakarot_block_gas_limit", BLOCK_GAS_LIMIT)
+        )
+        yield
+
+
+def parse_kakarot_state(state: dict) -> Dict[int, dict]:
+    """
+    Return the accounts of a serialized eth_call state in the parse_state format, without the
+    precompiles and the zero storage slots.
+    """
+    return {
+        int(address, 16): {
+            "balance": int(account["balance"], 16),
+            "code": account["code"],
+            "nonce": account["nonce"],
+            "storage": {
+                key: int(value, 16)
+                for key, value in account["storage"].items()
+                if int(value, 16) > 0
+            },
+        }
+        for address, account in state["accounts"].items()
+        if int(address, 16) > MAX_PRECOMPILE_ADDRESS
+    }
+
+
+def _without_empty_accounts(state: Dict[int, dict]) -> Dict[int, dict]:
+    # Empty accounts do not exist (EIP-161), whether they were touched or not.
+    return {
+        address: account
+        for address, account in state.items()
+        if account["nonce"]
+        or account["balance"]
+        or account["code"]
+        or account["storage"]
+    }
+
+
+def _parse_kakarot_event(event: dict) -> Tuple[int, Tuple[int, ...], str]:
+    # The first key is the emitting EVM address, followed by the (low, high) limbs of each topic.
+    keys = (event["topics"] or [])[: event["topics_len"]]
+    topics = tuple(low + (high << 128) for low, high in zip(keys[1::2], keys[2::2]))
+    data = (event["data"] or [])[: event["data_len"]]
+    return keys[0], topics, bytes(data).hex()
+
+
+def run_kakarot(cairo_run, case: DifferentialCase) -> Outcome:
+    recorder = BenchmarkRecorder()
+    with (
+        kakarot_environment(),
+        SyscallHandler.patch_state(parse_state(case.pre)),
+        recorder.measure(case.name),
+    ):
+        evm, state, gas_used, _ = cairo_run(
+            "eth_call",
+            origin=case.origin,
+            to=case.to,
+            gas_limit=case.gas_limit,
+            gas_price=case.gas_price,
+            value=case.value,
+            data=case.data,
+            nonce=case.nonce,
+        )
+
+    # On exceptional halts, Kakarot returns its error message where the EVM returns nothing.
+    return_data = (
+        bytes(evm["return_data"]).hex() if evm["reverted"] != EXCEPTIONAL_HALT else ""
+    )
+    return Outcome(
+        success=not evm["reverted"],
+        return_data=return_data if case.to is not None else None,
+        gas_used=gas_used,
+        logs=[_parse_kakarot_event(event) for event in state["events"]],
+        # Accounts not loaded during the run are left untouched.
+        state=_without_empty_accounts(
+            {
+                **{
+                    address: account
+                    for address, account in parse_state(case.pre).items()
+                    if address > MAX_PRECOMPILE_ADDRESS
+                },
+                **parse_kakarot_state(state),
+            }
+        ),
+        wall_time=sum(record.wall_time for record in recorder.records),
+        steps=sum(record.steps for record in recorder.records),
+    )
+
+
+def _spec_state(pre: Dict[str, dict]):
+    """
+    Return the execution-specs State of the given pre state.
+    """
+    from ethereum.base_types import U256, Uint
+    from ethereum.cancun.fork_types import Account, Address
+    from ethereum.cancun.state import State, set_account, set_storage
+
+    state = State()
+    for address, account in pre.items():
+        address = Address(int(address, 16).to_bytes(20, "big"))
+        set_account(
+            state,
+            address,
+            Account(
+                nonce=Uint(int(account["nonce"], 16)),
+                balance=U256(int(account["balance"], 16)),
+                code=bytes.fromhex(account["code"].replace("0x", "")),
+            ),
+        )
+        for key, value in account["storage"].items():
+            set_storage(
+                state, address, U256(int(key, 16)).to_be_bytes32(), U256(int(value, 16))
+            )
+    return state
+
+
+def _spec_post_state(state) -> Dict[int, dict]:
+    post = {}
+    for address, account in state._main_trie._data.items():
+        storage = state._storage_tries.get(address)
+        post[f"0x{address.hex()}"] = {
+            "balance": hex(account.balance),
+            "code": f"0x{account.code.hex()}",
+            "nonce": hex(account.nonce),
+            "storage": {
+                f"0x{key.hex()}": hex(value)
+                for key, value in (storage._data.items() if storage else [])
+                if value > 0
+            },
+        }
+    return _without_empty_accounts(
+        {
+            address: account
+            for address, account in parse_state(post).items()
+            if address > MAX_PRECOMPILE_ADDRESS
+        }
+    )
+
+
+def run_spec(case: DifferentialCase) -> Outcome:
+    from ethereum.base_types import U64, U256, Bytes0, Bytes32, Uint
+    from ethereum.cancun import fork
+    from ethereum.cancun.fork_types import Address
+    from ethereum.cancun.state import TransientStorage
+    from ethereum.cancun.transactions import LegacyTransaction
+    from ethereum.cancun.vm import Environment, interpreter
+
+    state = _spec_state(case.pre)
+    env = Environment(
+        caller=Address(case.origin.to_bytes(20, "big")),
+        block_hashes=[],
+        origin=Address(case.origin.to_bytes(20, "big")),
+        coinbase=Address(bytes(20)),
+        number=Uint(SyscallHandler.block_number),
+        base_fee_per_gas=Uint(0),
+        gas_limit=Uint(BLOCK_GAS_LIMIT),
+        gas_price=Uint(case.gas_price),
+        time=U256(SyscallHandler.block_timestamp),
+        prev_randao=Bytes32(bytes(32)),
+        state=state,
+        chain_id=U64(CHAIN_ID),
+        traces=[],
+        excess_blob_gas=U64(0),
+        blob_versioned_hashes=(),
+        transient_storage=TransientStorage(),
+    )
+    tx = LegacyTransaction(
+        nonce=U256(case.nonce),
+        gas_price=Uint(case.gas_price),
+        gas=Uint(case.gas_limit),
+        to=(
+            Address(case.to.to_bytes(20, "big")) if case.to is not None else Bytes0(b"")
+        ),
+        value=U256(case.value),
+        data=bytes.fromhex(case.data.replace("0x", "")),
+        v=U256(0),
+        r=U256(0),
+        s=U256(0),
+    )
+
+    # process_transaction does not expose the return data: keep the output of the top level frame.
+    outputs = []
+    process_message = interpreter.process_message
+
+    def _process_message(message, env):
+        evm = process_message(message, env)
+        if message.depth == 0:
+            outputs.append(evm.output)
+        return evm
+
+    start = time.perf_counter()
+    with patch.object(interpreter, "process_message", _process_message):
+        gas_used, logs, error = fork.process_transaction(env, tx)
+    wall_time = time.perf_counter() - start
+
+    return Outcome(
+        success=error is None,
+        return_data=(
+            bytes(outputs[-1]).hex() if case.to is not None and outputs else None
+        ),
+        gas_used=int(gas_used),
+        logs=[
+            (
+                int.from_bytes(log.address, "big"),
+                tuple(int.from_bytes(topic, "big") for topic in log.topics),
+                bytes(log.data).hex(),
+            )
+            for log in logs
+        ],
+        state=_spec_post_state(state),
+        wall_time=wall_time,
+    )
+
+
+def compare_outcomes(kakarot: Outcome, spec: Outcome) -> List[str]:
+    """
+    Return a description of each difference between the two outcomes.
+    """
+    mismatches = []
+    if kakarot.success != spec.success:
+        mismatches.append(f"success: {kakarot.success} != {spec.success}")
+    if kakarot.return_data != spec.return_data:
+        mismatches.append(
+            f"return data: 0x{kakarot.return_data} != 0x{spec.return_data}"
+        )
+    if kakarot.gas_used != spec.gas_used:
+        mismatches.append(f"gas used: {kakarot.gas_used} != {spec.gas_used}")
+    if kakarot.logs != spec.logs:
+        mismatches.append(f"logs: {kakarot.logs} != {spec.logs}")
+    for address in sorted(kakarot.state.keys() | spec.state.keys()):
+        ours, theirs = kakarot.state.get(address), spec.state.get(address)
+        if ours is None or theirs is None:
+            mismatches.append(
+                f"account 0x{address:040x}: "
+                f"{'missing' if ours is None else 'present'} in kakarot, "
+                f"{'missing' if theirs is None else 'present'} in spec"
+            )
+            continue
+        for name in ("balance", "nonce", "code"):
+            if ours[name] != theirs[name]:
+                mismatches.append(
+                    f"account 0x{address:040x} {name}: {ours[name]} != {theirs[name]}"
+                )
+        for key in sorted(ours["storage"].keys() | theirs["storage"].keys()):
+            if ours["storage"].get(key, 0) != theirs["storage"].get(key, 0):
+                mismatches.append(
+                    f"account 0x{address:040x} storage {hex(key)}: "
+                    f"{ours['storage'].get(key, 0)} != {theirs['storage'].get(key, 0)}"
+                )
+    return mismatches
+
+
+@dataclass
+class DifferentialResults:
+    """
+    Results of the differential cases run in the current process.
+    """
+
+    results: List[DifferentialResult] = field(default_factory=list)
+
+    def run(self, cairo_run, case: DifferentialCase) -> DifferentialResult:
+        spec = run_spec(case)
+        kakarot = run_kakarot(cairo_run, case)
+        mismatches = compare_outcomes(kakarot, spec)
+        result = DifferentialResult(
+            name=case.name,
+            passed=not mismatches,
+            mismatches=mismatches,
+            steps=kakarot.steps,
+            kakarot_gas=kakarot.gas_used,
+            spec_gas=spec.gas_used,
+            kakarot_time=kakarot.wall_time,
+            spec_time=spec.wall_time,
+        )
+        self.results.append(result)
+        return result
+
+    def dump(self, path: Union[str, Path]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps([asdict(result) for result in self.results]))
+        self.results.clear()
+
+
+def merge_differential_results(
+    input_dir: Union[str, Path], output_path: Union[str, Path]
+) -> pd.DataFrame:
+    """
+    Merge the per worker results into a single csv with one row per case.
+
+    The slowdown column is the wall time of the Kakarot run over the one of the native run.
+    """
+    rows = [
+        {**result, "mismatches": "; ".join(result["mismatches"])}
+        for path in sorted(Path(input_dir).glob("*.json"))
+        for result in json.loads(path.read_text())
+    ]
+    results = pd.DataFrame(rows).sort_values("name") if rows else pd.DataFrame()
+    if not results.empty:
+        results["slowdown"] = results.kakarot_time / results.spec_time
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(output_path, index=False)
+    return results
+
+
+differential_results = DifferentialResults()
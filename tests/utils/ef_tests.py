@@ -0,0 +1,450 @@
+"""
+Run the parsed EF BlockchainTests/GeneralStateTests (see kakarot_scripts.ef_tests.fetch and
+kakarot_scripts.ef_tests.store) on the cairo_zero harness.
+
+Parsed tests are named {folder}_{test name}, with folder the directory of the original fixture file,
+except the Pyspecs tests that keep their own name. The blockchain-tests-skip.yml file uses the same
+folders, as stored with each test, and the sanitized names of the ef-tests runner for the Pyspecs
+tests.
+
+Results can be cached, keyed by the hash of the test case and the layout. A cached result also
+stores the hash of each region of the program (the code between two labels) that the test accessed:
+it is replayed as long as none of these regions changed, so that editing an opcode handler only
+reruns the tests that reach it.
+"""
+
+import json
+import os
+import re
+import shutil
+from bisect import bisect_right
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+import yaml
+from starkware.cairo.lang.compiler.identifier_definition import (
+    FunctionDefinition,
+    LabelDefinition,
+)
+from starkware.cairo.lang.vm.relocatable import RelocatableValue
+from starkware.cairo.lang.vm.vm_core import VirtualMachine
+
+from kakarot_scripts.constants import BUILD_DIR
+from kakarot_scripts.ef_tests.store import EF_TESTS_STORE_PATH, EFTestStore
+from tests.utils.benchmark import BenchmarkRecord, BenchmarkRecorder
+
+SKIP_LIST_PATH = Path("blockchain-tests-skip.yml")
+EF_TESTS_RESULTS_DIR = Path("tests") / "ef_tests" / "results"
+EF_TESTS_CACHE_DIR = BUILD_DIR / "cache" / "ef_tests"
+
+
+def sanitize_test_name(name: str) -> str:
+    """
+    Return the name given by the ef-tests runner to a Pyspecs test, e.g.
+    test_modexp[fork_Cancun-blockchain_test-EIP-198-case1] becomes
+    modexp__fork_Cancun_minus_blockchain_test_minus_EIP_minus_198_minus_case1.
+    """
+    return (
+        name.removeprefix("test_")
+        .replace("[", "__")
+        .replace("]", "")
+        .replace("-", "_minus_")
+    )
+
+
+@dataclass
+class SkipList:
+    directories: Set[str] = field(default_factory=set)
+    # folder -> file names without extension
+    filenames: Dict[str, Set[str]] = field(default_factory=dict)
+    testnames: Dict[str, Set[str]] = field(default_factory=dict)
+    regexes: Dict[str, List[re.Pattern]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = SKIP_LIST_PATH) -> "SkipList":
+        content = yaml.safe_load(Path(path).read_text()) or {}
+        return cls(
+            directories=set(content.get("directories") or []),
+            filenames={
+                folder: {Path(name).stem for name in names or []}
+                for folder, names in (content.get("filename") or {}).items()
+            },
+            testnames={
+                folder: set(names or [])
+                for folder, names in (content.get("testname") or {}).items()
+            },
+            regexes={
+                folder: [re.compile(regex) for regex in regexes or []]
+                for folder, regexes in (content.get("regex") or {}).items()
+            },
+        )
+
+    @property
+    def folders(self) -> Set[str]:
+        return (
+            self.directories
+            | set(self.filenames)
+            | set(self.testnames)
+            | set(self.regexes)
+        )
+
+    def split(self, test_id: str) -> Tuple[Optional[str], str]:
+        """
+        Split a parsed test id into its folder and test name, for the folders of the skip list.
+        """
+        for folder in sorted(self.folders, key=len, reverse=True):
+            if test_id.startswith(f"{folder}_"):
+                return folder, test_id[len(folder) + 1 :]
+        return None, test_id
+
+    def is_skipped(self, test_id: str, folder: Optional[str] = None) -> bool:
+        """
+        Return whether the test is skipped; its folder is taken from the test id when not given,
+        which does not work for the Pyspecs tests.
+        """
+        if folder is None:
+            folder, name = self.split(test_id)
+        else:
+            name = test_id.removeprefix(f"{folder}_")
+        if folder is None:
+            return False
+        if folder in self.directories:
+            return True
+
+        names = {name, sanitize_test_name(name)}
+        if names & self.testnames.get(folder, set()):
+            return True
+        if any(
+            name.startswith(f"{filename}_")
+            for filename in self.filenames.get(folder, set())
+        ):
+            return True
+        return any(
+            regex.fullmatch(candidate)
+            for regex in self.regexes.get(folder, [])
+            for candidate in names
+        )
+
+
+@lru_cache()
+def get_ef_tests_store() -> Optional[EFTestStore]:
+    """
+    Return the store of the parsed EF tests, opened once per process, or None if not fetched.
+    """
+    if not EF_TESTS_STORE_PATH.exists():
+        return None
+    return EFTestStore(EF_TESTS_STORE_PATH)
+
+
+def collect_ef_tests(
+    pattern: str = "*", skip_list: Optional[SkipList] = None
+) -> List[str]:
+    """
+    Return the names of the parsed EF tests matching the glob pattern and not skipped, sorted.
+    """
+    store = get_ef_tests_store()
+    if store is None:
+        return []
+    if skip_list is None:
+        skip_list = SkipList.load() if SKIP_LIST_PATH.exists() else SkipList()
+    return [
+        name
+        for name, folder in store.folders(pattern).items()
+        if not skip_list.is_skipped(name, folder)
+    ]
+
+
+@dataclass
+class ProgramRegions:
+    """
+    The code of a program split at each function and label, with the hash of each region.
+    """
+
+    starts: List[int]
+    names: List[str]
+    hashes: Dict[str, str]
+    program_hash: str
+
+    def accessed(self, offsets: Iterable[int]) -> Dict[str, str]:
+        """
+        Return the hashes of the regions containing the given pc offsets, keyed by region name.
+        """
+        indexes = {bisect_right(self.starts, offset) - 1 for offset in offsets}
+        return {
+            self.names[index]: self.hashes[self.names[index]]
+            for index in indexes
+            if index >= 0
+        }
+
+
+# Keyed by id(program); the program is kept alive so that ids are not reused.
+_program_regions: Dict[int, Tuple[object, ProgramRegions]] = {}
+
+
+def get_program_regions(program) -> ProgramRegions:
+    if id(program) in _program_regions:
+        return _program_regions[id(program)][1]
+
+    names_by_pc: Dict[int, str] = {0: "<program>"}
+    for name, identifier in program.identifiers.as_dict().items():
+        if isinstance(identifier, (FunctionDefinition, LabelDefinition)):
+            current = names_by_pc.get(identifier.pc)
+            if current is None or current == "<program>" or str(name) < current:
+                names_by_pc[identifier.pc] = str(name)
+
+    starts = sorted(names_by_pc)
+    names = [names_by_pc[start] for start in starts]
+    hashes = {}
+    for start, end, name in zip(starts, starts[1:] + [len(program.data)], names):
+        content = {
+            "data": program.data[start:end],
+            "hints": {
+                pc: [hint.code for hint in program.hints[pc]]
+                for pc in range(start, end)
+                if pc in program.hints
+            },
+        }
+        hashes[name] = sha256(json.dumps(content).encode()).hexdigest()
+
+    regions = ProgramRegions(
+        starts=starts,
+        names=names,
+        hashes=hashes,
+        program_hash=sha256(
+            "".join(hashes[name] for name in names).encode()
+        ).hexdigest(),
+    )
+    _program_regions[id(program)] = (program, regions)
+    return regions
+
+
+class VmWithProgramAccesses(VirtualMachine):
+    """
+    Record the pc offsets of the program executed or read by the run.
+
+    VirtualMachine.accessed_addresses cannot be used as it contains the whole program from the start.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.program_accesses: Set[int] = set()
+        # The runner starts the vm at a pc of the program segment.
+        self.program_accesses_segment_index = self.run_context.pc.segment_index
+
+    def compute_operands(self, instruction):
+        operands, operands_mem_addresses = super().compute_operands(instruction)
+        pc = self.run_context.pc
+        # Operands read from the program segment are either the immediate of the instruction or
+        # data read through a label, e.g. a dw table.
+        for address in (pc, *operands_mem_addresses):
+            if (
+                isinstance(address, RelocatableValue)
+                and address.segment_index == self.program_accesses_segment_index
+            ):
+                self.program_accesses.add(address.offset)
+        return operands, operands_mem_addresses
+
+
+class ProgramAccessRecorder(BenchmarkRecorder):
+    """
+    Also record the pc offsets of the program accessed (executed or read) by the runs.
+
+    Only runs made with a VmWithProgramAccesses can be attributed to the program.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.program = None
+        self.accessed_offsets: Set[int] = set()
+
+    def record(
+        self,
+        runner,
+        wall_time: float,
+        gas: Optional[int] = None,
+        entrypoint: Optional[str] = None,
+    ):
+        if not self.active:
+            return
+
+        super().record(runner, wall_time=wall_time, gas=gas, entrypoint=entrypoint)
+        if not isinstance(runner.vm, VmWithProgramAccesses):
+            return
+        self.program = runner.program
+        self.accessed_offsets.update(runner.vm.program_accesses)
+
+
+@dataclass
+class EFTestResult:
+    name: str
+    passed: bool
+    error: Optional[str]
+    runs: List[BenchmarkRecord]
+
+
+class EFTestsCache:
+    """
+    On-disk cache of EF tests results, shared between pytest sessions and xdist workers.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = EF_TESTS_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def key(test_case: str, layout: str) -> str:
+        return sha256(f"{layout}:{test_case}".encode()).hexdigest()
+
+    def get(self, key: str, program) -> Optional[EFTestResult]:
+        """
+        Return the cached result if none of the program regions it accessed changed.
+        """
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        try:
+            entry = json.loads(path.read_text())
+        except json.JSONDecodeError:
+            return None
+
+        regions = get_program_regions(program)
+        if entry["program_hash"] != regions.program_hash and any(
+            regions.hashes.get(name) != region_hash
+            for name, region_hash in entry["regions"].items()
+        ):
+            return None
+        return EFTestResult(
+            name=entry["name"],
+            passed=entry["passed"],
+            error=entry["error"],
+            runs=[BenchmarkRecord(**run) for run in entry["runs"]],
+        )
+
+    def set(self, key: str, result: EFTestResult, recorder: ProgramAccessRecorder):
+        # A test failing before any cairo run, or run without recording the program accesses,
+        # cannot be attributed to the program.
+        if recorder.program is None:
+            return
+
+        regions = get_program_regions(recorder.program)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    **asdict(result),
+                    "program_hash": regions.program_hash,
+                    "regions": regions.accessed(recorder.accessed_offsets),
+                }
+            )
+        )
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class EFTestResults:
+    """
+    Verdict and resources of the EF tests run in the current process.
+    """
+
+    def __init__(self):
+        self.results: List[EFTestResult] = []
+        self.cache: Optional[EFTestsCache] = None
+
+    def replay(self, key: str, program) -> bool:
+        """
+        Replay the cached result of a test, if any: return True for a cached success and raise the
+        cached error for a cached failure.
+        """
+        if self.cache is None:
+            return False
+        result = self.cache.get(key, program)
+        if result is None:
+            return False
+
+        self.results.append(result)
+        if not result.passed:
+            raise AssertionError(f"(cached) {result.error}")
+        return True
+
+    @contextmanager
+    def run(self, name: str, key: Optional[str] = None):
+        """
+        Record the verdict of the test and the resources of the cairo runs made in the context.
+
+        When a cache key is given and caching is enabled, the result is also cached.
+        """
+        recorder = ProgramAccessRecorder()
+        try:
+            with recorder.measure(name):
+                yield
+        except Exception as e:
+            result = EFTestResult(
+                name, False, f"{type(e).__name__}: {e}", recorder.records
+            )
+            self._add(result, key, recorder)
+            raise
+        self._add(EFTestResult(name, True, None, recorder.records), key, recorder)
+
+    def _add(self, result: EFTestResult, key: Optional[str], recorder):
+        self.results.append(result)
+        if self.cache is not None and key is not None:
+            self.cache.set(key, result, recorder)
+
+    def dump(self, path: Union[str, Path]):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps([asdict(result) for result in self.results]))
+        self.results.clear()
+
+
+def merge_ef_tests_results(
+    input_dir: Union[str, Path], output_path: Union[str, Path]
+) -> pd.DataFrame:
+    """
+    Merge the per worker results into a single csv with one row per test.
+
+    Resources are summed over the cairo runs of each test.
+    """
+    rows = []
+    for path in sorted(Path(input_dir).glob("*.json")):
+        for result in json.loads(path.read_text()):
+            builtins: Dict[str, int] = {}
+            for run in result["runs"]:
+                for name, count in run["builtins"].items():
+                    builtins[name] = builtins.get(name, 0) + count
+            rows.append(
+                {
+                    "test": result["name"],
+                    "passed": result["passed"],
+                    "error": result["error"],
+                    "steps": sum(run["steps"] for run in result["runs"]),
+                    "memory_holes": sum(run["memory_holes"] for run in result["runs"]),
+                    "wall_time": sum(run["wall_time"] for run in result["runs"]),
+                    "gas": next(
+                        (
+                            run["gas"]
+                            for run in result["runs"]
+                            if run["gas"] is not None
+                        ),
+                        None,
+                    ),
+                    **builtins,
+                }
+            )
+
+    results = pd.DataFrame(rows).sort_values("test") if rows else pd.DataFrame()
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(output_path, index=False)
+    return results
+
+
+ef_tests_results = EFTestResults()
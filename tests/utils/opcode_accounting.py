@@ -0,0 +1,139 @@
+"""
+Per EVM opcode accounting of the Cairo resources used by Interpreter.exec_opcode.
+
+exec_opcode dispatches with a `jmp rel` into a jump table of 256 `call <handler>; jmp end;` entries
+(4 felts each) ending at the `end` label. Reaching the call of entry n means that opcode n is
+executed; the handler is done when the `jmp end` right after it is reached with the same fp.
+Both at the call and at the `jmp end`, the builtin pointers are at [ap - 7], [ap - 6] and [ap - 5].
+"""
+
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from starkware.cairo.lang.compiler.identifier_definition import LabelDefinition
+from starkware.cairo.lang.compiler.instruction import Instruction
+from starkware.cairo.lang.vm.vm_core import VirtualMachine
+
+from tests.utils.constants import Opcodes
+from tests.utils.serde import get_program_index
+
+JUMP_TABLE_SIZE = 256
+JUMP_TABLE_ENTRY_SIZE = 4
+CALL_INSTRUCTION_SIZE = 2
+
+# Offsets from ap of the builtin pointers passed to and returned by the opcode handlers.
+BUILTINS_AP_OFFSETS = {"pedersen": 7, "range_check": 6, "bitwise": 5}
+
+# Keyed by id(program); the program is kept alive so that ids are not reused.
+_jump_tables: Dict[int, Tuple[object, Dict[int, int]]] = {}
+
+
+def get_jump_table(program) -> Dict[int, int]:
+    """
+    Return the pc offsets of the calls of the exec_opcode jump table, mapped to their opcode number.
+
+    Programs that do not include the interpreter get an empty table.
+    """
+    if id(program) in _jump_tables:
+        return _jump_tables[id(program)][1]
+
+    try:
+        end = get_program_index(program).get_identifier(
+            "Interpreter.exec_opcode.end", LabelDefinition
+        )
+    except ValueError:
+        table = {}
+    else:
+        start = end.pc - JUMP_TABLE_SIZE * JUMP_TABLE_ENTRY_SIZE
+        table = {
+            start + opcode * JUMP_TABLE_ENTRY_SIZE: opcode
+            for opcode in range(JUMP_TABLE_SIZE)
+        }
+    _jump_tables[id(program)] = (program, table)
+    return table
+
+
+def opcode_name(opcode: int) -> str:
+    try:
+        return Opcodes(opcode).name
+    except ValueError:
+        return f"0x{opcode:02x}"
+
+
+class VmWithOpcodeAccounting(VirtualMachine):
+    """
+    Accumulate, for each EVM opcode, its number of executions, Cairo steps and builtin usage.
+
+    Resources are inclusive: an opcode handler running a nested exec_opcode is accounted for the
+    whole nested execution as well.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.jump_table = get_jump_table(self.program)
+        # The runner starts the vm at a pc of the program segment.
+        self.jump_table_segment_index = self.run_context.pc.segment_index
+        # opcode -> [executions, steps, *builtins]
+        self.opcode_resources: Dict[int, List[int]] = {}
+        self._pending_opcodes: List[tuple] = []
+
+    def _builtin_pointers(self) -> list:
+        ap = self.run_context.ap
+        return [
+            self.run_context.memory.get(ap - offset)
+            for offset in BUILTINS_AP_OFFSETS.values()
+        ]
+
+    def run_instruction(self, instruction: Instruction):
+        pc = self.run_context.pc
+        if self.jump_table and pc.segment_index == self.jump_table_segment_index:
+            opcode = self.jump_table.get(pc.offset)
+            if opcode is not None:
+                self._pending_opcodes.append(
+                    (
+                        opcode,
+                        pc.offset + CALL_INSTRUCTION_SIZE,
+                        self.run_context.fp,
+                        self.current_step,
+                        self._builtin_pointers(),
+                    )
+                )
+            elif (
+                self._pending_opcodes
+                and self._pending_opcodes[-1][1] == pc.offset
+                and self._pending_opcodes[-1][2] == self.run_context.fp
+            ):
+                self._account(*self._pending_opcodes.pop())
+        super().run_instruction(instruction)
+
+    def _account(self, opcode, _return_pc, _fp, start_step, start_pointers):
+        resources = self.opcode_resources.setdefault(
+            opcode, [0] * (2 + len(BUILTINS_AP_OFFSETS))
+        )
+        resources[0] += 1
+        resources[1] += self.current_step - start_step
+        for i, (start, end) in enumerate(zip(start_pointers, self._builtin_pointers())):
+            try:
+                resources[2 + i] += end - start
+            except TypeError:
+                # Builtin not used by the layout, or pointer not written.
+                continue
+
+
+def opcode_report(opcode_resources: Dict[int, List[int]]) -> pd.DataFrame:
+    """
+    Return one row per executed opcode with its executions, total and mean steps and builtin usage.
+    """
+    report = pd.DataFrame(
+        [
+            [opcode, opcode_name(opcode), *resources]
+            for opcode, resources in sorted(opcode_resources.items())
+        ],
+        columns=["opcode", "name", "executions", "steps", *BUILTINS_AP_OFFSETS],
+    )
+    report.insert(4, "mean_steps", report["steps"] / report["executions"])
+    return report
+
+
+def dump_opcode_report(path, opcode_resources: Dict[int, List[int]]):
+    opcode_report(opcode_resources).to_csv(path, index=False)
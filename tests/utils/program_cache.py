@@ -0,0 +1,103 @@
+"""
+On-disk cache of compiled Cairo programs, shared between pytest sessions and xdist workers.
+
+A program is keyed by the hash of its source, of every module it transitively imports
+(resolved with the same module reader as the compiler) and of the cairo-lang version.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable, Dict
+
+from starkware.cairo.lang.compiler.program import Program
+from starkware.cairo.lang.version import __version__ as CAIRO_LANG_VERSION
+
+from kakarot_scripts.constants import BUILD_DIR
+
+logger = logging.getLogger()
+
+PROGRAM_CACHE_DIR = BUILD_DIR / "cache" / "programs"
+
+# Cairo zero supports both `from a.b import c` and `import a.b` statements.
+_IMPORT_PATTERN = re.compile(
+    r"^\s*(?:from\s+([\w.]+)\s+import\b|import\s+([\w.]+))", re.MULTILINE
+)
+
+
+def collect_imported_modules(code: str, read_module: Callable) -> Dict[str, str]:
+    """
+    Return the content of every module transitively imported by the given code, keyed by module name.
+
+    Modules that cannot be resolved are kept with an empty content: the compiler will raise
+    anyway and their name is still part of the resulting hash.
+    """
+    modules = {}
+    to_visit = [code]
+    while to_visit:
+        for match in _IMPORT_PATTERN.finditer(to_visit.pop()):
+            module_name = match.group(1) or match.group(2)
+            if module_name in modules:
+                continue
+            try:
+                module_code, _ = read_module(module_name)
+            except Exception:
+                modules[module_name] = ""
+                continue
+            modules[module_name] = module_code
+            to_visit.append(module_code)
+    return modules
+
+
+def get_program_hash(path: Path, read_module: Callable) -> str:
+    code = Path(path).read_text()
+    modules = collect_imported_modules(code, read_module)
+
+    digest = sha256()
+    digest.update(CAIRO_LANG_VERSION.encode())
+    digest.update(code.encode())
+    for module_name in sorted(modules):
+        digest.update(module_name.encode())
+        digest.update(sha256(modules[module_name].encode()).digest())
+    return digest.hexdigest()
+
+
+@contextmanager
+def file_lock(path: Path):
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def cached_compile(path: Path, read_module: Callable, compile_fn: Callable) -> Program:
+    """
+    Load the compiled program from the cache, or compile it with compile_fn and store it.
+
+    Only one process compiles a given program at a time: the other ones wait on the lock
+    and then load the freshly stored result.
+    """
+    path = Path(path)
+    PROGRAM_CACHE_DIR.mkdir(exist_ok=True, parents=True)
+    program_hash = get_program_hash(path, read_module)
+    cache_file = PROGRAM_CACHE_DIR / f"{path.stem}_{program_hash[:16]}.json"
+
+    with file_lock(cache_file.with_suffix(".lock")):
+        if cache_file.exists():
+            try:
+                return Program.load(data=json.loads(cache_file.read_text()))
+            except Exception as e:
+                logger.info(f"Invalid cache entry {cache_file}, recompiling: {e}")
+
+        program = compile_fn(path)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(program.dump()))
+        os.replace(tmp_file, cache_file)
+        return program
@@ -1,12 +1,19 @@
 import json
 import logging
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Mapping
+from dataclasses import dataclass
 from functools import wraps
 from pathlib import Path
 from time import perf_counter
-from typing import Any, Callable, List, TypeVar, Union, cast
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Union, cast
 
 from starkware.cairo.lang.compiler.identifier_definition import LabelDefinition
 from starkware.cairo.lang.tracer.profile import ProfileBuilder
+from starkware.cairo.lang.vm.relocatable import RelocatableValue
+from starkware.cairo.lang.vm.trace_entry import TraceEntry
+from starkware.cairo.lang.vm.vm_core import VirtualMachine
 
 from tests.utils.coverage import CoverageFile
 
@@ -41,21 +48,174 @@ def timeit(fun: T) -> T:
 
 
 def dump_coverage(path: Union[str, Path], files: List[CoverageFile]):
+    """
+    Stream the coverage of a worker to path, one CoverageFile per line.
+    """
     p = Path(path)
-    p.mkdir(exist_ok=True, parents=True)
-    json.dump(
-        {
-            "coverage": {
-                file.name.split("__main__/")[-1]: {
-                    **{line: 0 for line in file.missed},
-                    **{line: 1 for line in file.covered},
+    p.parent.mkdir(exist_ok=True, parents=True)
+    with open(p, "w") as f:
+        for file in files:
+            f.write(json.dumps(file.to_dict()) + "\n")
+
+
+def merge_coverage(input_dir: Union[str, Path], output_path: Union[str, Path]):
+    """
+    Merge all the worker coverage files of input_dir into a single codecov json report.
+
+    Files are read line by line and hits are summed in place, so memory only depends on the number of
+    source lines, not on the number of workers or runs.
+    """
+    line_hits: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    for worker_file in sorted(Path(input_dir).glob("*.jsonl")):
+        with open(worker_file) as f:
+            for row in f:
+                file = CoverageFile.from_dict(json.loads(row))
+                file_hits = line_hits[file.name.split("__main__/")[-1]]
+                for line, hits in zip(file.lines, file.hits):
+                    file_hits[line] += hits
+
+    p = Path(output_path)
+    p.parent.mkdir(exist_ok=True, parents=True)
+    with open(p, "w") as f:
+        json.dump(
+            {
+                "coverage": {
+                    name: {line: hits[line] for line in sorted(hits)}
+                    for name, hits in sorted(line_hits.items())
                 }
-                for file in files
-            }
-        },
-        open(p / "coverage.json", "w"),
-        indent=2,
+            },
+            f,
+            indent=2,
+        )
+
+
+@dataclass
+class ProfileTable:
+    """
+    Functions and locations of a program, resolved once and registered in each ProfileBuilder.
+    """
+
+    functions: List[Tuple[str, Any]]
+    locations: List[Tuple[int, Any]]
+
+    def register(self, builder: ProfileBuilder, program_base: int):
+        for name, inst_location in self.functions:
+            builder.function_id(name=name, inst_location=inst_location)
+        for pc_offset, inst_location in self.locations:
+            builder.location_id(
+                pc=program_base + pc_offset, inst_location=inst_location
+            )
+
+
+# Keyed by id(program); the program is kept alive so that ids are not reused.
+_profile_tables: Dict[int, Tuple[Any, ProfileTable]] = {}
+
+
+def get_profile_table(program) -> ProfileTable:
+    if id(program) in _profile_tables:
+        return _profile_tables[id(program)][1]
+
+    instruction_locations = program.debug_info.instruction_locations
+    table = ProfileTable(
+        functions=[
+            (_label_scope.get(str(name), str(name)), instruction_locations[ident.pc])
+            for name, ident in program.identifiers.as_dict().items()
+            if isinstance(ident, LabelDefinition)
+        ],
+        locations=list(instruction_locations.items()),
+    )
+    _profile_tables[id(program)] = (program, table)
+    return table
+
+
+class VmWithProfiling(VirtualMachine):
+    """
+    Aggregate profiling samples during the run instead of walking the whole trace afterwards.
+
+    Samples are counted by (pc offset, fp): since memory is write-once, the call stack of a sample
+    can be rebuilt from the fp chain once the run is over. Only one step every sampling_interval is
+    recorded, with a weight of sampling_interval.
+    """
+
+    sampling_interval: int = 1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile_samples: Dict[Tuple[int, Any], int] = defaultdict(int)
+        # The runner starts the vm at a pc of the program segment.
+        self.profile_segment_index = self.run_context.pc.segment_index
+        self._steps_to_next_sample = 0
+
+    def run_instruction(self, instruction):
+        if self._steps_to_next_sample == 0:
+            self._steps_to_next_sample = self.sampling_interval
+            pc = self.run_context.pc
+            if pc.segment_index == self.profile_segment_index:
+                self.profile_samples[
+                    (pc.offset, self.run_context.fp)
+                ] += self.sampling_interval
+        self._steps_to_next_sample -= 1
+        super().run_instruction(instruction)
+
+
+class _RelocatedMemoryView(Mapping):
+    """
+    Read-only view of the memory of a runner at relocated addresses, without relocating it all.
+    """
+
+    def __init__(self, runner):
+        self.memory = runner.vm_memory
+        offsets = runner.segments.relocate_segments()
+        self.offsets = offsets
+        self.starts = sorted((offset, index) for index, offset in offsets.items())
+
+    def relocate(self, value):
+        if isinstance(value, RelocatableValue):
+            return self.offsets[value.segment_index] + value.offset
+        return value
+
+    def __getitem__(self, address: int):
+        i = bisect_right(self.starts, (address, float("inf"))) - 1
+        if i < 0:
+            raise KeyError(address)
+        start, segment_index = self.starts[i]
+        return self.relocate(
+            self.memory[RelocatableValue(segment_index, address - start)]
+        )
+
+    def __iter__(self):
+        return (self.relocate(address) for address in self.memory.keys())
+
+    def __len__(self):
+        return len(self.memory)
+
+
+def profile_from_runner(runner, program_base: int) -> bytes:
+    """
+    Build the pprof profile of a run made with VmWithProfiling.
+
+    The call stacks are walked in the memory of the ended run, relocated lazily address by address.
+    """
+    memory = _RelocatedMemoryView(runner)
+    builder = ProfileBuilder(
+        initial_fp=memory.relocate(runner.initial_fp), memory=memory
     )
+    get_profile_table(runner.program).register(builder, program_base)
+
+    samples = builder._profile.sample
+    for (pc_offset, fp), count in runner.vm.profile_samples.items():
+        n_samples = len(samples)
+        try:
+            builder.add_sample(
+                TraceEntry(pc=program_base + pc_offset, ap=0, fp=memory.relocate(fp))
+            )
+        except KeyError:
+            pass
+        # The sample may have been added before an unknown caller pc raised.
+        if len(samples) > n_samples:
+            samples[-1].value[:] = [count]
+
+    return builder.dump()
 
 
 def profile_from_tracer_data(tracer_data):
@@ -68,26 +228,10 @@ def profile_from_tracer_data(tracer_data):
         initial_fp=tracer_data.trace[0].fp, memory=tracer_data.memory
     )
 
-    # Functions.
-    for name, ident in tracer_data.program.identifiers.as_dict().items():
-        if not isinstance(ident, LabelDefinition):
-            continue
-        builder.function_id(
-            name=_label_scope.get(str(name), str(name)),
-            inst_location=tracer_data.program.debug_info.instruction_locations[
-                ident.pc
-            ],
-        )
-
-    # Locations.
-    for (
-        pc_offset,
-        inst_location,
-    ) in tracer_data.program.debug_info.instruction_locations.items():
-        builder.location_id(
-            pc=tracer_data.get_pc_from_offset(pc_offset),
-            inst_location=inst_location,
-        )
+    # Functions and locations.
+    get_profile_table(tracer_data.program).register(
+        builder, tracer_data.get_pc_from_offset(0)
+    )
 
     # Samples.
     for trace_entry in tracer_data.trace:
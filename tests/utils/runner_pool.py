@@ -0,0 +1,182 @@
+"""
+Pool of pre-initialized CairoRunner templates.
+
+Setting up a runner for a given entrypoint (builtin segments, program loading, stack) is
+deterministic, so it is done once per (program, entrypoint, layout, proof_mode) and the resulting
+memory is snapshotted. Each call then gets a fresh runner whose memory is a shallow copy of the
+snapshot, without re-loading the program felt by felt.
+"""
+
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from starkware.cairo.lang.compiler.identifier_definition import IdentifierDefinition
+from starkware.cairo.lang.compiler.program import Program
+from starkware.cairo.lang.compiler.scoped_name import ScopedName
+from starkware.cairo.lang.vm.cairo_runner import CairoRunner
+from starkware.cairo.lang.vm.memory_dict import MemoryDict
+from starkware.cairo.lang.vm.relocatable import MaybeRelocatable, RelocatableValue
+
+# This list is extracted from the builtin runners
+# Builtins have to be declared in this order
+BUILTINS_ORDER = [
+    "output",
+    "pedersen",
+    "range_check",
+    "ecdsa",
+    "bitwise",
+    "ec_op",
+    "keccak",
+    "poseidon",
+    "range_check96",
+]
+
+
+@dataclass
+class RunnerTemplate:
+    implicit_args: List[str]
+    args: List[str]
+    return_data: IdentifierDefinition
+    builtins: List[str]
+    memory: Dict[MaybeRelocatable, MaybeRelocatable]
+    n_segments: int
+    initial_pc: RelocatableValue
+    initial_fp: RelocatableValue
+    execution_public_memory: List[int]
+    output_ptr: Optional[RelocatableValue]
+    end: RelocatableValue
+
+
+class RunnerPool:
+    """
+    Hand out ready-to-run CairoRunner for a given program.
+
+    The pool is bound to a single program; templates are keyed by (entrypoint, layout, proof_mode).
+    """
+
+    def __init__(self, program: Program):
+        self.program = program
+        self.templates: Dict[Tuple[str, str, bool], RunnerTemplate] = {}
+        self.setup_durations: List[float] = []
+
+    def get(
+        self, entrypoint: str, layout: str, proof_mode: bool
+    ) -> Tuple[CairoRunner, RunnerTemplate]:
+        start = perf_counter()
+        key = (entrypoint, layout, proof_mode)
+        template = self.templates.get(key)
+        if template is None:
+            template = self._build_template(entrypoint, layout, proof_mode)
+            self.templates[key] = template
+
+        # Fix builtins runner based on the implicit args since the compiler doesn't find them
+        self.program.builtins = template.builtins
+        runner = CairoRunner(
+            program=self.program,
+            layout=layout,
+            memory=MemoryDict(template.memory),
+            proof_mode=proof_mode,
+            allow_missing_builtins=False,
+            # Only the proof mode outputs read the instruction trace.
+            enable_instruction_trace=proof_mode,
+        )
+        # Segments are allocated in the same order as in the template so that all the
+        # relocatable values of the snapshot point to the same segments.
+        runner.program_base = runner.segments.add()
+        runner.execution_base = runner.segments.add()
+        for builtin_runner in runner.builtin_runners.values():
+            builtin_runner.initialize_segments(runner)
+        while runner.segments.n_segments < template.n_segments:
+            runner.segments.add()
+
+        runner.initial_pc = template.initial_pc
+        runner.initial_fp = runner.initial_ap = template.initial_fp
+        runner.execution_public_memory = list(template.execution_public_memory)
+
+        self.setup_durations.append(perf_counter() - start)
+        return runner, template
+
+    def _build_template(
+        self, entrypoint: str, layout: str, proof_mode: bool
+    ) -> RunnerTemplate:
+        implicit_args = list(
+            self.program.identifiers.get_by_full_name(
+                ScopedName(path=["__main__", entrypoint, "ImplicitArgs"])
+            ).members.keys()
+        )
+        args = list(
+            self.program.identifiers.get_by_full_name(
+                ScopedName(path=["__main__", entrypoint, "Args"])
+            ).members.keys()
+        )
+        return_data = self.program.identifiers.get_by_full_name(
+            ScopedName(path=["__main__", entrypoint, "Return"])
+        )
+        builtins = [
+            builtin
+            for builtin in BUILTINS_ORDER
+            if builtin in {arg.replace("_ptr", "") for arg in implicit_args}
+        ]
+        self.program.builtins = builtins
+
+        memory = MemoryDict()
+        runner = CairoRunner(
+            program=self.program,
+            layout=layout,
+            memory=memory,
+            proof_mode=proof_mode,
+            allow_missing_builtins=False,
+        )
+
+        runner.program_base = runner.segments.add()
+        runner.execution_base = runner.segments.add()
+        for builtin_runner in runner.builtin_runners.values():
+            builtin_runner.initialize_segments(runner)
+
+        stack = []
+        for arg in implicit_args:
+            builtin_runner = runner.builtin_runners.get(arg.replace("_ptr", "_builtin"))
+            if builtin_runner is not None:
+                stack.extend(builtin_runner.initial_stack())
+                continue
+            if arg == "syscall_ptr":
+                syscall = runner.segments.add()
+                stack.append(syscall)
+                continue
+
+        output_ptr = None
+        if "output_ptr" in args:
+            output_ptr = runner.segments.add()
+            stack.append(output_ptr)
+
+        return_fp = runner.execution_base + 2
+        end = runner.segments.add()
+        # Add a jmp rel 0 instruction to be able to loop in proof mode
+        runner.memory[end] = 0x10780017FFF7FFF
+        runner.memory[end + 1] = 0
+        # Proof mode expects the program to start with __start__ and call main
+        # Adding [return_fp, end] before and after the stack makes this work both in proof mode and normal mode
+        stack = [return_fp, end] + stack + [return_fp, end]
+        runner.execution_public_memory = list(range(len(stack)))
+
+        runner.initialize_state(
+            entrypoint=self.program.identifiers.get_by_full_name(
+                ScopedName(path=["__main__", entrypoint])
+            ).pc,
+            stack=stack,
+        )
+
+        return RunnerTemplate(
+            implicit_args=implicit_args,
+            args=args,
+            return_data=return_data,
+            builtins=builtins,
+            memory=dict(memory.data),
+            n_segments=runner.segments.n_segments,
+            initial_pc=runner.initial_pc,
+            initial_fp=runner.execution_base + len(stack),
+            execution_public_memory=runner.execution_public_memory,
+            output_ptr=output_ptr,
+            end=end,
+        )
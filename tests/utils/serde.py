@@ -1,5 +1,9 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
 from eth_utils.address import to_checksum_address
 from starkware.cairo.lang.compiler.ast.cairo_types import (
+    CairoType,
     TypeFelt,
     TypePointer,
     TypeStruct,
@@ -7,28 +11,144 @@ from starkware.cairo.lang.compiler.ast.cairo_types import (
 )
 from starkware.cairo.lang.compiler.identifier_definition import StructDefinition
 from starkware.cairo.lang.compiler.identifier_manager import MissingIdentifierError
+from starkware.cairo.lang.vm.relocatable import RelocatableValue
 
 
-class Serde:
-    def __init__(self, runner):
-        self.runner = runner
-        self.memory = runner.segments.memory
+class StructLayout:
+    """
+    Precompiled members of a struct, to read all of them at their fixed offsets.
+    """
+
+    def __init__(self, struct: StructDefinition):
+        self.full_name = struct.full_name
+        self.size = struct.size
+        self.members: List[Tuple[str, int, CairoType]] = [
+            (name, member.offset, member.cairo_type)
+            for name, member in struct.members.items()
+        ]
+        self.pointers = [
+            (name, offset, isinstance(cairo_type, TypePointer))
+            for name, offset, cairo_type in self.members
+        ]
+
+    def read_pointers(self, memory, ptr):
+        output = {}
+        for name, offset, is_pointer in self.pointers:
+            value = memory.get(ptr + offset)
+            output[name] = None if value == 0 and is_pointer else value
+        return output
+
+
+class ProgramIndex:
+    """
+    Identifiers of a program indexed by the last part of their name, with resolved lookups and struct layouts cached.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.by_suffix = defaultdict(list)
+        for key, value in program.identifiers.as_dict().items():
+            self.by_suffix[str(key).split(".")[-1]].append((str(key), value))
+        self.identifiers = {}
+        self.layouts: Dict[str, StructLayout] = {}
 
     def get_identifier(self, struct_name, expected_type):
+        cache_key = (struct_name, expected_type)
+        if cache_key in self.identifiers:
+            return self.identifiers[cache_key]
+
         identifiers = [
             value
-            for key, value in self.runner.program.identifiers.as_dict().items()
-            if struct_name in str(key)
-            and isinstance(value, expected_type)
-            and struct_name.split(".")[-1] == str(key).split(".")[-1]
+            for key, value in self.by_suffix.get(struct_name.split(".")[-1], [])
+            if struct_name in key and isinstance(value, expected_type)
         ]
         if len(identifiers) != 1:
             raise ValueError(
                 f"Expected one struct named {struct_name}, found {identifiers}"
             )
+        self.identifiers[cache_key] = identifiers[0]
         return identifiers[0]
 
+    def get_layout(self, struct_name) -> StructLayout:
+        layout = self.layouts.get(struct_name)
+        if layout is None:
+            layout = StructLayout(self.get_identifier(struct_name, StructDefinition))
+            self.layouts[struct_name] = layout
+        return layout
+
+
+# Keyed by id(program); the ProgramIndex keeps a reference to the program so that ids are not reused.
+_program_indexes: Dict[int, ProgramIndex] = {}
+
+
+def get_program_index(program) -> ProgramIndex:
+    index = _program_indexes.get(id(program))
+    if index is None:
+        index = ProgramIndex(program)
+        _program_indexes[id(program)] = index
+    return index
+
+
+class Serde:
+    def __init__(self, runner):
+        self.runner = runner
+        self.memory = runner.segments.memory
+        self.index = get_program_index(runner.program)
+
+    def get_identifier(self, struct_name, expected_type):
+        return self.index.get_identifier(struct_name, expected_type)
+
+    def _felt_range(self, segment_ptr, length=None):
+        """
+        Iterate over length consecutive felts starting at segment_ptr (up to the end of the segment by default).
+
+        Addresses are built directly from the segment index and offset instead of going through the
+        generic _serialize path.
+        """
+        if length is None:
+            length = (
+                self.runner.segments.get_segment_size(segment_ptr.segment_index)
+                - segment_ptr.offset
+            )
+        segment_index, offset = segment_ptr.segment_index, segment_ptr.offset
+        get = self.memory.get
+        return (get(RelocatableValue(segment_index, offset + i)) for i in range(length))
+
+    def serialize_felts(self, segment_ptr, length=None) -> list:
+        """
+        Read a contiguous range of felts in one pass.
+        """
+        return list(self._felt_range(segment_ptr, length))
+
+    def serialize_bytes(self, segment_ptr, length=None) -> bytes:
+        """
+        Read a contiguous range of felts holding one byte each, e.g. bytecode or calldata, as bytes.
+        """
+        if length == 0:
+            return b""
+        return bytes(self._felt_range(segment_ptr, length))
+
+    def serialize_array(self, segment_ptr, length=None, dtype="uint8"):
+        """
+        Read a contiguous range of felts into a NumPy array without building an intermediate list.
+
+        All the felts must fit in dtype; use dtype=object for arbitrary felts.
+        """
+        # Only the tests exporting arrays need numpy.
+        import numpy as np
+
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        if length is None:
+            return np.array(list(self._felt_range(segment_ptr)), dtype=dtype)
+        return np.fromiter(
+            self._felt_range(segment_ptr, length), dtype=dtype, count=length
+        )
+
     def serialize_list(self, segment_ptr, item_scope=None, list_len=None):
+        if item_scope is None and isinstance(segment_ptr, RelocatableValue):
+            return self.serialize_felts(segment_ptr, list_len)
+
         item_identifier = (
             self.get_identifier(item_scope, StructDefinition)
             if item_scope is not None
@@ -86,14 +206,7 @@ class Serde:
         """
         Serialize a pointer to a struct, e.g. Uint256*.
         """
-        members = self.get_identifier(name, StructDefinition).members
-        output = {}
-        for name, member in members.items():
-            member_ptr = self.memory.get(ptr + member.offset)
-            if member_ptr == 0 and isinstance(member.cairo_type, TypePointer):
-                member_ptr = None
-            output[name] = member_ptr
-        return output
+        return self.index.get_layout(name).read_pointers(self.memory, ptr)
 
     def serialize_struct(self, name, ptr):
         """
@@ -101,10 +214,9 @@ class Serde:
         """
         if ptr is None:
             return None
-        members = self.get_identifier(name, StructDefinition).members
         return {
-            name: self._serialize(member.cairo_type, ptr + member.offset)
-            for name, member in members.items()
+            name: self._serialize(cairo_type, ptr + offset)
+            for name, offset, cairo_type in self.index.get_layout(name).members
         }
 
     def serialize_address(self, ptr):
@@ -212,15 +324,20 @@ class Serde:
         )
         return [stack_dict[i] for i in range(raw["size"])]
 
-    def serialize_memory(self, ptr):
+    def serialize_memory_bytes(self, ptr) -> bytes:
         raw = self.serialize_pointers("model.Memory", ptr)
         memory_dict = self.serialize_dict(
             raw["word_dict_start"], dict_size=raw["word_dict"] - raw["word_dict_start"]
         )
-        return "".join(
-            [f"{memory_dict.get(i, 0):032x}" for i in range(raw["words_len"] * 2)]
+        # Memory is stored as a dict of 16-byte words.
+        return b"".join(
+            memory_dict.get(i, 0).to_bytes(16, "big")
+            for i in range(raw["words_len"] * 2)
         )
 
+    def serialize_memory(self, ptr):
+        return self.serialize_memory_bytes(ptr).hex()
+
     def serialize_rlp_item(self, ptr):
         raw = self.serialize_list(ptr)
         items = []
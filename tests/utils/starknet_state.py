@@ -0,0 +1,147 @@
+"""
+In-memory Starknet state used by the SyscallHandler.
+
+All the mappings are copy-on-write overlays: a snapshot pushes an empty layer on top of the current
+ones, writes only ever go to the top layer and a rollback drops the layers above the snapshot. Both
+are O(1), so tests can load a state once and cheaply patch or fork it.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_DELETED = object()
+
+
+class OverlayDict:
+    """
+    Mapping backed by a stack of dicts, the last one being the only writable one.
+    """
+
+    def __init__(self, layers: Optional[List[dict]] = None):
+        self.layers: List[dict] = layers if layers is not None else [{}]
+
+    def __getitem__(self, key):
+        for layer in reversed(self.layers):
+            if key in layer:
+                value = layer[key]
+                if value is _DELETED:
+                    break
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _DELETED) is not _DELETED
+
+    def __setitem__(self, key, value):
+        self.layers[-1][key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.layers[-1][key] = _DELETED
+
+    def __iter__(self) -> Iterator:
+        seen = set()
+        for layer in reversed(self.layers):
+            for key, value in layer.items():
+                if key in seen:
+                    continue
+                seen.add(key)
+                if value is not _DELETED:
+                    yield key
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        for key in self:
+            yield key, self[key]
+
+    def snapshot(self) -> int:
+        self.layers.append({})
+        return len(self.layers) - 1
+
+    def rollback(self, snapshot_id: int):
+        # Always write to a fresh layer after a rollback: the layers below may be shared with forks.
+        del self.layers[snapshot_id:]
+        self.layers.append({})
+
+    def fork(self) -> "OverlayDict":
+        """
+        Return a new mapping sharing the current layers, which become read-only for both of them.
+        """
+        self.snapshot()
+        return OverlayDict(self.layers[:-1] + [{}])
+
+
+class StarknetState:
+    """
+    Contract storage, contract call handlers and EVM accounts of the mocked Starknet.
+
+    - storage is one mapping per contract address, keyed by storage address;
+    - handlers are keyed by function selector and called with (contract_address, calldata);
+    - accounts are keyed by EVM address, with values as returned by parse_state.
+    """
+
+    def __init__(
+        self,
+        storage: Optional[Dict[int, OverlayDict]] = None,
+        handlers: Optional[OverlayDict] = None,
+        accounts: Optional[OverlayDict] = None,
+    ):
+        self.storage = storage if storage is not None else {}
+        self.handlers = handlers if handlers is not None else OverlayDict()
+        self.accounts = accounts if accounts is not None else OverlayDict()
+
+    def snapshot(self) -> Tuple[Dict[int, int], int, int]:
+        return (
+            {
+                contract_address: storage.snapshot()
+                for contract_address, storage in self.storage.items()
+            },
+            self.handlers.snapshot(),
+            self.accounts.snapshot(),
+        )
+
+    def rollback(self, snapshot_id: Tuple[Dict[int, int], int, int]):
+        storage_snapshot, handlers_snapshot, accounts_snapshot = snapshot_id
+        for contract_address in list(self.storage):
+            if contract_address in storage_snapshot:
+                self.storage[contract_address].rollback(
+                    storage_snapshot[contract_address]
+                )
+            else:
+                # The contract storage was created after the snapshot.
+                del self.storage[contract_address]
+        self.handlers.rollback(handlers_snapshot)
+        self.accounts.rollback(accounts_snapshot)
+
+    def fork(self) -> "StarknetState":
+        """
+        Return a copy-on-write copy of the state: writes to either state are not seen by the other.
+        """
+        return StarknetState(
+            storage={
+                contract_address: storage.fork()
+                for contract_address, storage in self.storage.items()
+            },
+            handlers=self.handlers.fork(),
+            accounts=self.accounts.fork(),
+        )
+
+    def contract_storage(self, contract_address: int) -> OverlayDict:
+        storage = self.storage.get(contract_address)
+        if storage is None:
+            storage = self.storage[contract_address] = OverlayDict()
+        return storage
+
+    def read_storage(self, contract_address: int, address: int, default=None):
+        storage = self.storage.get(contract_address)
+        if storage is None:
+            return default
+        return storage.get(address, default)
+
+    def write_storage(self, contract_address: int, address: int, value):
+        self.contract_storage(contract_address)[address] = value
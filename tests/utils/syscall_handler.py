@@ -1,25 +1,77 @@
+import json
+import os
 import time
 from collections import OrderedDict
 from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import lru_cache, wraps
 from hashlib import sha256
-from typing import Iterable, Optional, Union
-from unittest import mock
+from typing import Dict, Iterable, List, Optional, Union
 
 import ecdsa
 from eth_utils import keccak
 from ethereum.base_types import U256
 from ethereum.crypto.elliptic_curve import SECP256K1N, secp256k1_recover
 from ethereum.crypto.hash import keccak256
+from starkware.crypto.signature.fast_pedersen_hash import pedersen_hash
 from starkware.starknet.public.abi import (
+    ADDR_BOUND,
     get_selector_from_name,
     get_storage_var_address,
 )
 
+from kakarot_scripts.constants import BUILD_DIR
 from kakarot_scripts.utils.uint256 import int_to_uint256, uint256_to_int
 from tests.utils.constants import CAIRO1_HELPERS_CLASS_HASH, CHAIN_ID
+from tests.utils.program_cache import file_lock
+from tests.utils.starknet_state import OverlayDict, StarknetState
+from tests.utils.syscall_journal import SyscallJournal
 
+CRYPTO_CACHE_SIZE = 4096
 
+# Memoized syscall patches, keyed by name, see memoize_calldata.
+_memoized_patches = {}
+
+
+def memoize_calldata(fun):
+    """
+    Memoize a pure syscall patch (contract address or class hash, calldata) -> retdata on the calldata only.
+
+    The cache is a bounded LRU keyed on the raw calldata tuple; its statistics are reported by crypto_cache_stats.
+    """
+
+    @lru_cache(maxsize=CRYPTO_CACHE_SIZE)
+    def _cached(calldata):
+        return tuple(fun(None, list(calldata)))
+
+    @wraps(fun)
+    def _memoized(_, calldata):
+        return list(_cached(tuple(calldata)))
+
+    _memoized.cache_info = _cached.cache_info
+    _memoized.cache_clear = _cached.cache_clear
+    _memoized_patches[fun.__name__] = _memoized
+    return _memoized
+
+
+def crypto_cache_stats():
+    """
+    Return the hits, misses and hit rate of each memoized cryptographic patch.
+    """
+    stats = {}
+    for name, patch in _memoized_patches.items():
+        info = patch.cache_info()
+        total = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / total if total else 0.0,
+            "size": info.currsize,
+        }
+    return stats
+
+
+@memoize_calldata
 def cairo_keccak(_, calldata):
     return int_to_uint256(
         int.from_bytes(
@@ -34,6 +86,7 @@ def cairo_keccak(_, calldata):
     )
 
 
+@memoize_calldata
 def cairo_recover_eth_address(_, calldata):
     """
     Convert the input calldata from Cairo's `recover_eth_address` into a signature and a message hash,
@@ -59,6 +112,7 @@ def cairo_recover_eth_address(_, calldata):
     ]  # return [is_some: 1, address: int]
 
 
+@memoize_calldata
 def cairo_verify_signature_secp256r1(_, calldata):
     """
     Convert the input calldata from Cairo's `verify_signature_secp256r1` into a message hash,
@@ -81,6 +135,7 @@ def cairo_verify_signature_secp256r1(_, calldata):
     return [is_valid]
 
 
+@memoize_calldata
 def cairo_compute_sha256_u32_array(_, calldata):
     """
     Compute the sha256 of a u32 array and return its bytes4 array representation.
@@ -98,6 +153,86 @@ def cairo_compute_sha256_u32_array(_, calldata):
     return [8, *sha256_u32_array]
 
 
+EXECUTE_STARKNET_CALL_SELECTOR = get_selector_from_name("execute_starknet_call")
+
+ACCOUNT_STORAGE_BASE_ADDRESS = get_storage_var_address("Account_storage")
+ACCOUNT_STORAGE_ADDRESSES_FILE = BUILD_DIR / "cache" / "account_storage_addresses.json"
+# EVM storage key -> Kakarot Account_storage address, loaded from and dumped to
+# ACCOUNT_STORAGE_ADDRESSES_FILE to be shared between sessions and xdist workers.
+_account_storage_addresses: Optional[Dict[int, int]] = None
+_new_account_storage_addresses: Dict[int, int] = {}
+
+
+def _read_account_storage_addresses() -> Dict[int, int]:
+    try:
+        return {
+            int(key, 16): int(address, 16)
+            for key, address in json.loads(
+                ACCOUNT_STORAGE_ADDRESSES_FILE.read_text()
+            ).items()
+        }
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def get_account_storage_addresses(keys: Iterable[int]) -> List[int]:
+    """
+    Derive the Kakarot Account_storage addresses of many EVM storage keys at once.
+
+    Equivalent to get_storage_var_address("Account_storage", *int_to_uint256(key)) for each key, but the
+    storage var base address is hashed only once and already derived keys are served from an on-disk memo.
+    """
+    global _account_storage_addresses
+    if _account_storage_addresses is None:
+        _account_storage_addresses = _read_account_storage_addresses()
+
+    keys = list(keys)
+    for key in set(keys) - _account_storage_addresses.keys():
+        low, high = int_to_uint256(key)
+        address = (
+            pedersen_hash(pedersen_hash(ACCOUNT_STORAGE_BASE_ADDRESS, low), high)
+            % ADDR_BOUND
+        )
+        _account_storage_addresses[key] = address
+        _new_account_storage_addresses[key] = address
+    return [_account_storage_addresses[key] for key in keys]
+
+
+def dump_account_storage_addresses():
+    """
+    Merge the addresses derived by this process into ACCOUNT_STORAGE_ADDRESSES_FILE.
+    """
+    if not _new_account_storage_addresses:
+        return
+
+    ACCOUNT_STORAGE_ADDRESSES_FILE.parent.mkdir(exist_ok=True, parents=True)
+    with file_lock(ACCOUNT_STORAGE_ADDRESSES_FILE.with_suffix(".lock")):
+        addresses = _read_account_storage_addresses()
+        addresses.update(_new_account_storage_addresses)
+        tmp_file = ACCOUNT_STORAGE_ADDRESSES_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(
+            json.dumps({hex(key): hex(address) for key, address in addresses.items()})
+        )
+        os.replace(tmp_file, ACCOUNT_STORAGE_ADDRESSES_FILE)
+    _new_account_storage_addresses.clear()
+
+
+def _parse_storage(storage):
+    hex_keys = [key for key in storage if not isinstance(key, int)]
+    addresses = dict(
+        zip(
+            hex_keys,
+            get_account_storage_addresses(int(key, 16) for key in hex_keys),
+        )
+    )
+    return {
+        addresses.get(key, key): (
+            int(value, 16) if not isinstance(value, int) else value
+        )
+        for key, value in storage.items()
+    }
+
+
 def parse_state(state):
     """
     Parse a serialized state as a dict of string, mainly converting hex strings to
@@ -136,16 +271,7 @@ def parse_state(state):
                 if not isinstance(account["nonce"], int)
                 else account["nonce"]
             ),
-            "storage": {
-                (
-                    get_storage_var_address(
-                        "Account_storage", *int_to_uint256(int(key, 16))
-                    )
-                    if not isinstance(key, int)
-                    else key
-                ): (int(value, 16) if not isinstance(value, int) else value)
-                for key, value in account["storage"].items()
-            },
+            "storage": _parse_storage(account["storage"]),
         }
         for address, account in state.items()
     }
@@ -177,50 +303,69 @@ class SyscallHandler:
     contract_address: int = 0xABDE1
     caller_address: int = 0xABDE1
     class_hash: int = 0xC1A55
-    mock_call = mock.MagicMock()
-    mock_library_call = mock.MagicMock()
-    mock_storage = mock.MagicMock()
-    mock_event = mock.MagicMock()
-    mock_replace_class = mock.MagicMock()
-    mock_send_message_to_l1 = mock.MagicMock()
-    mock_deploy = mock.MagicMock()
-
+    # Syscalls are recorded in a lightweight journal. The mock_* recorders are kept as the entry points
+    # so that they can still be replaced by MagicMock objects in tests, e.g. to set a side_effect.
+    journal = SyscallJournal()
+    mock_call = journal.call_contract
+    mock_library_call = journal.library_call
+    mock_storage = journal.storage
+    mock_event = journal.event
+    mock_replace_class = journal.replace_class
+    mock_send_message_to_l1 = journal.send_message_to_l1
+    mock_deploy = journal.deploy
+
+    # Contract storage and call handlers, shared by all the handlers and patched with
+    # SyscallHandler.patch and SyscallHandler.patch_state.
     # Patch the keccak library call to return the keccak of the input data.
     # We need to reconstruct the raw bytes from the Cairo-style keccak calldata.
-    patches = {
-        get_selector_from_name("keccak"): cairo_keccak,
-        get_selector_from_name("recover_eth_address"): cairo_recover_eth_address,
-        get_selector_from_name(
-            "verify_signature_secp256r1"
-        ): cairo_verify_signature_secp256r1,
-        get_selector_from_name("get_cairo1_helpers_class_hash"): lambda *_: [
-            CAIRO1_HELPERS_CLASS_HASH
-        ],
-        get_selector_from_name(
-            "compute_sha256_u32_array"
-        ): cairo_compute_sha256_u32_array,
-    }
-
-    def __post_init__(self):
-        self.patches[get_selector_from_name("execute_starknet_call")] = (
-            lambda addr, data: self.execute_starknet_call(addr, data)
+    state = StarknetState(
+        handlers=OverlayDict(
+            [
+                {
+                    get_selector_from_name("keccak"): cairo_keccak,
+                    get_selector_from_name(
+                        "recover_eth_address"
+                    ): cairo_recover_eth_address,
+                    get_selector_from_name(
+                        "verify_signature_secp256r1"
+                    ): cairo_verify_signature_secp256r1,
+                    get_selector_from_name(
+                        "get_cairo1_helpers_class_hash"
+                    ): lambda *_: [CAIRO1_HELPERS_CLASS_HASH],
+                    get_selector_from_name(
+                        "compute_sha256_u32_array"
+                    ): cairo_compute_sha256_u32_array,
+                }
+            ]
         )
+    )
+
+    def get_handler(self, function_selector):
+        """
+        Return the registered mock function for the given selector.
+        Raise ValueError if the selector is not found in the state handlers.
+        """
+        if function_selector == EXECUTE_STARKNET_CALL_SELECTOR:
+            return self.execute_starknet_call
+        handler = self.state.handlers.get(function_selector)
+        if handler is None:
+            raise ValueError(
+                f"Function selector 0x{function_selector:x} not found in patches."
+            )
+        return handler
 
     def execute_starknet_call(self, _, calldata):
         contract_address = calldata[0]
         function_selector = calldata[1]
         calldata = calldata[2:]
 
-        if function_selector not in self.patches:
-            raise ValueError(
-                f"Function selector 0x{function_selector:x} not found in patches."
-            )
+        handler = self.get_handler(function_selector)
         self.mock_call(
             contract_address=contract_address,
             function_selector=function_selector,
             calldata=calldata,
         )
-        inner_retdata = self.patches.get(function_selector)(contract_address, calldata)
+        inner_retdata = handler(contract_address, calldata)
         return [len(inner_retdata), *inner_retdata, 1]
 
     def get_contract_address(self, segments, syscall_ptr):
@@ -343,7 +488,7 @@ class SyscallHandler:
     def storage_read(self, segments, syscall_ptr):
         """
         Return a constant value for the storage read system call.
-        We use the patches dict to store the storage values; returned value is 0 if the address is not found as in Starknet.
+        We use the state storage of the current contract; returned value is 0 if the address is not found as in Starknet.
         Value can also be set by patching the underling mock_storage object.
 
         Syscall structure is:
@@ -364,7 +509,7 @@ class SyscallHandler:
         """
         address = segments.memory[syscall_ptr + 1]
         mock = self.mock_storage(address=address)
-        patched = self.patches.get(address)
+        patched = self.state.read_storage(self.contract_address, address)
         value = (
             patched if patched is not None else (mock if isinstance(mock, int) else 0)
         )
@@ -428,7 +573,7 @@ class SyscallHandler:
     def call_contract(self, segments, syscall_ptr):
         """
         Call the registered mock function for the given selector.
-        Raise ValueError if the selector is not found in the patches dict.
+        Raise ValueError if the selector is not found in the state handlers.
 
         Syscall structure is:
 
@@ -451,10 +596,7 @@ class SyscallHandler:
             }
         """
         function_selector = segments.memory[syscall_ptr + 2]
-        if function_selector not in self.patches:
-            raise ValueError(
-                f"Function selector 0x{function_selector:x} not found in patches."
-            )
+        handler = self.get_handler(function_selector)
 
         contract_address = segments.memory[syscall_ptr + 1]
         calldata_ptr = segments.memory[syscall_ptr + 4]
@@ -467,7 +609,7 @@ class SyscallHandler:
             function_selector=function_selector,
             calldata=calldata,
         )
-        retdata = self.patches.get(function_selector)(contract_address, calldata)
+        retdata = handler(contract_address, calldata)
         retdata_segment = segments.add()
         segments.write_arg(retdata_segment, retdata)
         segments.write_arg(syscall_ptr + 5, [len(retdata), retdata_segment])
@@ -475,7 +617,7 @@ class SyscallHandler:
     def library_call(self, segments, syscall_ptr):
         """
         Call the registered mock function for the given selector.
-        Raise ValueError if the selector is not found in the patches dict.
+        Raise ValueError if the selector is not found in the state handlers.
 
         Syscall structure is:
             struct LibraryCallRequest {
@@ -492,10 +634,7 @@ class SyscallHandler:
             }
         """
         function_selector = segments.memory[syscall_ptr + 2]
-        if function_selector not in self.patches:
-            raise ValueError(
-                f"Function selector 0x{function_selector:x} not found in patches."
-            )
+        handler = self.get_handler(function_selector)
 
         class_hash = segments.memory[syscall_ptr + 1]
         calldata_ptr = segments.memory[syscall_ptr + 4]
@@ -508,7 +647,7 @@ class SyscallHandler:
             function_selector=function_selector,
             calldata=calldata,
         )
-        retdata = self.patches.get(function_selector)(class_hash, calldata)
+        retdata = handler(class_hash, calldata)
         retdata_segment = segments.add()
         segments.write_arg(retdata_segment, retdata)
         segments.write_arg(syscall_ptr + 5, [len(retdata), retdata_segment])
@@ -568,13 +707,26 @@ class SyscallHandler:
             deploy_from_zero=deploy_from_zero,
         )
 
-        retdata = self.patches.get(get_selector_from_name("deploy"))(
+        retdata = self.get_handler(get_selector_from_name("deploy"))(
             class_hash, constructor_calldata
         )
         retdata_segment = segments.add()
         segments.write_arg(retdata_segment, retdata)
         segments.write_arg(syscall_ptr + 6, [len(retdata), retdata_segment])
 
+    @classmethod
+    @contextmanager
+    def use_state(cls, state: StarknetState):
+        """
+        Run with the given state, e.g. a fork of a state loaded once and shared between tests.
+        """
+        previous_state = cls.state
+        cls.state = state
+        try:
+            yield state
+        finally:
+            cls.state = previous_state
+
     @classmethod
     @contextmanager
     def patch(
@@ -603,7 +755,10 @@ class SyscallHandler:
         if value is None:
             args = list(args)
             value = args.pop()
-        cls.patches[selector_if_call] = value
+
+        state = cls.state
+        snapshot_id = state.snapshot()
+        state.handlers[selector_if_call] = value
         try:
             if isinstance(target, str):
                 selector_if_storage = get_storage_var_address(target, *args)
@@ -612,18 +767,19 @@ class SyscallHandler:
 
             if isinstance(value, Iterable):
                 for i, v in enumerate(value):
-                    cls.patches[selector_if_storage + i] = v
+                    state.write_storage(
+                        cls.contract_address, selector_if_storage + i, v
+                    )
             else:
-                cls.patches[selector_if_storage] = value
+                state.write_storage(cls.contract_address, selector_if_storage, value)
 
         except AssertionError:
             pass
 
-        yield
-
-        del cls.patches[selector_if_call]
-        if "selector_if_storage" in globals():
-            del cls.patches[selector_if_storage]
+        try:
+            yield
+        finally:
+            state.rollback(snapshot_id)
 
     @classmethod
     @contextmanager
@@ -636,51 +792,49 @@ class SyscallHandler:
 
         :param state: the state to patch with, an output dictionary of parse_state
         """
-        patched_before = set(cls.patches.keys())
+        starknet_state = cls.state
+        snapshot_id = starknet_state.snapshot()
 
+        # Handlers read the accounts of the state in use when called, which may be a fork.
         def _balance_of(_, calldata):
-            return int_to_uint256(state.get(calldata[0], {}).get("balance", 0))
-
-        balance_selector = get_selector_from_name("balanceOf")
-        cls.patches[balance_selector] = _balance_of
+            return int_to_uint256(
+                cls.state.accounts.get(calldata[0], {}).get("balance", 0)
+            )
 
         def _bytecode(contract_address, _):
-            code = state.get(contract_address, {}).get("code", [])
+            code = cls.state.accounts.get(contract_address, {}).get("code", [])
             return [len(code), *code]
 
-        bytecode_selector = get_selector_from_name("bytecode")
-        cls.patches[bytecode_selector] = _bytecode
-
         def _bytecode_len(contract_address, _):
-            code = state.get(contract_address, {}).get("code", [])
+            code = cls.state.accounts.get(contract_address, {}).get("code", [])
             return [len(code)]
 
-        bytecode_len_selector = get_selector_from_name("bytecode_len")
-        cls.patches[bytecode_len_selector] = _bytecode_len
-
         def _get_nonce(contract_address, _):
-            return [state.get(contract_address, {}).get("nonce", 0)]
-
-        nonce_selector = get_selector_from_name("get_nonce")
-        cls.patches[nonce_selector] = _get_nonce
+            return [cls.state.accounts.get(contract_address, {}).get("nonce", 0)]
 
         def _storage(contract_address, calldata):
             return int_to_uint256(
-                state.get(contract_address, {}).get("storage", {}).get(calldata[0], 0)
+                cls.state.accounts.get(contract_address, {})
+                .get("storage", {})
+                .get(calldata[0], 0)
             )
 
-        storage_selector = get_selector_from_name("storage")
-        cls.patches[storage_selector] = _storage
+        starknet_state.handlers[get_selector_from_name("balanceOf")] = _balance_of
+        starknet_state.handlers[get_selector_from_name("bytecode")] = _bytecode
+        starknet_state.handlers[get_selector_from_name("bytecode_len")] = _bytecode_len
+        starknet_state.handlers[get_selector_from_name("get_nonce")] = _get_nonce
+        starknet_state.handlers[get_selector_from_name("storage")] = _storage
 
         # Register accounts
-        for address in state.keys():
-            address_selector = get_storage_var_address(
-                "Kakarot_evm_to_starknet_address", address
+        for address, account in state.items():
+            starknet_state.accounts[address] = account
+            starknet_state.write_storage(
+                cls.contract_address,
+                get_storage_var_address("Kakarot_evm_to_starknet_address", address),
+                address,
             )
-            cls.patches[address_selector] = address
 
-        yield
-
-        patched = set(cls.patches.keys())
-        for selector in patched - patched_before:
-            del cls.patches[selector]
+        try:
+            yield
+        finally:
+            starknet_state.rollback(snapshot_id)
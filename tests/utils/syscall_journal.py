@@ -0,0 +1,195 @@
+"""
+Append-only journal of the syscalls made during cairo runs.
+
+Each record is a tuple of argument values, with the tuple of argument names shared between all
+the records of the same shape. Recorders expose the subset of the MagicMock API used by the tests
+(assert_called_with, assert_any_call, assert_has_calls, call_count, ...).
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from unittest.mock import _Call, call
+
+Record = Tuple[Tuple[str, ...], tuple]
+
+_MISSING = object()
+
+
+class SyscallRecorder:
+    """
+    Record calls made with keyword arguments only, as done by the SyscallHandler.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.records: List[Record] = []
+        self._names: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def __call__(self, **kwargs):
+        names = tuple(kwargs)
+        self.records.append(
+            (self._names.setdefault(names, names), tuple(kwargs.values()))
+        )
+
+    def __iter__(self) -> Iterator[dict]:
+        for names, values in self.records:
+            yield dict(zip(names, values))
+
+    def __len__(self):
+        return len(self.records)
+
+    # MagicMock compatible API
+    @property
+    def call_count(self) -> int:
+        return len(self.records)
+
+    @property
+    def called(self) -> bool:
+        return len(self.records) > 0
+
+    @property
+    def call_args_list(self) -> List[_Call]:
+        return [call(**kwargs) for kwargs in self]
+
+    @property
+    def call_args(self) -> Optional[_Call]:
+        if not self.records:
+            return None
+        names, values = self.records[-1]
+        return call(**dict(zip(names, values)))
+
+    def reset_mock(self):
+        self.records.clear()
+
+    def _match(self, record: Record, kwargs: dict) -> bool:
+        names, values = record
+        return len(names) == len(kwargs) and all(
+            kwargs.get(name, _MISSING) == value for name, value in zip(names, values)
+        )
+
+    def _expected(self, args, kwargs) -> dict:
+        if args:
+            raise TypeError(
+                f"{self.name} only records keyword arguments, got positional {args}"
+            )
+        return kwargs
+
+    def assert_called(self):
+        if not self.records:
+            raise AssertionError(f"Expected '{self.name}' to have been called.")
+
+    def assert_not_called(self):
+        if self.records:
+            raise AssertionError(
+                f"Expected '{self.name}' to not have been called. Called {self.call_count} times."
+            )
+
+    def assert_called_with(self, *args, **kwargs):
+        expected = self._expected(args, kwargs)
+        if not self.records:
+            raise AssertionError(
+                f"Expected call: {call(**expected)}\nNot called ({self.name})"
+            )
+        if not self._match(self.records[-1], expected):
+            raise AssertionError(
+                f"Expected call: {call(**expected)}\nActual call: {self.call_args} ({self.name})"
+            )
+
+    def assert_called_once_with(self, *args, **kwargs):
+        if self.call_count != 1:
+            raise AssertionError(
+                f"Expected '{self.name}' to be called once. Called {self.call_count} times."
+            )
+        self.assert_called_with(*args, **kwargs)
+
+    def assert_any_call(self, *args, **kwargs):
+        expected = self._expected(args, kwargs)
+        if not any(self._match(record, expected) for record in self.records):
+            raise AssertionError(f"{call(**expected)} call not found ({self.name})")
+
+    def assert_has_calls(self, calls: Sequence[_Call], any_order: bool = False):
+        expected = [self._expected(c.args, c.kwargs) for c in calls]
+        if not expected:
+            return
+
+        if any_order:
+            remaining = list(self.records)
+            for kwargs in expected:
+                index = next(
+                    (
+                        i
+                        for i, record in enumerate(remaining)
+                        if self._match(record, kwargs)
+                    ),
+                    None,
+                )
+                if index is None:
+                    raise AssertionError(
+                        f"{call(**kwargs)} not all found in call list ({self.name})"
+                    )
+                del remaining[index]
+            return
+
+        for start in range(len(self.records) - len(expected) + 1):
+            if all(
+                self._match(self.records[start + i], kwargs)
+                for i, kwargs in enumerate(expected)
+            ):
+                return
+        raise AssertionError(
+            f"Calls not found.\nExpected: {[call(**kwargs) for kwargs in expected]} ({self.name})"
+        )
+
+
+class SyscallJournal:
+    """
+    Recorders of all the syscalls, with typed queries over them.
+    """
+
+    def __init__(self):
+        self.call_contract = SyscallRecorder("call_contract")
+        self.library_call = SyscallRecorder("library_call")
+        self.storage = SyscallRecorder("storage")
+        self.event = SyscallRecorder("event")
+        self.replace_class = SyscallRecorder("replace_class")
+        self.send_message_to_l1 = SyscallRecorder("send_message_to_l1")
+        self.deploy = SyscallRecorder("deploy")
+
+    @property
+    def recorders(self) -> List[SyscallRecorder]:
+        return [
+            self.call_contract,
+            self.library_call,
+            self.storage,
+            self.event,
+            self.replace_class,
+            self.send_message_to_l1,
+            self.deploy,
+        ]
+
+    def clear(self):
+        for recorder in self.recorders:
+            recorder.reset_mock()
+
+    def storage_reads(self, address: Optional[int] = None) -> List[int]:
+        """Return the addresses read, in order, optionally filtered by address."""
+        return [
+            values[0]
+            for names, values in self.storage.records
+            if names == ("address",) and (address is None or values[0] == address)
+        ]
+
+    def storage_writes(self, address: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Return the (address, value) written, in order, optionally filtered by address."""
+        return [
+            (values[0], values[1])
+            for names, values in self.storage.records
+            if names == ("address", "value")
+            and (address is None or values[0] == address)
+        ]
+
+    def events(self, keys: Optional[Sequence[int]] = None) -> List[dict]:
+        """Return the emitted events whose keys start with the given keys, in order."""
+        keys = list(keys or [])
+        return [
+            event for event in self.event if list(event["keys"][: len(keys)]) == keys
+        ]
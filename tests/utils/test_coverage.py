@@ -0,0 +1,54 @@
+import pytest
+
+from tests.utils.coverage import (
+    VmWithCoverage,
+    get_program_coverage,
+    report_runs,
+    reset,
+)
+
+SOURCE = """
+func double(x: felt) -> felt {
+    return x * 2;
+}
+
+func never_called() -> felt {
+    return 0;
+}
+
+func compute() -> felt {
+    let a = double(1);
+    let b = double(a);
+    return b;
+}
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_coverage():
+    reset()
+    yield
+    reset()
+
+
+class TestVmWithCoverage:
+    def test_should_count_executed_pcs(self, run_cairo):
+        runner = run_cairo(SOURCE, "compute", vm_class=VmWithCoverage)
+        coverage = get_program_coverage(runner.program)
+
+        double = runner.program.get_label("double")
+        never_called = runner.program.get_label("never_called")
+        assert coverage.pc_hits[double] == 2
+        assert coverage.pc_hits[never_called] == 0
+        assert sum(coverage.pc_hits) == runner.vm.current_step
+
+    def test_should_report_line_hits(self, run_cairo):
+        run_cairo(SOURCE, "compute", vm_class=VmWithCoverage)
+
+        (file,) = report_runs()
+        assert file.name == "source.cairo"
+        hits = dict(zip(file.lines, file.hits))
+        assert hits[3] == 2  # return x * 2;
+        assert hits[7] == 0  # return 0;
+        assert hits[11] == 1  # let a = double(1);
+        assert file.missed == [7]
@@ -0,0 +1,184 @@
+import pytest
+
+from tests.utils.benchmark import record_run
+from tests.utils.ef_tests import (
+    EFTestResults,
+    EFTestsCache,
+    SkipList,
+    VmWithProgramAccesses,
+)
+
+SOURCE = """
+from starkware.cairo.common.registers import get_label_location
+
+func run_first() -> felt {
+    return first(1);
+}
+
+func run_second() -> felt {
+    return second(1);
+}
+
+func run_table() -> felt {
+    return read_table(1);
+}
+
+func first(x: felt) -> felt {
+    return x + FIRST;
+}
+
+func second(x: felt) -> felt {
+    return x + SECOND;
+}
+
+func read_table(i: felt) -> felt {
+    let (table) = get_label_location(values);
+    return [table + i];
+
+    values:
+    dw 10;
+    dw TABLE;
+}
+
+func unreached(x: felt) -> felt {
+    return x + UNREACHED;
+}
+"""
+ENTRYPOINTS = ["run_first", "run_second", "run_table"]
+
+
+def program_source(**constants) -> str:
+    constants = {"FIRST": 1, "SECOND": 2, "TABLE": 3, "UNREACHED": 4, **constants}
+    source = SOURCE
+    for name, value in constants.items():
+        source = source.replace(name, str(value))
+    return source
+
+
+@pytest.fixture
+def ef_tests_results(tmp_path):
+    results = EFTestResults()
+    results.cache = EFTestsCache(tmp_path)
+    return results
+
+
+@pytest.fixture
+def run_and_cache(run_cairo, ef_tests_results):
+    """
+    Run each entrypoint of the given program as an EF test cached under its entrypoint name.
+    """
+
+    def _run(source: str):
+        for entrypoint in ENTRYPOINTS:
+            with ef_tests_results.run(entrypoint, key=entrypoint):
+                runner = run_cairo(source, entrypoint, vm_class=VmWithProgramAccesses)
+                record_run(runner, wall_time=0)
+        return runner.program
+
+    return _run
+
+
+def cached_entrypoints(ef_tests_results, program):
+    return [
+        entrypoint
+        for entrypoint in ENTRYPOINTS
+        if ef_tests_results.cache.get(entrypoint, program) is not None
+    ]
+
+
+class TestSkipList:
+    SKIP_LIST = SkipList(
+        directories={"stSkipped"},
+        filenames={"stExample": {"add11"}},
+        testnames={
+            "eip198_modexp_precompile": {
+                "modexp__fork_Cancun_minus_blockchain_test_minus_EIP_minus_198_minus_case1"
+            }
+        },
+    )
+
+    @pytest.mark.parametrize(
+        "test_id, folder, skipped",
+        [
+            ("stSkipped_any_Cancun", None, True),
+            ("stExample_add11_d0g0v0_Cancun", None, True),
+            ("stExample_add11_d0g0v0_Cancun", "stExample", True),
+            ("stExample_add12_d0g0v0_Cancun", "stExample", False),
+            (
+                "test_modexp[fork_Cancun-blockchain_test-EIP-198-case1]",
+                "eip198_modexp_precompile",
+                True,
+            ),
+            (
+                "test_modexp[fork_Cancun-blockchain_test-EIP-198-case2]",
+                "eip198_modexp_precompile",
+                False,
+            ),
+        ],
+    )
+    def test_is_skipped(self, test_id, folder, skipped):
+        assert self.SKIP_LIST.is_skipped(test_id, folder) is skipped
+
+
+class TestVmWithProgramAccesses:
+    def test_should_only_record_executed_and_read_offsets(self, run_cairo):
+        runner = run_cairo(
+            program_source(), "run_table", vm_class=VmWithProgramAccesses
+        )
+
+        program = runner.program
+        accesses = runner.vm.program_accesses
+        assert program.get_label("read_table") in accesses
+        assert program.get_label("read_table.values") + 1 in accesses
+        assert program.get_label("read_table.values") not in accesses
+        assert program.get_label("first") not in accesses
+        assert program.get_label("unreached") not in accesses
+
+
+class TestEFTestsCache:
+    def test_should_miss_when_empty(self, run_cairo, ef_tests_results):
+        program = run_cairo(program_source(), "run_first").program
+
+        assert cached_entrypoints(ef_tests_results, program) == []
+
+    def test_should_hit_when_program_unchanged(self, run_and_cache, ef_tests_results):
+        program = run_and_cache(program_source())
+
+        assert cached_entrypoints(ef_tests_results, program) == ENTRYPOINTS
+        assert ef_tests_results.replay("run_first", program)
+
+    def test_should_hit_when_only_unreached_code_changed(
+        self, run_cairo, run_and_cache, ef_tests_results
+    ):
+        run_and_cache(program_source())
+
+        program = run_cairo(program_source(UNREACHED=5), "run_first").program
+        assert cached_entrypoints(ef_tests_results, program) == ENTRYPOINTS
+
+    @pytest.mark.parametrize(
+        "constants, invalidated",
+        [
+            ({"FIRST": 5}, ["run_first"]),
+            ({"SECOND": 5}, ["run_second"]),
+            ({"TABLE": 5}, ["run_table"]),
+            ({"FIRST": 5, "TABLE": 5}, ["run_first", "run_table"]),
+        ],
+    )
+    def test_should_only_invalidate_tests_reaching_changed_code(
+        self, run_cairo, run_and_cache, ef_tests_results, constants, invalidated
+    ):
+        run_and_cache(program_source())
+
+        program = run_cairo(program_source(**constants), "run_first").program
+        assert cached_entrypoints(ef_tests_results, program) == [
+            entrypoint for entrypoint in ENTRYPOINTS if entrypoint not in invalidated
+        ]
+
+    def test_should_not_cache_runs_without_program_accesses(
+        self, run_cairo, ef_tests_results
+    ):
+        with ef_tests_results.run("run_first", key="run_first"):
+            runner = run_cairo(program_source(), "run_first")
+            record_run(runner, wall_time=0)
+
+        assert cached_entrypoints(ef_tests_results, runner.program) == []
@@ -0,0 +1,100 @@
+from tests.utils.opcode_accounting import (
+    JUMP_TABLE_SIZE,
+    VmWithOpcodeAccounting,
+    get_jump_table,
+    opcode_report,
+)
+
+# A minimal exec_opcode dispatching like the Interpreter one: handlers of odd opcodes use one
+# range check.
+IMPLICIT_ARGS = (
+    "syscall_ptr, pedersen_ptr, range_check_ptr, bitwise_ptr, stack, memory, state"
+)
+JUMP_TABLE = "\n".join(
+    f"        call {'odd' if opcode % 2 else 'even'};\n        jmp end;"
+    for opcode in range(JUMP_TABLE_SIZE)
+)
+SOURCE = f"""
+func even{{{IMPLICIT_ARGS}}}(evm: felt) -> felt {{
+    return evm;
+}}
+
+func odd{{{IMPLICIT_ARGS}}}(evm: felt) -> felt {{
+    let range_check_ptr = range_check_ptr + 1;
+    return evm;
+}}
+
+namespace Interpreter {{
+    func exec_opcode{{{IMPLICIT_ARGS}}}(evm: felt, opcode_number: felt) -> felt {{
+        tempvar offset = 1 + 4 * opcode_number;
+
+        [ap] = syscall_ptr, ap++;
+        [ap] = pedersen_ptr, ap++;
+        [ap] = range_check_ptr, ap++;
+        [ap] = bitwise_ptr, ap++;
+        [ap] = stack, ap++;
+        [ap] = memory, ap++;
+        [ap] = state, ap++;
+        [ap] = evm, ap++;
+
+        jmp rel offset;
+{JUMP_TABLE}
+
+        end:
+        let syscall_ptr = [ap - 8];
+        let pedersen_ptr = [ap - 7];
+        let range_check_ptr = [ap - 6];
+        let bitwise_ptr = [ap - 5];
+        let stack = [ap - 4];
+        let memory = [ap - 3];
+        let state = [ap - 2];
+        let evm = [ap - 1];
+        return evm;
+    }}
+}}
+
+func run_opcodes{{range_check_ptr}}() {{
+    let syscall_ptr = 0;
+    let pedersen_ptr = 0;
+    let bitwise_ptr = 0;
+    let stack = 0;
+    let memory = 0;
+    let state = 0;
+    with syscall_ptr, pedersen_ptr, bitwise_ptr, stack, memory, state {{
+        let evm = Interpreter.exec_opcode(0, 0x01);
+        let evm = Interpreter.exec_opcode(evm, 0x60);
+        let evm = Interpreter.exec_opcode(evm, 0x01);
+    }}
+    return ();
+}}
+"""
+
+
+class TestVmWithOpcodeAccounting:
+    def test_should_count_executions_and_steps(self, run_cairo):
+        runner = run_cairo(SOURCE, "run_opcodes", vm_class=VmWithOpcodeAccounting)
+
+        # opcode -> [executions, steps, pedersen, range_check, bitwise]
+        assert runner.vm.opcode_resources == {
+            0x01: [2, 20, 0, 2, 0],
+            0x60: [1, 10, 0, 0, 0],
+        }
+
+    def test_report_should_name_opcodes(self, run_cairo):
+        runner = run_cairo(SOURCE, "run_opcodes", vm_class=VmWithOpcodeAccounting)
+
+        report = opcode_report(runner.vm.opcode_resources)
+        assert report[["name", "executions", "mean_steps"]].values.tolist() == [
+            ["ADD", 2, 10.0],
+            ["PUSH1", 1, 10.0],
+        ]
+
+    def test_should_ignore_programs_without_interpreter(self, run_cairo):
+        runner = run_cairo(
+            "func run_opcodes() {\n    return ();\n}\n",
+            "run_opcodes",
+            vm_class=VmWithOpcodeAccounting,
+        )
+
+        assert get_jump_table(runner.program) == {}
+        assert runner.vm.opcode_resources == {}
@@ -0,0 +1,135 @@
+import pytest
+from starkware.cairo.lang.cairo_constants import DEFAULT_PRIME
+from starkware.cairo.lang.compiler.cairo_compile import (
+    compile_cairo,
+    get_module_reader,
+)
+
+from tests.utils import program_cache
+from tests.utils.program_cache import (
+    cached_compile,
+    collect_imported_modules,
+    get_program_hash,
+)
+
+
+@pytest.fixture
+def cairo_path(tmp_path):
+    return tmp_path / "src"
+
+
+@pytest.fixture
+def write_module(cairo_path):
+    def _write(module_name, code):
+        path = cairo_path / f"{module_name.replace('.', '/')}.cairo"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code)
+
+    return _write
+
+
+@pytest.fixture
+def read_module(cairo_path, write_module):
+    write_module(
+        "lib.math",
+        "from lib.constants import ONE\n\nfunc inc(x: felt) -> felt {\n    return x + ONE;\n}\n",
+    )
+    write_module("lib.constants", "const ONE = 1;\n")
+    write_module("lib.unused", "const TWO = 2;\n")
+    return get_module_reader(cairo_path=[str(cairo_path)]).read
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "main.cairo"
+    path.write_text(
+        "from lib.math import inc\n\nfunc compute() -> felt {\n    return inc(1);\n}\n"
+    )
+    return path
+
+
+class TestCollectImportedModules:
+    def test_should_follow_imports_transitively(self, read_module):
+        modules = collect_imported_modules(
+            "from lib.math import inc\nimport lib.unused\n", read_module
+        )
+
+        assert set(modules) == {"lib.math", "lib.constants", "lib.unused"}
+
+    def test_should_keep_unresolved_modules_empty(self, read_module):
+        modules = collect_imported_modules("from lib.missing import x\n", read_module)
+
+        assert modules == {"lib.missing": ""}
+
+    def test_should_visit_cyclic_imports_once(self, read_module, write_module):
+        write_module("lib.constants", "from lib.math import inc\nconst ONE = 1;\n")
+
+        assert set(collect_imported_modules("import lib.math\n", read_module)) == {
+            "lib.math",
+            "lib.constants",
+        }
+
+
+class TestGetProgramHash:
+    def test_should_change_with_imported_modules(
+        self, source, read_module, write_module
+    ):
+        program_hash = get_program_hash(source, read_module)
+        write_module("lib.constants", "const ONE = 2;\n")
+
+        assert get_program_hash(source, read_module) != program_hash
+
+    def test_should_not_change_with_other_modules(
+        self, source, read_module, write_module
+    ):
+        program_hash = get_program_hash(source, read_module)
+        write_module("lib.unused", "const TWO = 3;\n")
+
+        assert get_program_hash(source, read_module) == program_hash
+
+
+class TestCachedCompile:
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(program_cache, "PROGRAM_CACHE_DIR", tmp_path / "cache")
+        return tmp_path / "cache"
+
+    @pytest.fixture
+    def compile_fn(self, cairo_path):
+        calls = []
+
+        def _compile(path):
+            calls.append(path)
+            return compile_cairo(
+                path.read_text(), prime=DEFAULT_PRIME, cairo_path=[str(cairo_path)]
+            )
+
+        _compile.calls = calls
+        return _compile
+
+    def test_should_compile_once(self, source, read_module, compile_fn):
+        program = cached_compile(source, read_module, compile_fn)
+        cached = cached_compile(source, read_module, compile_fn)
+
+        assert len(compile_fn.calls) == 1
+        assert cached.data == program.data
+        assert cached.get_label("compute") == program.get_label("compute")
+
+    def test_should_recompile_when_an_import_changes(
+        self, source, read_module, write_module, compile_fn
+    ):
+        cached_compile(source, read_module, compile_fn)
+        write_module("lib.constants", "const ONE = 2;\n")
+        cached_compile(source, read_module, compile_fn)
+
+        assert len(compile_fn.calls) == 2
+
+    def test_should_recompile_invalid_entries(
+        self, source, read_module, compile_fn, cache_dir
+    ):
+        program = cached_compile(source, read_module, compile_fn)
+        (cache_file,) = cache_dir.glob("*.json")
+        cache_file.write_text("{")
+
+        assert cached_compile(source, read_module, compile_fn).data == program.data
+        assert len(compile_fn.calls) == 2
@@ -0,0 +1,57 @@
+import gzip
+
+import pytest
+from starkware.cairo.lang.tracer.third_party.profile_pb2 import Profile
+from starkware.cairo.lang.vm.memory_segments import FIRST_MEMORY_ADDR as PROGRAM_BASE
+
+from tests.utils.reporting import VmWithProfiling, profile_from_runner
+
+SOURCE = """
+func square(x: felt) -> felt {
+    return x * x;
+}
+
+func compute() -> felt {
+    let a = square(2);
+    let b = square(a);
+    return b;
+}
+"""
+
+
+def load_profile(data: bytes) -> Profile:
+    profile = Profile()
+    profile.ParseFromString(gzip.decompress(data))
+    return profile
+
+
+class TestVmWithProfiling:
+    @pytest.mark.parametrize("sampling_interval", [1, 3])
+    def test_should_weight_samples_by_interval(self, run_cairo, sampling_interval):
+        vm_class = type(
+            "SampledVm", (VmWithProfiling,), {"sampling_interval": sampling_interval}
+        )
+        runner = run_cairo(SOURCE, "compute", vm_class=vm_class)
+
+        total = sum(runner.vm.profile_samples.values())
+        assert total >= runner.vm.current_step
+        assert total - runner.vm.current_step < sampling_interval
+
+    def test_should_build_profile_with_call_stacks(self, run_cairo):
+        runner = run_cairo(SOURCE, "compute", vm_class=VmWithProfiling)
+
+        profile = load_profile(profile_from_runner(runner, program_base=PROGRAM_BASE))
+
+        strings = list(profile.string_table)
+        functions = {f.id: strings[f.name] for f in profile.function}
+        locations = {
+            loc.id: functions[loc.line[0].function_id] for loc in profile.location
+        }
+        assert sum(sample.value[0] for sample in profile.sample) == (
+            runner.vm.current_step
+        )
+        stacks = {
+            tuple(locations[loc_id] for loc_id in sample.location_id)
+            for sample in profile.sample
+        }
+        assert ("__main__.square", "__main__.compute") in stacks
@@ -0,0 +1,93 @@
+from starkware.cairo.lang.cairo_constants import DEFAULT_PRIME
+from starkware.cairo.lang.compiler.cairo_compile import compile_cairo
+from starkware.cairo.lang.vm.vm_core import VirtualMachine
+
+from tests.utils.runner_pool import RunnerPool
+
+SOURCE = """
+%builtins output pedersen range_check
+
+from starkware.cairo.common.cairo_builtins import HashBuiltin
+
+func compute{range_check_ptr, pedersen_ptr: HashBuiltin*}() -> felt {
+    let x = 1;
+    return (x + 1) * 2;
+}
+
+func write(output_ptr: felt*) {
+    assert [output_ptr] = 42;
+    return ();
+}
+"""
+
+
+def run(runner, template):
+    runner.initialize_vm(hint_locals={}, vm_class=VirtualMachine)
+    runner.run_until_pc(template.end)
+    runner.end_run()
+    return runner.vm.run_context.ap
+
+
+class TestRunnerPool:
+    @classmethod
+    def setup_class(cls):
+        cls.program = compile_cairo(
+            [(SOURCE, "source.cairo")], prime=DEFAULT_PRIME, debug_info=True
+        )
+
+    def test_should_build_a_template_once_per_key(self):
+        pool = RunnerPool(self.program)
+
+        _, template = pool.get(
+            "compute", layout="starknet_with_keccak", proof_mode=False
+        )
+        _, same = pool.get("compute", layout="starknet_with_keccak", proof_mode=False)
+        pool.get("write", layout="starknet_with_keccak", proof_mode=False)
+
+        assert same is template
+        assert len(pool.templates) == 2
+        assert len(pool.setup_durations) == 3
+
+    def test_should_use_the_builtins_of_the_implicit_args_in_order(self):
+        pool = RunnerPool(self.program)
+
+        runner, template = pool.get(
+            "compute", layout="starknet_with_keccak", proof_mode=False
+        )
+
+        assert template.implicit_args == ["range_check_ptr", "pedersen_ptr"]
+        assert template.args == []
+        assert template.builtins == ["pedersen", "range_check"]
+        assert list(runner.builtin_runners) == [
+            "pedersen_builtin",
+            "range_check_builtin",
+        ]
+        assert template.output_ptr is None
+
+    def test_should_allocate_the_output_segment(self):
+        pool = RunnerPool(self.program)
+
+        runner, template = pool.get(
+            "write", layout="starknet_with_keccak", proof_mode=False
+        )
+        run(runner, template)
+
+        assert template.output_ptr is not None
+        assert runner.memory[template.output_ptr] == 42
+
+    def test_should_hand_out_independent_runners(self):
+        pool = RunnerPool(self.program)
+
+        first, template = pool.get(
+            "compute", layout="starknet_with_keccak", proof_mode=False
+        )
+        ap = run(first, template)
+        second, _ = pool.get("compute", layout="starknet_with_keccak", proof_mode=False)
+
+        assert first.memory[ap - 1] == 4
+        # The execution of the first runner is not in the template memory.
+        assert ap - 1 not in second.memory
+        assert len(template.memory) < len(first.memory)
+
+        assert run(second, template) == ap
+        assert second.memory[ap - 1] == 4
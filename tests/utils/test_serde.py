@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from starkware.cairo.lang.cairo_constants import DEFAULT_PRIME
+from starkware.cairo.lang.compiler.ast.cairo_types import TypeFelt
+
+from tests.utils.serde import Serde
+
+SOURCE = """
+from starkware.cairo.common.alloc import alloc
+
+func fill() -> (bytes: felt*, felts: felt*) {
+    let (bytes) = alloc();
+    assert bytes[0] = 0x60;
+    assert bytes[1] = 0x01;
+    assert bytes[2] = 0xff;
+    assert bytes[3] = 0x00;
+    let (felts) = alloc();
+    assert felts[0] = 2 ** 128;
+    assert felts[1] = -1;
+    assert felts[2] = 0;
+    return (bytes=bytes, felts=felts);
+}
+"""
+BYTES = [0x60, 0x01, 0xFF, 0x00]
+FELTS = [2**128, DEFAULT_PRIME - 1, 0]
+
+
+@pytest.fixture
+def fill(run_cairo):
+    """
+    Return the Serde of a run of fill and the bytes and felts pointers it returned.
+    """
+    runner = run_cairo(SOURCE, "fill")
+    ap = runner.vm.run_context.ap
+    return Serde(runner), runner.vm_memory[ap - 2], runner.vm_memory[ap - 1]
+
+
+def serialize_per_felt(serde, ptr, length):
+    return [serde._serialize(TypeFelt(), ptr + i) for i in range(length)]
+
+
+class TestSerializeBytes:
+    @pytest.mark.parametrize("length", [None, 0, 1, len(BYTES)])
+    def test_should_match_per_felt_serialization(self, fill, length):
+        serde, bytes_ptr, _ = fill
+        expected = serialize_per_felt(
+            serde, bytes_ptr, len(BYTES) if length is None else length
+        )
+
+        assert serde.serialize_bytes(bytes_ptr, length) == bytes(expected)
+
+    def test_should_raise_on_felts_not_fitting_in_a_byte(self, fill):
+        serde, _, felts_ptr = fill
+        with pytest.raises(ValueError):
+            serde.serialize_bytes(felts_ptr)
+
+
+class TestSerializeArray:
+    @pytest.mark.parametrize("length", [None, 0, 2, len(BYTES)])
+    def test_should_match_per_felt_serialization(self, fill, length):
+        serde, bytes_ptr, _ = fill
+        expected = serialize_per_felt(
+            serde, bytes_ptr, len(BYTES) if length is None else length
+        )
+
+        array = serde.serialize_array(bytes_ptr, length)
+        assert array.dtype == np.uint8
+        assert array.tolist() == expected
+
+    def test_should_keep_arbitrary_felts_with_object_dtype(self, fill):
+        serde, _, felts_ptr = fill
+        array = serde.serialize_array(felts_ptr, len(FELTS), dtype=object)
+
+        assert array.tolist() == serialize_per_felt(serde, felts_ptr, len(FELTS))
+        assert array.tolist() == FELTS
@@ -0,0 +1,120 @@
+from starkware.starknet.public.abi import (
+    get_selector_from_name,
+    get_storage_var_address,
+)
+
+from tests.utils.starknet_state import OverlayDict, StarknetState
+from tests.utils.syscall_handler import SyscallHandler, parse_state
+
+CONTRACT = 0xC0FFEE
+OTHER_CONTRACT = 0xBEEF
+
+
+class TestOverlayDict:
+    def test_rollback_should_drop_writes_and_deletes(self):
+        mapping = OverlayDict([{"a": 1, "b": 2}])
+
+        snapshot_id = mapping.snapshot()
+        mapping["a"] = 3
+        del mapping["b"]
+        assert dict(mapping.items()) == {"a": 3}
+
+        mapping.rollback(snapshot_id)
+        assert dict(mapping.items()) == {"a": 1, "b": 2}
+
+    def test_fork_should_not_share_writes(self):
+        parent = OverlayDict([{"a": 1}])
+
+        fork = parent.fork()
+        fork["a"] = 2
+        fork["b"] = 3
+        parent["c"] = 4
+
+        assert dict(parent.items()) == {"a": 1, "c": 4}
+        assert dict(fork.items()) == {"a": 2, "b": 3}
+
+    def test_parent_rollback_below_fork_should_not_leak_into_fork(self):
+        parent = OverlayDict()
+        parent["a"] = 1
+        snapshot_id = parent.snapshot()
+        parent["b"] = 2
+
+        fork = parent.fork()
+        parent.rollback(snapshot_id)
+        parent["b"] = 3
+        parent["c"] = 4
+
+        assert dict(fork.items()) == {"a": 1, "b": 2}
+        assert dict(parent.items()) == {"a": 1, "b": 3, "c": 4}
+
+
+class TestStarknetState:
+    def test_storage_should_be_per_contract(self):
+        state = StarknetState()
+
+        state.write_storage(CONTRACT, 1, 0xA)
+        state.write_storage(OTHER_CONTRACT, 1, 0xB)
+
+        assert state.read_storage(CONTRACT, 1) == 0xA
+        assert state.read_storage(OTHER_CONTRACT, 1) == 0xB
+        assert state.read_storage(0xDEAD, 1, default=0) == 0
+        assert dict(state.contract_storage(CONTRACT).items()) == {1: 0xA}
+
+    def test_rollback_should_drop_contracts_created_after_snapshot(self):
+        state = StarknetState()
+        state.write_storage(CONTRACT, 1, 0xA)
+
+        snapshot_id = state.snapshot()
+        state.write_storage(CONTRACT, 1, 0xB)
+        state.write_storage(OTHER_CONTRACT, 1, 0xC)
+        state.handlers[0x1] = lambda *_: [1]
+        state.rollback(snapshot_id)
+
+        assert state.read_storage(CONTRACT, 1) == 0xA
+        assert OTHER_CONTRACT not in state.storage
+        assert 0x1 not in state.handlers
+
+    def test_fork_writes_should_not_leak_into_parent(self):
+        parent = StarknetState()
+        parent.write_storage(CONTRACT, 1, 0xA)
+        parent.accounts[0x1] = {"nonce": 1}
+
+        fork = parent.fork()
+        fork.write_storage(CONTRACT, 1, 0xB)
+        fork.write_storage(OTHER_CONTRACT, 1, 0xC)
+        fork.handlers[0x1] = lambda *_: [1]
+        fork.accounts[0x2] = {"nonce": 2}
+        parent.write_storage(CONTRACT, 2, 0xD)
+
+        assert parent.read_storage(CONTRACT, 1) == 0xA
+        assert parent.read_storage(OTHER_CONTRACT, 1) is None
+        assert 0x1 not in parent.handlers
+        assert 0x2 not in parent.accounts
+        assert fork.read_storage(CONTRACT, 1) == 0xB
+        assert fork.read_storage(CONTRACT, 2) is None
+        assert fork.accounts[0x1] == {"nonce": 1}
+
+
+class TestSyscallHandlerUseState:
+    def test_patches_in_fork_should_not_leak_into_parent(self):
+        parent = SyscallHandler.state
+        base_fee_address = get_storage_var_address("Kakarot_base_fee")
+        address = 0x1000000000000000000000000000000000000000
+        account = {"balance": "0x01", "code": "0x6001", "nonce": "0x02", "storage": {}}
+
+        with (
+            SyscallHandler.use_state(parent.fork()) as fork,
+            SyscallHandler.patch("Kakarot_base_fee", 0x10),
+            SyscallHandler.patch_state(parse_state({hex(address): account})),
+        ):
+            assert SyscallHandler.state is fork
+            contract_address = SyscallHandler.contract_address
+            assert fork.read_storage(contract_address, base_fee_address) == 0x10
+            bytecode = fork.handlers[get_selector_from_name("bytecode")]
+            assert bytecode(address, []) == [2, 0x60, 0x01]
+
+            assert parent.read_storage(contract_address, base_fee_address) is None
+            assert address not in parent.accounts
+            assert get_selector_from_name("bytecode") not in parent.handlers
+
+        assert SyscallHandler.state is parent
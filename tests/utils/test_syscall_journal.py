@@ -0,0 +1,67 @@
+from unittest.mock import call
+
+import pytest
+
+from tests.utils.syscall_journal import SyscallJournal
+
+
+@pytest.fixture
+def journal():
+    journal = SyscallJournal()
+    journal.storage(address=0x1)
+    journal.storage(address=0x1, value=0xA)
+    journal.storage(address=0x2, value=0xB)
+    journal.storage(address=0x2)
+    journal.storage(address=0x1, value=0xC)
+    journal.event(keys=[0x10, 0x20], data=[1])
+    journal.event(keys=[0x10, 0x30], data=[2])
+    journal.event(keys=[0x40], data=[3])
+    return journal
+
+
+class TestSyscallRecorder:
+    def test_should_support_mock_assertions(self, journal):
+        journal.storage.assert_any_call(address=0x2, value=0xB)
+        journal.storage.assert_called_with(address=0x1, value=0xC)
+        journal.storage.assert_has_calls(
+            [call(address=0x2, value=0xB), call(address=0x2)]
+        )
+        with pytest.raises(AssertionError):
+            journal.storage.assert_any_call(address=0x3)
+        with pytest.raises(TypeError):
+            journal.storage.assert_any_call(0x1)
+        journal.deploy.assert_not_called()
+
+    def test_clear_should_reset_all_recorders(self, journal):
+        journal.clear()
+
+        assert all(recorder.call_count == 0 for recorder in journal.recorders)
+
+
+class TestSyscallJournal:
+    def test_storage_reads(self, journal):
+        assert journal.storage_reads() == [0x1, 0x2]
+        assert journal.storage_reads(0x2) == [0x2]
+
+    @pytest.mark.parametrize(
+        "address, expected",
+        [
+            (None, [(0x1, 0xA), (0x2, 0xB), (0x1, 0xC)]),
+            (0x1, [(0x1, 0xA), (0x1, 0xC)]),
+            (0x3, []),
+        ],
+    )
+    def test_storage_writes(self, journal, address, expected):
+        assert journal.storage_writes(address) == expected
+
+    @pytest.mark.parametrize(
+        "keys, expected_data",
+        [
+            (None, [[1], [2], [3]]),
+            ([0x10], [[1], [2]]),
+            ([0x10, 0x30], [[2]]),
+            ([0x10, 0x30, 0x40], []),
+        ],
+    )
+    def test_events(self, journal, keys, expected_data):
+        assert [event["data"] for event in journal.events(keys)] == expected_data